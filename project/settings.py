@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 
 import environ
@@ -50,12 +51,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'smartgarden.middleware.MetricsMiddleware',
+    'smartgarden.middleware.SlowQueryMiddleware',
+    'smartgarden.middleware.CompressionMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'smartgarden.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware'
@@ -69,6 +74,17 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated'
     ],
+    'DEFAULT_PAGINATION_CLASS': 'smartgarden.pagination.KeysetPagination',
+    # orjson backed when it is installed, the stdlib json otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'smartgarden.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer'
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'smartgarden.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser'
+    ],
 }
 
 SIMPLE_JWT = {
@@ -76,6 +92,16 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True
 }
 
+# Key of the HMAC digests of device keys (manage.py issuedevicekey), falls back to SECRET_KEY; changing it revokes
+# every issued device key
+DEVICE_KEY_SECRET = env.str('DEVICE_KEY_SECRET', default='')
+
+# Seconds between bulk writes of buffered circuit heartbeats, 0 writes every heartbeat through
+HEARTBEAT_FLUSH_INTERVAL = env.float('HEARTBEAT_FLUSH_INTERVAL', default=5)
+
+# Delivery backend of the server-side activation dispatcher (manage.py rundispatcher)
+DISPATCHER_BACKEND = env.str('DISPATCHER_BACKEND', default='smartgarden.dispatcher.LoggingBackend')
+
 ROOT_URLCONF = 'project.urls'
 
 TEMPLATES = [
@@ -107,6 +133,49 @@ DATABASES = {
     'default': env.db('DATABASE_URL')
 }
 
+# Cache, e.g. redis://host:6379/0 or memcache://host:11211 in production; CACHE_URL must point at a cache shared by
+# all workers there, the local memory default is private to every process, so invalidations reach only one of them
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://')
+}
+
+# Cache alias and lifetime of the per-user circuit list responses, used only with a shared cache. The lifetime
+# bounds how long the health flags in a cached response may lag behind, 0 disables the cache
+CIRCUIT_LIST_CACHE = 'default'
+CIRCUIT_LIST_CACHE_TIMEOUT = env.int('CIRCUIT_LIST_CACHE_TIMEOUT', default=60)
+
+# Lifetime of the cached per-user sets of collaborated circuits, used by the write permission check only with
+# a shared cache, a local memory cache falls back to a query per check. The sets are dropped on every collaboration
+# change, the lifetime bounds how long changes made around the signals (bulk inserts, raw SQL) go unnoticed
+COLLABORATIONS_CACHE_TIMEOUT = env.int('COLLABORATIONS_CACHE_TIMEOUT', default=60 * 60)
+
+# Per-route request metrics exposed at api/metrics; workers of a pre-forking server dump theirs to METRICS_DIR
+# every METRICS_SYNC_INTERVAL seconds, so a scrape answered by any worker covers them all
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=True)
+METRICS_DIR = env.str('METRICS_DIR', default='')
+METRICS_SYNC_INTERVAL = env.float('METRICS_SYNC_INTERVAL', default=5)
+
+# Queries slower than the threshold are recorded with their view and a sampled plan into a ring buffer file of
+# SLOW_QUERY_LOG_CAPACITY records (4 KiB each), summarized by manage.py slowqueries; 0 disables the capture
+SLOW_QUERY_THRESHOLD_MS = env.float('SLOW_QUERY_THRESHOLD_MS', default=0)
+SLOW_QUERY_LOG = env.str('SLOW_QUERY_LOG', default=os.path.join(tempfile.gettempdir(), 'smartgarden-slow-queries'))
+SLOW_QUERY_LOG_CAPACITY = env.int('SLOW_QUERY_LOG_CAPACITY', default=1000)
+SLOW_QUERY_EXPLAIN_RATE = env.float('SLOW_QUERY_EXPLAIN_RATE', default=0.1)
+
+# Staff users profile a request by sending the X-Profile header or the profile query parameter, the newest
+# PROFILES_MAX_COUNT profiles are kept in PROFILES_DIR and listed in the admin
+PROFILING_ENABLED = env.bool('PROFILING_ENABLED', default=True)
+PROFILES_DIR = env.str('PROFILES_DIR', default=os.path.join(tempfile.gettempdir(), 'smartgarden-profiles'))
+PROFILES_MAX_COUNT = env.int('PROFILES_MAX_COUNT', default=50)
+
+# API responses of these types are compressed with brotli, when installed, or gzip, as negotiated with the client
+COMPRESSION_ENABLED = env.bool('COMPRESSION_ENABLED', default=True)
+COMPRESSION_MIN_SIZE = env.int('COMPRESSION_MIN_SIZE', default=1024)
+COMPRESSION_BROTLI_QUALITY = env.int('COMPRESSION_BROTLI_QUALITY', default=5)
+COMPRESSION_CONTENT_TYPES = ['application/json', 'application/x-ndjson', 'text/csv', 'text/plain']
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
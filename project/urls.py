@@ -18,11 +18,20 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
 
+from smartgarden.admin import profile_list, profile_download
+from smartgarden.authentication import CircuitTokenObtainPairSerializer, CircuitTokenRefreshSerializer
+from smartgarden.views import DeviceTokenObtainView
+
 urlpatterns = [
     path('', include('smartgarden.urls')),
+    path('admin/profiles/', admin.site.admin_view(profile_list), name='admin-profiles'),
+    path('admin/profiles/<str:name>', admin.site.admin_view(profile_download), name='admin-profile-download'),
     path('admin/', admin.site.urls),
-    path('api/auth/token', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/auth/token/refresh', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/auth/token', TokenObtainPairView.as_view(serializer_class=CircuitTokenObtainPairSerializer),
+         name='token_obtain_pair'),
+    path('api/auth/token/refresh', TokenRefreshView.as_view(serializer_class=CircuitTokenRefreshSerializer),
+         name='token_refresh'),
+    path('api/auth/device-token', DeviceTokenObtainView.as_view(), name='device_token_obtain'),
     path('api/auth/token/verify', TokenVerifyView.as_view(), name='token_verify'),
     path('__debug__/', include(debug_toolbar.urls)),
 ]
@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.shortcuts import render
 
 from smartgarden.models import *
+from smartgarden.profiling import list_profiles, profile_path
 
 admin.site.register(User)
 admin.site.register(Circuit)
@@ -8,3 +11,23 @@ admin.site.register(CircuitCollaboration)
 admin.site.register(ActivationLog)
 admin.site.register(ScheduledOneTimeActivation)
 admin.site.register(ScheduledActivation)
+admin.site.register(HourlyActivationRollup)
+admin.site.register(DailyActivationRollup)
+admin.site.register(DueActivation)
+admin.site.register(DeviceKey)
+
+
+def profile_list(request):
+    return render(request, 'admin/smartgarden/profiles.html', {
+        **admin.site.each_context(request),
+        'title': 'Profiles',
+        'profiles': list_profiles(),
+    })
+
+
+def profile_download(request, name):
+    path = profile_path(name)
+    if path is None:
+        raise Http404()
+
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name, content_type='application/octet-stream')
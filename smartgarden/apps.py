@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SmartgardenConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'smartgarden'
+
+    def ready(self):
+        # noinspection PyUnresolvedReferences
+        import smartgarden.signals
@@ -0,0 +1,78 @@
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from smartgarden.device_keys import verify_device_key
+from smartgarden.models import Circuit, User
+
+CIRCUIT_ID_CLAIM = 'circuit_id'
+
+
+def controlled_circuit_id(user_id):
+    return Circuit.objects \
+        .filter(controller_id=user_id) \
+        .values_list('pk', flat=True) \
+        .first()
+
+
+class CircuitTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Embeds the id of the circuit controlled by the user into the tokens, access tokens copy the claim from
+    the refresh token. The claim is null when no circuit is assigned.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[CIRCUIT_ID_CLAIM] = controlled_circuit_id(user.pk)
+
+        return token
+
+
+class CircuitTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Resolves the controlled circuit anew on every refresh, so a reassigned circuit is picked up by the device
+    within the lifetime of an access token.
+    """
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        refresh[CIRCUIT_ID_CLAIM] = controlled_circuit_id(refresh[api_settings.USER_ID_CLAIM])
+
+        return super().validate({'refresh': str(refresh)})
+
+
+class DeviceKeyAuthentication(BaseAuthentication):
+    """
+    Authenticates devices by the key issued with `manage.py issuedevicekey`, sent as `Authorization: Device <key>`.
+    """
+
+    keyword = 'Device'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid device key header.')
+
+        try:
+            device_key = verify_device_key(auth[1].decode())
+        except UnicodeError:
+            device_key = None
+
+        if device_key is None:
+            raise exceptions.AuthenticationFailed('Invalid device key.')
+
+        user = device_key.user
+        if not user.is_active or user.user_type != User.UserType.DEVICE.value:
+            raise exceptions.AuthenticationFailed('User inactive or not a device.')
+
+        return user, device_key
+
+    def authenticate_header(self, request):
+        return self.keyword
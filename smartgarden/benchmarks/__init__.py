@@ -0,0 +1,24 @@
+import statistics
+import time
+from typing import Callable, List
+
+
+def measure(fn: Callable[[], object], repeat: int) -> List[float]:
+    """
+    Runs fn repeatedly and returns the wall times of the runs in milliseconds.
+    """
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def percentile(timings: List[float], p: int) -> float:
+    if len(timings) == 1:
+        return timings[0]
+
+    return statistics.quantiles(timings, n=100, method='inclusive')[p - 1]
@@ -0,0 +1,62 @@
+import bisect
+import datetime
+import random
+import time
+from typing import Iterator, List
+
+from smartgarden.dispatcher import Dispatcher, Dispatch, InMemoryBackend, utc_now
+from smartgarden.models import DueActivation
+
+FLEET_SIZES = [1000, 10000, 100000]
+ACTIVATIONS_PER_CIRCUIT = 3
+
+
+class StaticDispatcher(Dispatcher):
+    def __init__(self, dispatches: List[Dispatch], **kwargs) -> None:
+        super().__init__(InMemoryBackend(), **kwargs)
+        self.dispatches = sorted(dispatches)
+        self.due_at = [d.due_at for d in self.dispatches]
+
+    def fetch(self, now: datetime.datetime) -> List[Dispatch]:
+        # stands in for the indexed range scan over the due activations table
+        start = bisect.bisect_left(self.due_at, now - self.grace)
+        end = bisect.bisect_left(self.due_at, now + self.window)
+
+        return self.dispatches[start:end]
+
+
+def run(repeat: int) -> Iterator[dict]:
+    """
+    Drives the dispatcher through a simulated day of a whole fleet, without a database, and reports the CPU time
+    spent per day and how many times it had to wake up.
+    """
+
+    rng = random.Random(0)
+    start = utc_now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    for circuits in FLEET_SIZES:
+        dispatches = [
+            Dispatch(start + datetime.timedelta(minutes=rng.randrange(24 * 60)), circuit_id, 100,
+                     DueActivation.Kind.SCHEDULED.value)
+            for circuit_id in range(circuits) for _ in range(ACTIVATIONS_PER_CIRCUIT)
+        ]
+        dispatcher = StaticDispatcher(dispatches, reload_interval=datetime.timedelta(hours=1),
+                                      window=datetime.timedelta(hours=1), clock=lambda: now)
+
+        cpu_start = time.process_time()
+        now = start
+        wakeups = 0
+        delivered = 0
+
+        while now < start + datetime.timedelta(days=1):
+            delivered += len(dispatcher.run_pending(now))
+            wakeups += 1
+            now = dispatcher.next_wakeup()
+
+        yield {
+            'circuits': circuits,
+            'activations': len(dispatches),
+            'delivered': delivered,
+            'wakeups': wakeups,
+            'cpu_s_per_day': time.process_time() - cpu_start,
+        }
@@ -0,0 +1,204 @@
+import datetime
+import itertools
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+import pytz
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from smartgarden.authentication import CircuitTokenObtainPairSerializer
+from smartgarden.benchmarks import measure, percentile
+from smartgarden.fleet import FleetSpec, generate_fleet
+from smartgarden.heartbeats import heartbeat_buffer
+from smartgarden.models import User, Circuit, CircuitCollaboration
+
+FLEET_SIZES = [10, 100, 1000]
+
+
+@dataclass(frozen=True)
+class Budget:
+    """
+    Upper bounds of a single request, None leaves the measure unchecked. Endpoints listing every circuit of the user
+    get their latency and memory bounds per 100 circuits, their query count must not grow with the list.
+    """
+
+    queries: Optional[int] = None
+    p95_ms: Optional[float] = None
+    peak_kib: Optional[float] = None
+    per_circuit: bool = False
+
+
+BUDGETS = {
+    'circuit-list': Budget(queries=3, p95_ms=50, peak_kib=2048, per_circuit=True),
+    'circuit-detail': Budget(queries=3, p95_ms=20, peak_kib=256),
+    'mine-circuit': Budget(queries=3, p95_ms=20, peak_kib=256),
+    'mine-circuit-not-modified': Budget(queries=1, p95_ms=10, peak_kib=128),
+    'mine-circuit-health': Budget(queries=4, p95_ms=20, peak_kib=256),
+    'mine-circuit-heartbeat': Budget(queries=0, p95_ms=10, peak_kib=128),
+    'circuit-schedule-get': Budget(queries=1, p95_ms=10, peak_kib=128),
+    'circuit-schedule-put': Budget(queries=5, p95_ms=20, peak_kib=256),
+    'circuit-one-time-activations-get': Budget(queries=1, p95_ms=10, peak_kib=128),
+    'circuit-one-time-activations-post': Budget(queries=6, p95_ms=20, peak_kib=256),
+    'circuit-activation-log-post': Budget(queries=13, p95_ms=40, peak_kib=256),
+    'circuit-activation-log-list': Budget(queries=1, p95_ms=20, peak_kib=256),
+    'circuit-usage': Budget(queries=1, p95_ms=20, peak_kib=256),
+    'index': Budget(queries=5, p95_ms=40, peak_kib=2048),
+}
+
+
+def get_budgets() -> Dict[str, Budget]:
+    """
+    The default budgets updated with the BENCHMARK_BUDGETS setting, a dict of Budget fields per endpoint.
+    """
+
+    budgets = dict(BUDGETS)
+    for name, overrides in getattr(settings, 'BENCHMARK_BUDGETS', {}).items():
+        budgets[name] = Budget(**{**budgets.get(name, Budget()).__dict__, **overrides})
+
+    return budgets
+
+
+def check_budget(result: dict, budget: Budget, circuits: int) -> List[str]:
+    scale = max(1.0, circuits / 100) if budget.per_circuit else 1.0
+    exceeded = []
+
+    if budget.queries is not None and result['queries'] > budget.queries:
+        exceeded.append(f'queries {result["queries"]} > {budget.queries}')
+    if budget.p95_ms is not None and result['p95_ms'] > budget.p95_ms * scale:
+        exceeded.append(f'p95 {result["p95_ms"]:.1f}ms > {budget.p95_ms * scale:.1f}ms')
+    if budget.peak_kib is not None and result['peak_kib'] > budget.peak_kib * scale:
+        exceeded.append(f'peak {result["peak_kib"]:.0f}KiB > {budget.peak_kib * scale:.0f}KiB')
+
+    return exceeded
+
+
+def clear_caches() -> None:
+    for cache in caches.all():
+        cache.clear()
+
+
+def profile(request: Callable[[], object]) -> dict:
+    """
+    Runs the request once on cold caches, counting its queries and the peak of memory allocated meanwhile.
+    """
+
+    clear_caches()
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    if response.status_code >= 400:
+        raise AssertionError(f'{response.status_code} {getattr(response, "data", response.content)}')
+
+    return {'queries': len(queries), 'peak_kib': peak / 1024}
+
+
+def prepare_fleet(circuits: int) -> dict:
+    """
+    Generates a fleet of the given size with a user collaborating on all of its circuits and returns
+    the clients and ids the requests are made with.
+    """
+
+    domain = f'bench{circuits}.test'
+    generate_fleet(FleetSpec(users=max(1, circuits // 10), circuits=circuits, schedules=3, days=7, seed=circuits,
+                             domain=domain))
+
+    user = User.objects.create(email=f'bench@{domain}', user_type=User.UserType.USER.value)
+    circuit_ids = list(Circuit.objects
+                       .filter(controller__email__endswith=f'@{domain}')
+                       .order_by('pk')
+                       .values_list('pk', flat=True))
+    CircuitCollaboration.objects.bulk_create([CircuitCollaboration(circuit_id=pk, user=user) for pk in circuit_ids],
+                                             ignore_conflicts=True)
+
+    circuit = Circuit.objects.get(pk=circuit_ids[0])
+
+    # a host accepted by ALLOWED_HOSTS outside of tests
+    client = APIClient(SERVER_NAME='localhost')
+    client.force_authenticate(user)
+
+    # devices authenticate with their access token, as they do in production
+    device = APIClient(SERVER_NAME='localhost')
+    access = CircuitTokenObtainPairSerializer.get_token(circuit.controller).access_token
+    device.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    # the first request of a client loads the middleware, WhiteNoise scans the static files meanwhile
+    client.get(reverse('circuit-detail', kwargs={'pk': circuit.pk}))
+    device.get(reverse('mine-circuit'), HTTP_IF_NONE_MATCH=circuit.config_etag)
+
+    return {'client': client, 'device': device, 'circuit_id': circuit.pk, 'etag': circuit.config_etag}
+
+
+def endpoints(fleet: dict) -> Dict[str, Callable[[], object]]:
+    client = fleet['client']
+    device = fleet['device']
+    circuit_id = fleet['circuit_id']
+
+    schedule_url = reverse('circuit-schedule', kwargs={'circuit_id': circuit_id})
+    one_time_activations_url = reverse('circuit-one-time-activations', kwargs={'circuit_id': circuit_id})
+    schedule = client.get(schedule_url).data
+
+    # every logged activation needs its own timestamp, repeated ones are dropped as retries
+    timestamps = (datetime.datetime(2000, 1, 1, tzinfo=pytz.UTC) + datetime.timedelta(seconds=s)
+                  for s in itertools.count())
+    usage_query = {'start': '2000-01-01T00:00:00Z', 'end': '2100-01-01T00:00:00Z', 'resolution': 'day'}
+
+    return {
+        'circuit-list': lambda: client.get(reverse('circuit-list')),
+        'circuit-detail': lambda: client.get(reverse('circuit-detail', kwargs={'pk': circuit_id})),
+        'mine-circuit': lambda: device.get(reverse('mine-circuit')),
+        'mine-circuit-not-modified': lambda: device.get(reverse('mine-circuit'), HTTP_IF_NONE_MATCH=fleet['etag']),
+        'mine-circuit-health': lambda: device.patch(reverse('mine-circuit-health')),
+        'mine-circuit-heartbeat': lambda: device.patch(f'{reverse("mine-circuit-health")}?mode=heartbeat'),
+        'circuit-schedule-get': lambda: client.get(schedule_url),
+        'circuit-schedule-put': lambda: client.put(schedule_url, schedule, format='json'),
+        'circuit-one-time-activations-get': lambda: client.get(one_time_activations_url),
+        'circuit-one-time-activations-post': lambda: client.post(one_time_activations_url, {
+            'amount': 100, 'timestamp': datetime.datetime.now(tz=pytz.UTC).isoformat()
+        }, format='json'),
+        'circuit-activation-log-post': lambda: device.post(reverse('circuit-activation-log'), {
+            'amount': 100, 'timestamp': next(timestamps).isoformat()
+        }, format='json'),
+        'circuit-activation-log-list': lambda: client.get(reverse('circuit-activation-log-list',
+                                                                 kwargs={'circuit_id': circuit_id})),
+        'circuit-usage': lambda: client.get(reverse('circuit-usage', kwargs={'circuit_id': circuit_id}), usage_query),
+        'index': lambda: client.get(reverse('index')),
+    }
+
+
+def run(repeat: int, sizes: List[int] = None, budgets: Dict[str, Budget] = None) -> Iterator[dict]:
+    """
+    Requests every endpoint through the whole middleware stack against fleets of growing size. Query counts and
+    peak memory are taken on cold caches, latencies on warm ones. Every result is checked against its budget.
+    """
+
+    budgets = budgets if budgets is not None else get_budgets()
+
+    for circuits in sizes or FLEET_SIZES:
+        fleet = prepare_fleet(circuits)
+
+        for name, request in endpoints(fleet).items():
+            result = {'name': name, 'circuits': circuits, **profile(request)}
+
+            timings = measure(request, repeat)
+            result['p50_ms'] = percentile(timings, 50)
+            result['p95_ms'] = percentile(timings, 95)
+
+            exceeded = check_budget(result, budgets.get(name, Budget()), circuits)
+            result['budget'] = f'exceeded: {"; ".join(exceeded)}' if exceeded else 'ok'
+
+            yield result
+
+        # buffered heartbeats are written within the benchmark transaction, not after it is rolled back
+        heartbeat_buffer.flush()
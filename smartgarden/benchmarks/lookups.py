@@ -0,0 +1,61 @@
+import datetime
+from typing import Iterator
+
+import pytz
+
+from smartgarden.benchmarks import measure, percentile
+from smartgarden.managers import utc_today, utc_day_range
+from smartgarden.models import Circuit, ScheduledOneTimeActivation, ActivationLog
+
+HISTORY_DAYS = [0, 30, 365, 3650]
+ROWS_PER_DAY = 24
+
+
+def add_history(circuit: Circuit, days: range) -> None:
+    now = datetime.datetime.now(tz=pytz.UTC)
+    timestamps = [now - datetime.timedelta(days=d, hours=h) for d in days for h in range(ROWS_PER_DAY)]
+
+    ScheduledOneTimeActivation.objects.bulk_create(
+        [ScheduledOneTimeActivation(circuit=circuit, amount=100, timestamp=t) for t in timestamps],
+        batch_size=1000
+    )
+    ActivationLog.objects.bulk_create(
+        [ActivationLog(circuit=circuit, amount=100, timestamp=t) for t in timestamps],
+        batch_size=1000
+    )
+
+
+def run(repeat: int) -> Iterator[dict]:
+    """
+    Times today's lookups of a circuit while its history grows, the timings should stay flat.
+    The legacy timestamp__date predicate is timed alongside for comparison.
+    """
+
+    circuit = Circuit.objects.create(name='benchmark', active=True)
+    start, end = utc_day_range(utc_today())
+    history = 0
+
+    one_time_activations = ScheduledOneTimeActivation.objects.filter(circuit_id=circuit.pk)
+    activation_logs = ActivationLog.objects.filter(circuit_id=circuit.pk)
+
+    lookups = {
+        'one_time_activation': lambda: one_time_activations.today().order_by('-timestamp').first(),
+        'one_time_activations_today': lambda: one_time_activations.today().count(),
+        'one_time_activations_today_date_cast':
+            lambda: one_time_activations.filter(timestamp__date=start.date()).count(),
+        'activation_log_today': lambda: activation_logs.filter(timestamp__gte=start, timestamp__lt=end).count(),
+    }
+
+    for days in HISTORY_DAYS:
+        add_history(circuit, range(history, days + 1))
+        history = days + 1
+
+        for name, lookup in lookups.items():
+            timings = measure(lookup, repeat)
+
+            yield {
+                'name': name,
+                'history_days': days,
+                'p50_ms': percentile(timings, 50),
+                'p95_ms': percentile(timings, 95),
+            }
@@ -0,0 +1,56 @@
+from typing import Iterator, List
+
+from rest_framework.renderers import JSONRenderer
+
+from smartgarden import compression
+from smartgarden.benchmarks import measure, percentile
+from smartgarden.fast_serializers import CIRCUIT_FIELDS, serialize_circuits
+from smartgarden.fleet import FleetSpec, generate_fleet
+from smartgarden.models import Circuit, User
+from smartgarden.renderers import FastJSONRenderer, orjson
+
+FLEET_SIZES = [10, 100, 1000]
+
+
+def run(repeat: int, sizes: List[int] = None) -> Iterator[dict]:
+    """
+    Times rendering the circuit list with DRF's JSONRenderer and FastJSONRenderer, and compressing the rendered list
+    with every available encoding, reporting the bytes that would be sent for each.
+    """
+
+    for circuits in sizes or FLEET_SIZES:
+        domain = f'rendering{circuits}.test'
+        generate_fleet(FleetSpec(users=1, circuits=circuits, schedules=3, days=0, seed=circuits, domain=domain),
+                       derived=False)
+
+        user = User.objects.get(email=f'user0@{domain}')
+        data = serialize_circuits(list(Circuit.objects.filter(collaborators__pk=user.pk).values(*CIRCUIT_FIELDS)))
+
+        renderers = {'json': JSONRenderer(), 'fast-json': FastJSONRenderer()}
+        rendered = {name: renderer.render(data) for name, renderer in renderers.items()}
+        if rendered['json'] != rendered['fast-json']:
+            raise AssertionError(f'FastJSONRenderer differs from JSONRenderer on {circuits} circuits')
+
+        for name, renderer in renderers.items():
+            timings = measure(lambda: renderer.render(data), repeat)
+
+            yield {
+                'name': f'render-{name}',
+                'circuits': circuits,
+                'backend': ('orjson' if orjson else 'json') if name == 'fast-json' else 'json',
+                'p50_ms': percentile(timings, 50),
+                'bytes': len(rendered[name]),
+            }
+
+        content = rendered['fast-json']
+        for encoding in compression.available_encodings():
+            compressed = compression.compress(content, encoding)
+            timings = measure(lambda: compression.compress(content, encoding), repeat)
+
+            yield {
+                'name': f'compress-{encoding}',
+                'circuits': circuits,
+                'p50_ms': percentile(timings, 50),
+                'bytes': len(compressed),
+                'ratio': len(content) / len(compressed),
+            }
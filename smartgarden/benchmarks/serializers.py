@@ -0,0 +1,55 @@
+from typing import Iterator, List
+
+from smartgarden.benchmarks import measure, percentile
+from smartgarden.fast_serializers import CIRCUIT_FIELDS, serialize_circuits
+from smartgarden.fleet import FleetSpec, generate_fleet
+from smartgarden.models import Circuit, User
+from smartgarden.serializers import CircuitSerializer
+
+FLEET_SIZES = [10, 100, 1000]
+# the least speedup of the fast path per fleet size, small lists are dominated by the queries both paths run
+MIN_SPEEDUP = {1000: 5}
+
+
+def run(repeat: int, sizes: List[int] = None) -> Iterator[dict]:
+    """
+    Times reading and serializing a list of circuits with CircuitSerializer over prefetched model instances and
+    with serialize_circuits over .values() rows, after checking both produce the same data.
+    """
+
+    for circuits in sizes or FLEET_SIZES:
+        domain = f'serializers{circuits}.test'
+        generate_fleet(FleetSpec(users=1, circuits=circuits, schedules=3, days=0, seed=circuits, domain=domain),
+                       derived=False)
+
+        # the only user of the fleet collaborates on every circuit, listed as the circuit list endpoint does
+        user = User.objects.get(email=f'user0@{domain}')
+        queryset = Circuit.objects.filter(collaborators__pk=user.pk)
+
+        def drf():
+            return CircuitSerializer(queryset.with_related(), many=True).data
+
+        def fast():
+            return serialize_circuits(list(queryset.values(*CIRCUIT_FIELDS)))
+
+        if [dict(c) for c in drf()] != fast():
+            raise AssertionError(f'serialize_circuits differs from CircuitSerializer on {circuits} circuits')
+
+        drf_timings = measure(drf, repeat)
+        fast_timings = measure(fast, repeat)
+
+        result = {
+            'name': 'circuit-list',
+            'circuits': circuits,
+            'serializer_p50_ms': percentile(drf_timings, 50),
+            'fast_p50_ms': percentile(fast_timings, 50),
+        }
+        result['speedup'] = result['serializer_p50_ms'] / result['fast_p50_ms']
+
+        min_speedup = MIN_SPEEDUP.get(circuits)
+        if min_speedup and result['speedup'] < min_speedup:
+            result['budget'] = f'exceeded: speedup {result["speedup"]:.1f} < {min_speedup}'
+        else:
+            result['budget'] = 'ok'
+
+        yield result
@@ -0,0 +1,111 @@
+import uuid
+from typing import Iterable, Optional, FrozenSet
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from smartgarden.managers import utc_today
+from smartgarden.models import CircuitCollaboration
+
+
+def circuit_list_cache():
+    return caches[getattr(settings, 'CIRCUIT_LIST_CACHE', 'default')]
+
+
+def user_version_key(user_id: int) -> str:
+    return f'circuit_list_version:{user_id}'
+
+
+def user_version(user_id: int) -> str:
+    """
+    The version of the circuits visible to the user. Versions are random, so a version evicted from the cache and
+    created anew never matches a response cached before.
+    """
+
+    cache = circuit_list_cache()
+    version = cache.get(user_version_key(user_id))
+
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(user_version_key(user_id), version, timeout=None)
+        version = cache.get(user_version_key(user_id), version)
+
+    return version
+
+
+def bump_user_versions(user_ids: Iterable[int]) -> None:
+    circuit_list_cache().set_many({user_version_key(pk): uuid.uuid4().hex for pk in user_ids}, timeout=None)
+
+
+def circuit_list_key(user_id: int, query_string: str) -> str:
+    # one-time activations are the ones of the current day, so the day is a part of the key
+    return f'circuit_list:{user_id}:{user_version(user_id)}:{utc_today().isoformat()}:{query_string}'
+
+
+def get_circuit_list(key: str) -> Optional[object]:
+    """
+    Lists are cached only when the cache is shared, the version bump of a per process cache reaches only the worker
+    that made the change and the others would keep serving the stale list.
+    """
+
+    cache = circuit_list_cache()
+    if not is_shared(cache):
+        return None
+
+    return cache.get(key)
+
+
+def set_circuit_list(key: str, data: object) -> None:
+    cache = circuit_list_cache()
+    timeout = getattr(settings, 'CIRCUIT_LIST_CACHE_TIMEOUT', 60)
+
+    if timeout and is_shared(cache):
+        cache.set(key, data, timeout=timeout)
+
+
+def is_shared(cache) -> bool:
+    """
+    Whether all worker processes see the same cache, a local memory cache is private to its process.
+    """
+
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+def collaborations_key(user_id: int) -> str:
+    return f'collaborations:{user_id}'
+
+
+def collaborated_circuit_ids(user_id: int) -> FrozenSet[int]:
+    """
+    The ids of the circuits the user collaborates on. The set is kept until a collaboration of the user changes.
+    """
+
+    cache = circuit_list_cache()
+    circuit_ids = cache.get(collaborations_key(user_id))
+
+    if circuit_ids is None:
+        circuit_ids = frozenset(CircuitCollaboration.objects
+                                .filter(user_id=user_id)
+                                .values_list('circuit_id', flat=True))
+        cache.set(collaborations_key(user_id), circuit_ids,
+                  timeout=getattr(settings, 'COLLABORATIONS_CACHE_TIMEOUT', 60 * 60))
+
+    return circuit_ids
+
+
+def is_collaborator(user_id: int, circuit_id: int) -> bool:
+    """
+    Read from the cached set only when the cache is shared, the invalidation of a per process cache reaches only
+    the worker that made the change and a removed collaborator would keep the access on the others.
+    """
+
+    if not is_shared(circuit_list_cache()):
+        return CircuitCollaboration.objects.filter(user_id=user_id, circuit_id=circuit_id).exists()
+
+    return circuit_id in collaborated_circuit_ids(user_id)
+
+
+def invalidate_collaborations(user_ids: Iterable[int]) -> None:
+    circuit_list_cache().delete_many([collaborations_key(pk) for pk in user_ids])
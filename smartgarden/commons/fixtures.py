@@ -1,8 +1,10 @@
 import datetime
+from typing import List
 
 import pytz
 
-from smartgarden.models import User, Circuit, ActivationLog, ScheduledOneTimeActivation, ScheduledActivation
+from smartgarden.models import User, Circuit, ActivationLog, ScheduledOneTimeActivation, ScheduledActivation, \
+    CircuitCollaboration
 
 
 def create_user(**kwargs) -> User:
@@ -30,6 +32,35 @@ def create_circuit(**kwargs) -> Circuit:
     return circuit
 
 
+def create_circuits(count: int, collaborator: User = None, **kwargs) -> List[Circuit]:
+    """
+    Creates many circuits at once, each of them with a single one-time activation and a single scheduled activation.
+    """
+
+    now = datetime.datetime.now(tz=pytz.UTC)
+    Circuit.objects.bulk_create([
+        Circuit(
+            name=f'{kwargs.get("name", "TestCircuit")}_{i}',
+            active=kwargs.get('active', True),
+            health_check=kwargs.get('health_check', now)
+        ) for i in range(count)
+    ])
+    # not every backend returns primary keys from bulk inserts
+    circuits = list(Circuit.objects.order_by('-pk')[:count])[::-1]
+
+    if collaborator:
+        CircuitCollaboration.objects.bulk_create([CircuitCollaboration(circuit=c, user=collaborator) for c in circuits])
+
+    ScheduledOneTimeActivation.objects.bulk_create([
+        ScheduledOneTimeActivation(amount=100, timestamp=now, circuit=c) for c in circuits
+    ])
+    ScheduledActivation.objects.bulk_create([
+        ScheduledActivation(active=True, amount=100, time=now.time(), circuit=c) for c in circuits
+    ])
+
+    return circuits
+
+
 def create_activation(circuit: Circuit, **kwargs) -> ActivationLog:
     activation = ActivationLog.objects.create(
         amount=kwargs.pop('amount', 100),
@@ -0,0 +1,80 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.utils.text import compress_string, compress_sequence
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover, a dependency, the stdlib is used without it
+    brotli = None
+
+GZIP = 'gzip'
+BROTLI = 'br'
+
+
+def available_encodings() -> List[str]:
+    """
+    The supported encodings, most preferred first.
+    """
+
+    return [BROTLI, GZIP] if brotli is not None else [GZIP]
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    qualities = {}
+
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        qualities[coding] = quality
+
+    return qualities
+
+
+def negotiate(header: str, encodings: List[str] = None) -> Optional[str]:
+    """
+    The encoding of the highest quality the client accepts, the server preference breaks ties. None leaves
+    the response uncompressed.
+    """
+
+    qualities = parse_accept_encoding(header)
+    default = qualities.get('*', 0.0)
+
+    best, best_quality = None, 0.0
+    for encoding in encodings or available_encodings():
+        quality = qualities.get(encoding, default)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+
+    return best
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    if encoding == BROTLI:
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    return compress_string(content)
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    if encoding == BROTLI:
+        compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        yield from compress_sequence(chunks)
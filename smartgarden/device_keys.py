@@ -0,0 +1,51 @@
+import hashlib
+import hmac
+import secrets
+from typing import Optional
+
+from django.conf import settings
+
+from smartgarden.models import DeviceKey, User
+
+KEY_SEPARATOR = '.'
+
+
+def key_digest(secret: str) -> str:
+    """
+    Device secrets are long random strings, so a single keyed HMAC protects them as well as a slow password hash
+    would, at a fraction of its cost.
+    """
+
+    pepper = getattr(settings, 'DEVICE_KEY_SECRET', None) or settings.SECRET_KEY
+
+    return hmac.new(pepper.encode(), secret.encode(), hashlib.sha256).hexdigest()
+
+
+def issue_device_key(user: User) -> str:
+    """
+    Issues a new key of the device, replacing the previous one. Only the digest is stored, the returned key
+    cannot be recovered later.
+    """
+
+    key_id = secrets.token_hex(8)
+    secret = secrets.token_urlsafe(32)
+
+    DeviceKey.objects.update_or_create(user=user, defaults={'key_id': key_id, 'digest': key_digest(secret)})
+
+    return f'{key_id}{KEY_SEPARATOR}{secret}'
+
+
+def verify_device_key(key: str) -> Optional[DeviceKey]:
+    key_id, separator, secret = key.partition(KEY_SEPARATOR)
+    if not separator or not secret:
+        return None
+
+    device_key = DeviceKey.objects \
+        .select_related('user') \
+        .filter(key_id=key_id) \
+        .first()
+
+    if device_key is None or not hmac.compare_digest(device_key.digest, key_digest(secret)):
+        return None
+
+    return device_key
@@ -0,0 +1,142 @@
+import datetime
+import heapq
+import logging
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Callable, Set, Tuple
+
+import pytz
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+from smartgarden.due_activations import due_between
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, order=True)
+class Dispatch:
+    due_at: datetime.datetime
+    circuit_id: int
+    amount: int
+    kind: str
+
+
+class DeliveryBackend:
+    def deliver(self, dispatches: List[Dispatch]) -> None:
+        raise NotImplementedError()
+
+
+class LoggingBackend(DeliveryBackend):
+    def deliver(self, dispatches: List[Dispatch]) -> None:
+        for dispatch in dispatches:
+            logger.info('activation due: [%s, %s, %s]', dispatch.circuit_id, dispatch.due_at, dispatch.amount)
+
+
+class InMemoryBackend(DeliveryBackend):
+    def __init__(self) -> None:
+        self.batches: List[List[Dispatch]] = []
+
+    def deliver(self, dispatches: List[Dispatch]) -> None:
+        self.batches.append(dispatches)
+
+
+def get_backend() -> DeliveryBackend:
+    return import_string(getattr(settings, 'DISPATCHER_BACKEND', 'smartgarden.dispatcher.LoggingBackend'))()
+
+
+def utc_now() -> datetime.datetime:
+    return datetime.datetime.now(tz=pytz.UTC)
+
+
+class Dispatcher:
+    """
+    Hands activations to a delivery backend when they fall due.
+
+    Upcoming activations are read from the due activations table one window at a time and kept in a min-heap keyed
+    by the due time, so between two activations the dispatcher only sleeps. Everything due within the same tick is
+    delivered as a single batch. The window is reloaded every reload_interval to pick up schedule changes, and
+    activations already delivered are never delivered twice.
+    """
+
+    def __init__(self, backend: DeliveryBackend,
+                 tick: datetime.timedelta = datetime.timedelta(seconds=1),
+                 window: datetime.timedelta = datetime.timedelta(minutes=10),
+                 reload_interval: datetime.timedelta = datetime.timedelta(minutes=1),
+                 grace: datetime.timedelta = datetime.timedelta(minutes=1),
+                 clock: Callable[[], datetime.datetime] = utc_now) -> None:
+        self.backend = backend
+        self.tick = tick
+        self.window = window
+        self.reload_interval = reload_interval
+        self.grace = grace
+        self.clock = clock
+
+        self._heap: List[Dispatch] = []
+        self._delivered: Set[Tuple[datetime.datetime, int, str]] = set()
+        self._next_reload: Optional[datetime.datetime] = None
+        self._stopped = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def load(self, dispatches: List[Dispatch]) -> None:
+        self._heap = [d for d in dispatches if (d.due_at, d.circuit_id, d.kind) not in self._delivered]
+        heapq.heapify(self._heap)
+
+    def fetch(self, now: datetime.datetime) -> List[Dispatch]:
+        # activations missed by less than the grace period (e.g. during a restart) are still delivered
+        rows = due_between(now - self.grace, now + self.window) \
+            .values_list('due_at', 'circuit_id', 'amount', 'kind') \
+            .iterator(chunk_size=5000)
+
+        return [Dispatch(*row) for row in rows]
+
+    def reload(self, now: datetime.datetime) -> None:
+        self.load(self.fetch(now))
+
+        cutoff = now - self.grace
+        self._delivered = {key for key in self._delivered if key[0] >= cutoff}
+        self._next_reload = now + self.reload_interval
+
+    def run_pending(self, now: datetime.datetime) -> List[Dispatch]:
+        """
+        Delivers everything due up to now (rounded up to the tick) as a single batch and returns it.
+        """
+
+        if self._next_reload is None or now >= self._next_reload:
+            self.reload(now)
+
+        batch = []
+        horizon = now + self.tick
+        while self._heap and self._heap[0].due_at < horizon:
+            dispatch = heapq.heappop(self._heap)
+            batch.append(dispatch)
+            self._delivered.add((dispatch.due_at, dispatch.circuit_id, dispatch.kind))
+
+        if batch:
+            self.backend.deliver(batch)
+
+        return batch
+
+    def next_wakeup(self) -> datetime.datetime:
+        if self._heap:
+            return min(self._heap[0].due_at, self._next_reload)
+
+        return self._next_reload
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def serve_forever(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                close_old_connections()
+                self.run_pending(self.clock())
+            except Exception:
+                logger.exception('failed to dispatch activations')
+                self._next_reload = self.clock() + self.reload_interval
+
+            timeout = (self.next_wakeup() - self.clock()).total_seconds()
+            self._stopped.wait(max(timeout, 0))
@@ -0,0 +1,72 @@
+import datetime
+from typing import Iterable, List, Optional
+
+import pytz
+from django.db import transaction
+
+from smartgarden.managers import utc_today, utc_day_range
+from smartgarden.models import Circuit, ScheduledActivation, ScheduledOneTimeActivation, DueActivation
+
+# activations are materialized for today and tomorrow, so windows spanning midnight are served before the rollover
+HORIZON = datetime.timedelta(days=2)
+
+
+def refresh_due_activations(circuit_ids: Iterable[int], today: Optional[datetime.date] = None) -> int:
+    """
+    Rebuilds the due activations of the given circuits for the horizon starting at today (UTC). Inactive circuits
+    get none. Costs a fixed number of queries regardless of the number of circuits. Returns the number of rows.
+    """
+
+    circuit_ids = list(circuit_ids)
+    start, _ = utc_day_range(today or utc_today())
+    end = start + HORIZON
+
+    active_ids = set(Circuit.objects.filter(pk__in=circuit_ids, active=True).values_list('pk', flat=True))
+
+    due_activations = []
+
+    schedule = ScheduledActivation.objects \
+        .filter(circuit_id__in=active_ids, active=True) \
+        .values_list('circuit_id', 'time', 'amount')
+
+    for circuit_id, time, amount in schedule:
+        for day in range(HORIZON.days):
+            due_at = datetime.datetime.combine(start.date() + datetime.timedelta(days=day), time, tzinfo=pytz.UTC)
+            due_activations.append(DueActivation(circuit_id=circuit_id, due_at=due_at, amount=amount,
+                                                 kind=DueActivation.Kind.SCHEDULED.value))
+
+    one_time_activations = ScheduledOneTimeActivation.objects \
+        .filter(circuit_id__in=active_ids, timestamp__gte=start, timestamp__lt=end) \
+        .values_list('circuit_id', 'timestamp', 'amount')
+
+    for circuit_id, timestamp, amount in one_time_activations:
+        due_activations.append(DueActivation(circuit_id=circuit_id, due_at=timestamp, amount=amount,
+                                             kind=DueActivation.Kind.ONE_TIME.value))
+
+    with transaction.atomic():
+        DueActivation.objects.filter(circuit_id__in=circuit_ids).delete()
+        DueActivation.objects.bulk_create(due_activations, batch_size=1000)
+
+    return len(due_activations)
+
+
+def due_between(start: datetime.datetime, end: datetime.datetime):
+    """
+    All activations of the fleet due in [start, end), answered by a range scan over the due_at index.
+    """
+
+    return DueActivation.objects \
+        .filter(due_at__gte=start, due_at__lt=end) \
+        .order_by('due_at')
+
+
+def rollover(chunk_size: int = 1000, today: Optional[datetime.date] = None) -> List[int]:
+    """
+    Moves the horizon of every circuit to the current day, to be run shortly after midnight UTC.
+    Returns the number of rows written per chunk.
+    """
+
+    circuit_ids = list(Circuit.objects.order_by('pk').values_list('pk', flat=True))
+
+    return [refresh_due_activations(circuit_ids[i:i + chunk_size], today)
+            for i in range(0, len(circuit_ids), chunk_size)]
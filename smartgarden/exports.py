@@ -0,0 +1,39 @@
+import csv
+import json
+from typing import Iterator
+
+from django.db.models import QuerySet
+
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S'
+EXPORT_FIELDS = ['circuit_id', 'timestamp', 'amount']
+
+
+class Echo:
+    """
+    A file-like object handing back whatever is written to it, lets csv.writer produce rows one at a time.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_rows(activation_logs: QuerySet, chunk_size: int) -> Iterator[tuple]:
+    # iterator() keeps a server-side cursor open on PostgreSQL, so rows are never materialized all at once
+    return activation_logs.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def iter_csv(activation_logs: QuerySet, chunk_size: int = 2000) -> Iterator[str]:
+    writer = csv.writer(Echo())
+
+    yield writer.writerow(EXPORT_FIELDS)
+    for circuit_id, timestamp, amount in iter_rows(activation_logs, chunk_size):
+        yield writer.writerow([circuit_id, timestamp.strftime(TIMESTAMP_FORMAT), amount])
+
+
+def iter_ndjson(activation_logs: QuerySet, chunk_size: int = 2000) -> Iterator[str]:
+    for circuit_id, timestamp, amount in iter_rows(activation_logs, chunk_size):
+        yield json.dumps({
+            'circuit_id': circuit_id,
+            'timestamp': timestamp.strftime(TIMESTAMP_FORMAT),
+            'amount': amount
+        }) + '\n'
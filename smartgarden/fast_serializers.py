@@ -0,0 +1,74 @@
+import datetime
+from collections import defaultdict
+from typing import List
+
+import pytz
+from django.db import models
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from smartgarden.managers import is_healthy
+from smartgarden.models import ScheduledActivation, ScheduledOneTimeActivation
+
+# the columns serialize_circuits reads, fetch the circuits with .values(*CIRCUIT_FIELDS)
+CIRCUIT_FIELDS = ['id', 'name', 'active', 'health_check']
+
+
+def format_datetime(value: datetime.datetime, tz: datetime.tzinfo) -> str:
+    """
+    Same as DateTimeField(format='%Y-%m-%dT%H:%M:%S'), isoformat is several times faster than strftime.
+    """
+
+    value = value.astimezone(tz)
+    if value.year < 1000:
+        # strftime does not pad the year
+        return value.strftime('%Y-%m-%dT%H:%M:%S')
+
+    return value.isoformat(timespec='seconds')[:19]
+
+
+def serialize_circuits(rows: List[dict]) -> List[dict]:
+    """
+    Read-only equivalent of CircuitSerializer(many=True) over .values(*CIRCUIT_FIELDS) rows, producing the same
+    data without model instances and the field machinery. The schedules and today's one-time activations are read
+    with a query each, the same ones Circuit.objects.with_related() prefetches, so they come in the same order.
+    Keep it in sync with CircuitSerializer, test_fast_serializers compares the two.
+    """
+
+    if not rows:
+        return []
+
+    circuit_ids = [row['id'] for row in rows]
+    tz = timezone.get_current_timezone()
+    now = datetime.datetime.now(tz=pytz.UTC)
+
+    # times are naive, their text is formatted by the database without a round trip through datetime.time
+    schedules = defaultdict(list)
+    for circuit_id, active, amount, time in ScheduledActivation \
+            .objects \
+            .filter(circuit_id__in=circuit_ids) \
+            .values_list('circuit_id', 'active', 'amount', Cast('time', models.CharField())):
+        schedules[circuit_id].append({'active': active, 'amount': amount, 'time': time[:8]})
+
+    one_time_activations = {}
+    for circuit_id, amount, timestamp in ScheduledOneTimeActivation \
+            .objects \
+            .today() \
+            .filter(circuit_id__in=circuit_ids) \
+            .order_by('-timestamp') \
+            .values_list('circuit_id', 'amount', 'timestamp'):
+        if circuit_id not in one_time_activations:
+            one_time_activations[circuit_id] = {'amount': amount, 'timestamp': format_datetime(timestamp, tz)}
+
+    return [{
+        'id': row['id'],
+        'name': row['name'],
+        'active': row['active'],
+        'healthy': is_healthy(row['health_check'], now),
+        'one_time_activation': one_time_activations.get(row['id']),
+        'schedule': schedules.get(row['id'], []),
+    } for row in rows]
+
+
+def serialize_circuit(row: dict) -> dict:
+    return serialize_circuits([row])[0]
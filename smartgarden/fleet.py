@@ -0,0 +1,274 @@
+import csv
+import datetime
+import io
+import random
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple, Type, Callable
+
+import pytz
+from django.contrib.auth.hashers import make_password
+from django.db import connection, models, transaction
+
+from smartgarden.due_activations import refresh_due_activations
+from smartgarden.models import User, Circuit, CircuitCollaboration, ScheduledActivation, ScheduledOneTimeActivation, \
+    ActivationLog
+from smartgarden.provisioning import pks_by
+from smartgarden.rollups import backfill_rollups
+
+ACTIVE_CIRCUITS = 0.95
+HEALTHY_CIRCUITS = 0.9
+ACTIVE_SCHEDULES = 0.9
+ONE_TIME_ACTIVATIONS = 0.2
+MAX_COLLABORATORS = 3
+
+
+@dataclass(frozen=True)
+class FleetSpec:
+    users: int = 10
+    circuits: int = 10
+    schedules: int = 3
+    days: int = 7
+    seed: int = 0
+    # domain of the generated accounts, distinct domains let several fleets share a database
+    domain: str = 'fleet.test'
+    # the moment the history ends at, the generated data only depends on it and the seed
+    now: Optional[datetime.datetime] = None
+
+
+@dataclass
+class FleetResult:
+    users: int = 0
+    circuits: int = 0
+    schedules: int = 0
+    one_time_activations: int = 0
+    activation_logs: int = 0
+
+
+@dataclass
+class CircuitPlan:
+    index: int
+    active: bool
+    health_check: Optional[datetime.datetime]
+    collaborators: List[int]
+    schedule: List[Tuple[bool, int, datetime.time]]
+    one_time_activation: Optional[Tuple[int, datetime.datetime]]
+    rng: random.Random
+
+
+def chunked(rows: Iterable, size: int) -> Iterator[list]:
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def column_list(model: Type[models.Model], fields: List[str]) -> str:
+    return ', '.join(connection.ops.quote_name(model._meta.get_field(f).column) for f in fields)
+
+
+def copy_rows(model: Type[models.Model], fields: List[str], rows: Iterable[tuple], batch_size: int) -> int:
+    """
+    Streams the rows into the table with COPY, several times faster than INSERTs on large tables.
+    """
+
+    sql = f'COPY {connection.ops.quote_name(model._meta.db_table)} ({column_list(model, fields)}) ' \
+          f'FROM STDIN WITH (FORMAT csv)'
+
+    count = 0
+    with connection.cursor() as cursor:
+        for chunk in chunked(rows, batch_size):
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(chunk)
+            buffer.seek(0)
+
+            cursor.copy_expert(sql, buffer)
+            count += len(chunk)
+
+    return count
+
+
+def value_adapter(field: models.Field) -> Optional[Callable]:
+    if isinstance(field, models.DateTimeField):
+        return connection.ops.adapt_datetimefield_value
+    if isinstance(field, models.TimeField):
+        return connection.ops.adapt_timefield_value
+
+    return None
+
+
+def execute_rows(model: Type[models.Model], fields: List[str], rows: Iterable[tuple], batch_size: int) -> int:
+    """
+    Inserts the rows with a prepared statement, skipping the model instances and per value field preparation
+    of bulk_create, which take most of its time.
+    """
+
+    sql = f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({column_list(model, fields)}) ' \
+          f'VALUES ({", ".join(["%s"] * len(fields))})'
+    adapters = [(i, a) for i, a in enumerate(value_adapter(model._meta.get_field(f)) for f in fields) if a]
+
+    count = 0
+    with connection.cursor() as cursor:
+        for chunk in chunked(rows, batch_size):
+            if adapters:
+                chunk = [list(row) for row in chunk]
+                for row in chunk:
+                    for i, adapt in adapters:
+                        row[i] = adapt(row[i])
+
+            cursor.executemany(sql, chunk)
+            count += len(chunk)
+
+    return count
+
+
+def insert_rows(model: Type[models.Model], fields: List[str], rows: Iterable[tuple], batch_size: int) -> int:
+    """
+    Inserts the rows through COPY on Postgres and a prepared statement elsewhere. Signals are not sent.
+    """
+
+    if connection.vendor == 'postgresql':
+        return copy_rows(model, fields, rows, batch_size * 10)
+
+    return execute_rows(model, fields, rows, batch_size)
+
+
+def create_with_pks(objs: List[models.Model], key: str, batch_size: int) -> List[int]:
+    model = type(objs[0])
+    model.objects.bulk_create(objs, batch_size=batch_size)
+
+    if connection.features.can_return_rows_from_bulk_insert:
+        return [o.pk for o in objs]
+
+    pks = pks_by(model.objects, key, [getattr(o, key) for o in objs], batch_size)
+    return [pks[getattr(o, key)] for o in objs]
+
+
+def plan_circuit(spec: FleetSpec, index: int, now: datetime.datetime) -> CircuitPlan:
+    """
+    Every circuit draws from its own generator, so the data does not depend on the chunk size.
+    """
+
+    rng = random.Random(f'{spec.seed}:{index}')
+
+    active = rng.random() < ACTIVE_CIRCUITS
+
+    if rng.random() < HEALTHY_CIRCUITS:
+        health_check = now - datetime.timedelta(seconds=rng.randrange(60))
+    else:
+        health_check = now - datetime.timedelta(hours=rng.randrange(1, 72))
+
+    collaborators = rng.sample(range(spec.users), k=min(spec.users, rng.randint(1, MAX_COLLABORATORS)))
+
+    # distinct minutes, so the logged activations never share a timestamp
+    minutes = sorted(rng.sample(range(24 * 60), k=min(spec.schedules, 24 * 60)))
+    schedule = [(rng.random() < ACTIVE_SCHEDULES, rng.randrange(50, 510, 10), datetime.time(m // 60, m % 60))
+                for m in minutes]
+
+    one_time_activation = None
+    if rng.random() < ONE_TIME_ACTIVATIONS:
+        start = datetime.datetime.combine(now.date(), datetime.time(), tzinfo=pytz.UTC)
+        one_time_activation = (rng.randrange(50, 510, 10), start + datetime.timedelta(minutes=rng.randrange(24 * 60)))
+
+    return CircuitPlan(index=index, active=active, health_check=health_check, collaborators=collaborators,
+                       schedule=schedule, one_time_activation=one_time_activation, rng=rng)
+
+
+def activation_log_rows(plan: CircuitPlan, circuit_id: int, days: int, now: datetime.datetime) -> Iterator[tuple]:
+    """
+    Every active scheduled activation of the circuit logged once a day, a few seconds late, during the past days.
+    """
+
+    today = now.date()
+
+    for day in range(days, -1, -1):
+        date = today - datetime.timedelta(days=day)
+
+        for active, amount, time in plan.schedule:
+            if not active:
+                continue
+
+            timestamp = datetime.datetime.combine(date, time, tzinfo=pytz.UTC) + \
+                datetime.timedelta(seconds=plan.rng.randrange(60))
+
+            if timestamp < now:
+                yield circuit_id, amount, timestamp
+
+
+def create_users(count: int, domain: str, batch_size: int) -> List[int]:
+    if not count:
+        return []
+
+    # a single hash shared by every user, hashing each password would dominate the run
+    password = make_password('user')
+
+    return create_with_pks([
+        User(email=f'user{i}@{domain}', username=f'user{i}', user_type=User.UserType.USER.value, password=password)
+        for i in range(count)
+    ], 'email', batch_size)
+
+
+def create_circuits(spec: FleetSpec, indexes: range, user_ids: List[int], now: datetime.datetime,
+                    batch_size: int, result: FleetResult) -> List[int]:
+    plans = [plan_circuit(spec, i, now) for i in indexes]
+
+    password = make_password(None)
+    device_ids = create_with_pks([
+        User(email=f'device{p.index}@{spec.domain}', user_type=User.UserType.DEVICE.value, password=password)
+        for p in plans
+    ], 'email', batch_size)
+
+    circuit_ids = create_with_pks([
+        Circuit(name=f'Circuit {p.index}', active=p.active, health_check=p.health_check, controller_id=device_id)
+        for p, device_id in zip(plans, device_ids)
+    ], 'controller_id', batch_size)
+
+    insert_rows(CircuitCollaboration, ['circuit_id', 'user_id'], (
+        (circuit_id, user_ids[u]) for p, circuit_id in zip(plans, circuit_ids) for u in p.collaborators
+    ), batch_size)
+
+    result.schedules += insert_rows(ScheduledActivation, ['circuit_id', 'active', 'amount', 'time'], (
+        (circuit_id, active, amount, time) for p, circuit_id in zip(plans, circuit_ids) for active, amount, time in
+        p.schedule
+    ), batch_size)
+
+    result.one_time_activations += insert_rows(ScheduledOneTimeActivation, ['circuit_id', 'amount', 'timestamp'], (
+        (circuit_id, *p.one_time_activation) for p, circuit_id in zip(plans, circuit_ids) if p.one_time_activation
+    ), batch_size)
+
+    result.activation_logs += insert_rows(ActivationLog, ['circuit_id', 'amount', 'timestamp'], (
+        row for p, circuit_id in zip(plans, circuit_ids) for row in activation_log_rows(p, circuit_id, spec.days, now)
+    ), batch_size)
+
+    result.circuits += len(circuit_ids)
+
+    return circuit_ids
+
+
+def generate_fleet(spec: FleetSpec, chunk_size: int = 1000, batch_size: int = 5000,
+                   derived: bool = True) -> FleetResult:
+    """
+    Generates users, circuits with their controllers, collaborators, schedules and activation history. Circuits are
+    written in chunks, each in its own transaction, so memory stays flat regardless of the size of the fleet.
+    Rollups and due activations are rebuilt from the generated rows unless derived is False.
+    """
+
+    now = spec.now or datetime.datetime.now(tz=pytz.UTC)
+    result = FleetResult()
+
+    with transaction.atomic():
+        user_ids = create_users(spec.users, spec.domain, batch_size)
+        result.users = len(user_ids)
+
+    for start in range(0, spec.circuits, chunk_size):
+        with transaction.atomic():
+            circuit_ids = create_circuits(spec, range(start, min(start + chunk_size, spec.circuits)), user_ids, now,
+                                          batch_size, result)
+
+            if derived:
+                backfill_rollups(circuit_ids, batch_size=batch_size)
+                refresh_due_activations(circuit_ids, today=now.date())
+
+    return result
@@ -0,0 +1,94 @@
+import atexit
+import datetime
+import logging
+import os
+import threading
+import time
+from functools import reduce
+from operator import or_
+from typing import Dict, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, When, Value, DateTimeField, Q
+
+from smartgarden.models import Circuit
+
+logger = logging.getLogger(__name__)
+
+
+class HeartbeatBuffer:
+    """
+    Collects circuit health checks in process memory and writes them behind, in bulk.
+
+    Only the most recent heartbeat of every circuit is kept, so a flush costs a single UPDATE per chunk of circuits
+    no matter how many heartbeats were received in between. With HEARTBEAT_FLUSH_INTERVAL set to 0 every heartbeat
+    is written through immediately. A heartbeat is written only if the device that sent it still controls the
+    circuit, the circuit id of a device's token outlives its reassignment.
+    """
+
+    chunk_size = 500
+
+    def __init__(self) -> None:
+        self._pending: Dict[Tuple[int, int], datetime.datetime] = {}
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+
+    @property
+    def interval(self) -> float:
+        return getattr(settings, 'HEARTBEAT_FLUSH_INTERVAL', 5)
+
+    def record(self, circuit_id: int, controller_id: int, timestamp: datetime.datetime) -> None:
+        key = (circuit_id, controller_id)
+
+        with self._lock:
+            previous = self._pending.get(key)
+            if not previous or previous < timestamp:
+                self._pending[key] = timestamp
+
+        if self.interval > 0:
+            self._start_flusher()
+        else:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        items = list(pending.items())
+        for i in range(0, len(items), self.chunk_size):
+            chunk = items[i:i + self.chunk_size]
+            health_check = Case(*[When(pk=pk, controller_id=controller_id, then=Value(timestamp))
+                                  for (pk, controller_id), timestamp in chunk],
+                                output_field=DateTimeField())
+            controlled = reduce(or_, [Q(pk=pk, controller_id=controller_id) for (pk, controller_id), _ in chunk])
+
+            Circuit.objects.filter(controlled).update(health_check=health_check)
+
+        return len(items)
+
+    def _start_flusher(self) -> None:
+        # a thread started before gunicorn forks the workers does not survive in them, hence the pid check
+        if self._flusher_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+
+            self._flusher_pid = os.getpid()
+            threading.Thread(target=self._run_flusher, name='heartbeat-flusher', daemon=True).start()
+
+    def _run_flusher(self) -> None:
+        while True:
+            time.sleep(self.interval)
+
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception:
+                logger.exception('failed to flush heartbeats')
+
+
+heartbeat_buffer = HeartbeatBuffer()
+atexit.register(heartbeat_buffer.flush)
@@ -0,0 +1,146 @@
+import codecs
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Tuple, Any, List
+
+from django.db import transaction
+
+from smartgarden.models import ActivationLog
+from smartgarden.rollups import refresh_rollups
+from smartgarden.serializers import ActivationLogSerializer
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonlines')
+NUMBER_CHARS = '0123456789.eE+-'
+
+
+def iter_ndjson(stream) -> Iterator[Tuple[int, Any]]:
+    """
+    Yields (line number, decoded value) pairs from a newline-delimited JSON stream, reading it line by line.
+    Lines that can not be decoded are yielded as JSONDecodeError instances.
+    """
+
+    for number, line in enumerate(iter(stream.readline, b''), start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            yield number, e
+
+
+def iter_json_array(stream, chunk_size: int = 64 * 1024) -> Iterator[Tuple[int, Any]]:
+    """
+    Yields (index, decoded value) pairs from a stream holding a single JSON array, without loading the whole array.
+    A malformed document stops the iteration with a JSONDecodeError yielded in place of the value.
+    """
+
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    exhausted = False
+    state = 'start'
+    index = 0
+
+    while True:
+        buffer = buffer.lstrip()
+
+        if buffer:
+            if state == 'start':
+                if buffer[0] != '[':
+                    yield index, json.JSONDecodeError('expected an array', buffer, 0)
+                    return
+
+                buffer = buffer[1:]
+                state = 'first'
+                continue
+
+            if state in ('first', 'separator') and buffer[0] == ']':
+                return
+
+            if state == 'separator':
+                if buffer[0] != ',':
+                    yield index, json.JSONDecodeError("expected ',' or ']'", buffer, 0)
+                    return
+
+                buffer = buffer[1:]
+                state = 'value'
+                continue
+
+            try:
+                value, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError as e:
+                if exhausted:
+                    yield index, e
+                    return
+            else:
+                # a number cut at the chunk boundary decodes fine, so make sure it does not continue in the next one
+                if exhausted or (end < len(buffer) and buffer[end] not in NUMBER_CHARS):
+                    yield index, value
+                    index += 1
+                    buffer = buffer[end:]
+                    state = 'separator'
+                    continue
+        elif exhausted:
+            yield index, json.JSONDecodeError('unexpected end of data', buffer, 0)
+            return
+
+        chunk = stream.read(chunk_size)
+        if chunk:
+            buffer += text.decode(chunk) if isinstance(chunk, bytes) else chunk
+        else:
+            exhausted = True
+
+
+def insert_activation_logs(activation_logs: List[ActivationLog]) -> None:
+    timestamps = defaultdict(list)
+    for activation_log in activation_logs:
+        timestamps[activation_log.circuit_id].append(activation_log.timestamp)
+
+    with transaction.atomic():
+        ActivationLog.objects.bulk_create(activation_logs, ignore_conflicts=True)
+
+        for circuit_id, circuit_timestamps in timestamps.items():
+            refresh_rollups(circuit_id, circuit_timestamps)
+
+
+@dataclass
+class IngestResult:
+    accepted: int = 0
+    errors: List[dict] = field(default_factory=list)
+
+
+def ingest_activation_logs(circuit_id: int, entries: Iterable[Tuple[int, Any]], batch_size: int = 500) -> IngestResult:
+    """
+    Validates the entries one by one and inserts the valid ones in batches, so memory use is bounded by batch_size
+    no matter how long the input is. Every batch is inserted in its own statement and entries already stored
+    (by idempotency key, or by timestamp when the key is missing) are silently skipped.
+    """
+
+    result = IngestResult()
+    batch = []
+
+    for line, entry in entries:
+        if isinstance(entry, ValueError):
+            result.errors.append({'line': line, 'errors': {'non_field_errors': [str(entry)]}})
+            continue
+
+        serializer = ActivationLogSerializer(data=entry)
+        if not serializer.is_valid():
+            result.errors.append({'line': line, 'errors': serializer.errors})
+            continue
+
+        batch.append(ActivationLog(circuit_id=circuit_id, **serializer.validated_data))
+
+        if len(batch) >= batch_size:
+            insert_activation_logs(batch)
+            result.accepted += len(batch)
+            batch = []
+
+    if batch:
+        insert_activation_logs(batch)
+        result.accepted += len(batch)
+
+    return result
@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from django.core.management import BaseCommand
+from django.db import connection
+
+from smartgarden.models import Circuit
+from smartgarden.rollups import backfill_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the hourly and daily activation rollups from the activation log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='number of chunks processed in parallel')
+        parser.add_argument('--chunk-size', type=int, default=100, help='number of circuits per chunk')
+
+    @staticmethod
+    def backfill(circuit_ids: List[int]) -> int:
+        try:
+            return backfill_rollups(circuit_ids)
+        finally:
+            # every worker thread opens its own connection
+            connection.close()
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        chunk_size = options['chunk_size']
+
+        circuit_ids = list(Circuit.objects.order_by('pk').values_list('pk', flat=True))
+        chunks = [circuit_ids[i:i + chunk_size] for i in range(0, len(circuit_ids), chunk_size)]
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                written = sum(executor.map(self.backfill, chunks))
+        else:
+            written = sum(backfill_rollups(chunk) for chunk in chunks)
+
+        self.stdout.write(f"Rollups rebuilt: [{len(circuit_ids)} circuits, {written} hourly buckets]")
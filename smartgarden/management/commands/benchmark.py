@@ -0,0 +1,39 @@
+import importlib
+
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+
+BENCHMARKS = ['lookups', 'dispatcher', 'endpoints', 'serializers', 'rendering']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Runs a benchmark against the configured database, every row it creates is rolled back afterwards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=BENCHMARKS)
+        parser.add_argument('--repeat', type=int, default=50, help='number of timed runs per measurement')
+
+    def handle(self, *args, **options):
+        benchmark = importlib.import_module(f'smartgarden.benchmarks.{options["name"]}')
+        exceeded = []
+
+        try:
+            with transaction.atomic():
+                for result in benchmark.run(options['repeat']):
+                    self.stdout.write(', '.join(f'{k}={v:.3f}' if isinstance(v, float) else f'{k}={v}'
+                                                for k, v in result.items()))
+
+                    # results checked against a budget fail the run once every measurement is done
+                    if result.get('budget', 'ok') != 'ok':
+                        exceeded.append(f'{result["name"]}: {result["budget"]}')
+
+                raise Rollback()
+        except Rollback:
+            pass
+
+        if exceeded:
+            raise CommandError(f'Budgets exceeded: [{", ".join(exceeded)}]')
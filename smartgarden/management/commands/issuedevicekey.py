@@ -0,0 +1,31 @@
+from django.core.management import BaseCommand, CommandError
+
+from smartgarden.device_keys import issue_device_key
+from smartgarden.models import User
+
+
+class Command(BaseCommand):
+    help = 'Issues a new key of a device, replacing the previous one, and prints it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', type=str, help='email of the device user')
+        parser.add_argument('--create', action='store_true',
+                            help='creates the device user without a usable password when it does not exist')
+
+    def handle(self, *args, **options):
+        email = options['email']
+
+        try:
+            user = User.objects.get(email=email)
+        except User.DoesNotExist:
+            if not options['create']:
+                raise CommandError(f"User not found: [{email}]")
+
+            user = User(email=email, user_type=User.UserType.DEVICE.value)
+            user.set_unusable_password()
+            user.save()
+
+        if user.user_type != User.UserType.DEVICE.value:
+            raise CommandError(f"User is not a device: [{email}]")
+
+        self.stdout.write(issue_device_key(user))
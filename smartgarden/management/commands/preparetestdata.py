@@ -1,96 +1,70 @@
+import argparse
 import datetime
 
 import pytz
+from django.core.cache import caches
 from django.core.management import BaseCommand, call_command
+from django.utils.dateparse import parse_datetime
 
-from smartgarden.models import User, Circuit, ActivationLog, ScheduledOneTimeActivation, ScheduledActivation
+from smartgarden.fleet import FleetSpec, generate_fleet
+from smartgarden.models import User
 
 
-class Command(BaseCommand):
-    def create_user(self, **kwargs) -> User:
-        user = User.objects.create(
-            email=kwargs.pop('email', 'user@test.com'),
-            username=kwargs.pop('username', 'user'),
-            user_type=kwargs.pop('user_type', User.UserType.USER.value)
-        )
-
-        password = kwargs.pop('password', 'user')
-        user.set_password(password)
-        user.save()
-
-        self.stdout.write(f"Test user account created: [{user.email}, {password}]")
-
-        return user
+def utc_timestamp(value: str) -> datetime.datetime:
+    """
+    An ISO 8601 timestamp, ending with Z or any offset, converted to UTC; without an offset it is taken as UTC.
+    """
 
-    def create_circuit(self, owner: User, **kwargs) -> Circuit:
-        circuit = Circuit.objects.create(
-            name=kwargs.pop('name', 'TestCircuit'),
-            active=kwargs.pop('active', True),
-            health_check=kwargs.pop('active', datetime.datetime.now(tz=pytz.UTC)),
-            owner=owner
-        )
+    try:
+        timestamp = parse_datetime(value)
+    except ValueError:
+        timestamp = None
 
-        self.stdout.write(f"Test circuit created: [{circuit.name}]")
+    if timestamp is None:
+        raise argparse.ArgumentTypeError(f'invalid ISO 8601 timestamp: {value!r}')
 
-        return circuit
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=pytz.UTC)
 
-    def create_activation(self, circuit: Circuit, **kwargs) -> ActivationLog:
-        activation = ActivationLog.objects.create(
-            amount=kwargs.pop('amount', 100),
-            timestamp=kwargs.pop('timestamp', datetime.datetime.now(tz=pytz.UTC)),
-            circuit=circuit
-        )
+    return timestamp.astimezone(pytz.UTC)
 
-        self.stdout.write(f"Test activation created: [{activation.amount}, {activation.timestamp}]")
 
-        return activation
-
-    def create_scheduled_one_time_activation(self, circuit: Circuit, **kwargs) -> ScheduledOneTimeActivation:
-        activation = ScheduledOneTimeActivation.objects.create(
-            amount=kwargs.pop('amount', 100),
-            timestamp=kwargs.pop('timestamp', datetime.datetime.now(tz=pytz.UTC)),
-            circuit=circuit
-        )
+class Command(BaseCommand):
+    help = 'Replaces the database content with a reproducible synthetic fleet of users, circuits and their history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='number of users collaborating on the circuits')
+        parser.add_argument('--circuits', type=int, default=10, help='number of circuits, each with its own device')
+        parser.add_argument('--schedules', type=int, default=3, help='number of scheduled activations per circuit')
+        parser.add_argument('--days', type=int, default=7, help='days of activation history')
+        parser.add_argument('--seed', type=int, default=0, help='seed of the generated data')
+        parser.add_argument('--now', type=utc_timestamp, default=None,
+                            help='end of the history as an ISO 8601 UTC timestamp, defaults to the current time')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='number of circuits written at once')
+        parser.add_argument('--batch-size', type=int, default=5000, help='number of rows per insert')
+        parser.add_argument('--no-flush', action='store_true', help='keeps the current database content')
+        parser.add_argument('--no-derived', action='store_true',
+                            help='skips rebuilding rollups and due activations of the generated circuits')
 
-        self.stdout.write(f"Test one-time activation created: [{activation.amount}, {activation.timestamp}]")
+    def handle(self, *args, **options):
+        if not options['no_flush']:
+            call_command('flush', interactive=False)
+            # cached lists and collaborations are keyed by ids reused after the flush
+            for cache in caches.all():
+                cache.clear()
 
-        return activation
+            admin = User(email='admin@test.com', username='admin', user_type=User.UserType.ADMIN.value)
+            admin.set_password('admin')
+            admin.save()
 
-    def create_scheduled_activation(self, circuit: Circuit, **kwargs) -> ScheduledActivation:
-        activation = ScheduledActivation.objects.create(
-            active=kwargs.pop('active', True),
-            amount=kwargs.pop('amount', 100),
-            time=kwargs.pop('time', datetime.datetime.now(tz=pytz.UTC).time()),
-            circuit=circuit
-        )
+            self.stdout.write(f"Admin account created: [{admin.email}, admin]")
 
-        self.stdout.write(f"Test scheduled activation created: [{activation.amount}, {activation.time}]")
+        spec = FleetSpec(users=options['users'], circuits=options['circuits'], schedules=options['schedules'],
+                         days=options['days'], seed=options['seed'], now=options['now'])
 
-        return activation
+        result = generate_fleet(spec, chunk_size=options['chunk_size'], batch_size=options['batch_size'],
+                                derived=not options['no_derived'])
 
-    def handle(self, *args, **options):
-        call_command('flush', interactive=False)
-
-        user = self.create_user()
-        circuit_1 = self.create_circuit(owner=user)
-
-        self.create_activation(circuit=circuit_1)
-        self.create_scheduled_one_time_activation(circuit=circuit_1)
-        self.create_scheduled_activation(circuit=circuit_1)
-        self.create_scheduled_activation(circuit=circuit_1, amount=150)
-        self.create_scheduled_activation(circuit=circuit_1, amount=200, active=False)
-
-        circuit_2 = self.create_circuit(owner=user, name='TestCircuit_2')
-
-        self.create_activation(circuit=circuit_2)
-        self.create_scheduled_one_time_activation(circuit=circuit_2)
-        self.create_scheduled_activation(circuit=circuit_2)
-        self.create_scheduled_activation(circuit=circuit_2, amount=200)
-        self.create_scheduled_activation(circuit=circuit_2, amount=200)
-
-        self.create_user(
-            email='admin@test.com',
-            password='admin',
-            username='admin',
-            user_type=User.UserType.ADMIN.value
-        )
+        self.stdout.write(f"Fleet generated: [{result.users} users, {result.circuits} circuits, "
+                          f"{result.schedules} scheduled activations, {result.one_time_activations} one-time "
+                          f"activations, {result.activation_logs} activation logs], users log in with password 'user'")
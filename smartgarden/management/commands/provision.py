@@ -0,0 +1,23 @@
+from django.core.management import BaseCommand, CommandError
+
+from smartgarden.provisioning import read_manifest, provision, ManifestError
+
+
+class Command(BaseCommand):
+    help = 'Creates the devices and circuits listed in a CSV or JSON manifest and adds their collaborators'
+
+    def add_arguments(self, parser):
+        parser.add_argument('manifest', type=str, help='path of the manifest, .json or .csv')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='number of processes hashing passwords, defaults to the number of CPUs')
+        parser.add_argument('--batch-size', type=int, default=1000, help='number of rows per insert')
+
+    def handle(self, *args, **options):
+        try:
+            entries = read_manifest(options['manifest'])
+            result = provision(entries, workers=options['workers'], batch_size=options['batch_size'])
+        except ManifestError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Provisioned: [{result.devices} devices, {result.circuits} circuits, "
+                          f"{result.collaborations} collaborations]")
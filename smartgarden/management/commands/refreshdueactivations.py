@@ -0,0 +1,15 @@
+from django.core.management import BaseCommand
+
+from smartgarden.due_activations import rollover
+
+
+class Command(BaseCommand):
+    help = 'Moves the due activations of every circuit to the current day, to be scheduled right after midnight UTC'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='number of circuits refreshed at once')
+
+    def handle(self, *args, **options):
+        written = rollover(chunk_size=options['chunk_size'])
+
+        self.stdout.write(f"Due activations refreshed: [{sum(written)} activations]")
@@ -0,0 +1,19 @@
+import signal
+
+from django.core.management import BaseCommand
+
+from smartgarden.dispatcher import Dispatcher, get_backend
+
+
+class Command(BaseCommand):
+    help = 'Runs the server-side activation dispatcher, delivering due activations through DISPATCHER_BACKEND'
+
+    def handle(self, *args, **options):
+        dispatcher = Dispatcher(get_backend())
+
+        signal.signal(signal.SIGTERM, lambda *_: dispatcher.stop())
+        signal.signal(signal.SIGINT, lambda *_: dispatcher.stop())
+
+        self.stdout.write("Dispatcher started")
+        dispatcher.serve_forever()
+        self.stdout.write("Dispatcher stopped")
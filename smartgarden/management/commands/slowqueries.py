@@ -0,0 +1,36 @@
+from django.core.management import BaseCommand
+
+from smartgarden.slow_queries import get_buffer, summarize
+
+
+class Command(BaseCommand):
+    help = 'Summarizes the queries recorded by SlowQueryMiddleware, worst total time first'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10, help='number of queries to show')
+        parser.add_argument('--plans', action='store_true', help='show a sampled plan of every query')
+        parser.add_argument('--clear', action='store_true', help='empty the log afterwards')
+
+    def handle(self, *args, **options):
+        buffer = get_buffer()
+        records = buffer.records()
+
+        if not records:
+            self.stdout.write('No slow queries recorded')
+        else:
+            self.stdout.write(f'{len(records)} slow queries recorded since {records[0]["timestamp"]}')
+
+        for group in summarize(records)[:options['limit']]:
+            views = ', '.join(f'{view} ({count})' for view, count in group['views'].most_common(3))
+
+            self.stdout.write('')
+            self.stdout.write(f'total={group["total_ms"]:.1f}ms, count={group["count"]}, '
+                              f'mean={group["mean_ms"]:.1f}ms, max={group["max_ms"]:.1f}ms, views={views}')
+            self.stdout.write(f'  {group["sql"]}')
+
+            if options['plans'] and group['plan']:
+                for line in group['plan'].splitlines():
+                    self.stdout.write(f'    {line}')
+
+        if options['clear']:
+            buffer.clear()
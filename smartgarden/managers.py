@@ -1,4 +1,9 @@
+import datetime
+from typing import Optional, Tuple
+
+import pytz
 from django.contrib.auth.base_user import BaseUserManager
+from django.db import models
 
 
 class UserManager(BaseUserManager):
@@ -28,3 +33,56 @@ class UserManager(BaseUserManager):
         user.save(using=self._db)
 
         return user
+
+
+def utc_today() -> datetime.date:
+    return datetime.datetime.now(tz=pytz.UTC).date()
+
+
+def is_healthy(health_check: Optional[datetime.datetime], now: datetime.datetime) -> bool:
+    """
+    Whether a circuit last checked in at health_check is still considered healthy at now.
+    """
+
+    if health_check:
+        return (now - health_check).total_seconds() / 60 < 15
+    else:
+        return False
+
+
+def utc_day_range(day: datetime.date) -> Tuple[datetime.datetime, datetime.datetime]:
+    start = datetime.datetime.combine(day, datetime.time.min, tzinfo=pytz.UTC)
+
+    return start, start + datetime.timedelta(days=1)
+
+
+class ScheduledOneTimeActivationQuerySet(models.QuerySet):
+    def today(self):
+        """
+        Narrows the queryset down to activations scheduled for the current (UTC) day, evaluated on every call.
+        The half-open range, unlike timestamp__date, can be served by the (circuit, timestamp) index.
+        """
+
+        start, end = utc_day_range(utc_today())
+
+        return self.filter(timestamp__gte=start, timestamp__lt=end)
+
+
+class CircuitQuerySet(models.QuerySet):
+    def with_related(self):
+        """
+        Prefetches the schedule and today's one-time activations, so serializing the circuits costs a fixed number
+        of queries.
+        """
+
+        from smartgarden.models import ScheduledOneTimeActivation
+
+        today_one_time_activations = ScheduledOneTimeActivation \
+            .objects \
+            .today() \
+            .order_by('-timestamp')
+
+        return self \
+            .prefetch_related(models.Prefetch('one_time_activations', today_one_time_activations,
+                                              to_attr='today_one_time_activations')) \
+            .prefetch_related('schedule')
@@ -0,0 +1,200 @@
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'smartgarden'
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+HISTOGRAMS = {
+    'request_duration_seconds': ('Wall time of the request through the middleware stack.', DURATION_BUCKETS),
+    'db_queries': ('Number of database queries run by the request.', QUERY_BUCKETS),
+    'db_duration_seconds': ('Time the request spent in database queries.', DURATION_BUCKETS),
+    'serialization_duration_seconds': ('Time spent rendering the response body.', DURATION_BUCKETS),
+    'response_size_bytes': ('Size of the response body.', SIZE_BUCKETS),
+}
+
+# (route, method) -> histogram name -> [bucket counts..., sum, count]
+Histograms = Dict[Tuple[str, str], Dict[str, List[float]]]
+# (route, method, status) -> count
+Counters = Dict[Tuple[str, str, str], int]
+
+
+class Metrics:
+    """
+    Request metrics of the worker process, kept in memory. Every worker of a pre-forking server keeps its own and,
+    with METRICS_DIR set, dumps them to a file of its own there, so any worker answering the scrape can merge
+    the metrics of all of them. Metrics inherited from the parent on fork are dropped, so nothing is counted twice.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.reset()
+
+    def reset(self) -> None:
+        self._histograms: Histograms = {}
+        self._requests: Counters = defaultdict(int)
+        self._synced = 0.0
+
+    @property
+    def directory(self) -> Optional[str]:
+        return getattr(settings, 'METRICS_DIR', None) or None
+
+    @property
+    def sync_interval(self) -> float:
+        return getattr(settings, 'METRICS_SYNC_INTERVAL', 5)
+
+    def _check_pid(self) -> None:
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self.reset()
+
+    def observe(self, route: str, method: str, status: int, values: Dict[str, float]) -> None:
+        with self._lock:
+            self._check_pid()
+
+            self._requests[(route, method, str(status))] += 1
+
+            histograms = self._histograms.setdefault((route, method), {})
+            for name, value in values.items():
+                if value is None:
+                    continue
+
+                buckets = HISTOGRAMS[name][1]
+                histogram = histograms.setdefault(name, [0] * (len(buckets) + 2))
+
+                for i, bound in enumerate(buckets):
+                    if value <= bound:
+                        histogram[i] += 1
+                histogram[-2] += value
+                histogram[-1] += 1
+
+            sync = self.directory and time.monotonic() - self._synced >= self.sync_interval
+            if sync:
+                self._synced = time.monotonic()
+
+        if sync:
+            self.dump()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._check_pid()
+
+            return {
+                'histograms': [[route, method, name, list(values)]
+                               for (route, method), histograms in self._histograms.items()
+                               for name, values in histograms.items()],
+                'requests': [[route, method, status, count]
+                             for (route, method, status), count in self._requests.items()],
+            }
+
+    def dump(self) -> None:
+        """
+        Writes the snapshot of the worker atomically, readers never see a half written file.
+        """
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+
+            fd, path = tempfile.mkstemp(dir=self.directory, prefix='.metrics-', suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.snapshot(), f)
+
+            os.replace(path, os.path.join(self.directory, f'metrics-{os.getpid()}.json'))
+        except OSError:
+            logger.exception('Dumping metrics failed')
+
+    def collect(self) -> List[dict]:
+        """
+        Snapshots of all workers, the current one taken live.
+        """
+
+        snapshots = [self.snapshot()]
+        if not self.directory:
+            return snapshots
+
+        own = os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            if path == own:
+                continue
+
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                logger.warning('Skipping unreadable metrics file %s', path)
+
+        return snapshots
+
+
+def merge(snapshots: List[dict]) -> Tuple[Histograms, Counters]:
+    histograms: Histograms = {}
+    requests: Counters = defaultdict(int)
+
+    for snapshot in snapshots:
+        for route, method, name, values in snapshot['histograms']:
+            merged = histograms.setdefault((route, method), {}).setdefault(name, [0] * len(values))
+            if len(merged) != len(values):
+                # dumped by a worker running with other buckets, until it is restarted
+                continue
+
+            for i, value in enumerate(values):
+                merged[i] += value
+
+        for route, method, status, count in snapshot['requests']:
+            requests[(route, method, status)] += count
+
+    return histograms, requests
+
+
+def escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def render(snapshots: List[dict]) -> str:
+    """
+    The merged snapshots in the Prometheus text exposition format.
+    """
+
+    histograms, requests = merge(snapshots)
+    lines = [
+        f'# HELP {PREFIX}_requests_total Number of requests handled.',
+        f'# TYPE {PREFIX}_requests_total counter',
+    ]
+
+    for (route, method, status), count in sorted(requests.items()):
+        lines.append(f'{PREFIX}_requests_total{{route="{escape(route)}",method="{method}",status="{status}"}} {count}')
+
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {PREFIX}_{name} {help_text}')
+        lines.append(f'# TYPE {PREFIX}_{name} histogram')
+
+        for (route, method), route_histograms in sorted(histograms.items()):
+            values = route_histograms.get(name)
+            if values is None:
+                continue
+
+            labels = f'route="{escape(route)}",method="{method}"'
+            for bound, count in zip(buckets, values):
+                lines.append(f'{PREFIX}_{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{PREFIX}_{name}_bucket{{{labels},le="+Inf"}} {values[-1]}')
+            lines.append(f'{PREFIX}_{name}_sum{{{labels}}} {values[-2]}')
+            lines.append(f'{PREFIX}_{name}_count{{{labels}}} {values[-1]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
@@ -0,0 +1,209 @@
+import cProfile
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from smartgarden import compression, profiling, slow_queries
+from smartgarden.metrics import metrics
+
+
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+class QueryTimer:
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """
+    Records the wall time, database queries and time, rendering time and response size of every request under
+    the name of its route. Streamed responses are measured once the last chunk has been sent, including the queries
+    run while streaming.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        queries = QueryTimer()
+        request._metrics_serialization = None
+
+        with self.timed(queries):
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        # labels must stay few, methods come from the client
+        method = request.method if request.method in METHODS else 'OTHER'
+
+        def observe(size):
+            metrics.observe(route, method, response.status_code, {
+                'request_duration_seconds': time.perf_counter() - start,
+                'db_queries': queries.count,
+                'db_duration_seconds': queries.duration,
+                'serialization_duration_seconds': request._metrics_serialization,
+                'response_size_bytes': size,
+            })
+
+        if response.streaming:
+            response.streaming_content = self.measure_stream(response.streaming_content, queries, observe)
+        else:
+            observe(len(response.content))
+
+        return response
+
+    @staticmethod
+    def timed(queries: QueryTimer) -> ExitStack:
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(queries))
+
+        return stack
+
+    def measure_stream(self, content, queries, observe):
+        size = 0
+        try:
+            with self.timed(queries):
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            observe(size)
+
+    def process_template_response(self, request, response):
+        # DRF and template responses are rendered right after this hook, timed until the last post render callback
+        start = time.perf_counter()
+
+        def rendered(_):
+            request._metrics_serialization = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+
+        return response
+
+
+class SlowQueryMiddleware:
+    """
+    Records the queries slower than SLOW_QUERY_THRESHOLD_MS together with the view they were run for, see
+    manage.py slowqueries. Not used unless the threshold is set.
+    """
+
+    def __init__(self, get_response):
+        if not slow_queries.enabled():
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with slow_queries.capture() as recorders:
+            request._slow_query_recorders = recorders
+
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        for recorder in request._slow_query_recorders:
+            recorder.view = request.resolver_match.view_name
+
+
+class ProfilingMiddleware:
+    """
+    Runs the requests of staff users sending the X-Profile header or the profile query parameter under cProfile and
+    stores the profile to PROFILES_DIR, named in the X-Profile response header. Other requests only pay for the
+    check of the flag, none at all unless PROFILING_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', True):
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.requested(request) or profiling.staff_user(request) is None:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+
+        match = request.resolver_match
+        name = profiling.profile_name(match.view_name if match else 'unmatched', request.method,
+                                      response.status_code, time.perf_counter() - start)
+        profiling.save_profile(profiler, name)
+
+        response['X-Profile'] = name
+
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Compresses the responses of COMPRESSION_CONTENT_TYPES with brotli, when installed, or gzip, whichever the client
+    accepts with the higher quality. Bodies shorter than COMPRESSION_MIN_SIZE are sent as they are, the overhead
+    outweighs the savings there. HTML is left out, pages carrying a CSRF token would be open to BREACH.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'COMPRESSION_ENABLED', True):
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in settings.COMPRESSION_CONTENT_TYPES or response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = compression.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+
+            compressed = compression.compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # a strong validator must not match the uncompressed representation as well
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+
+        response['Content-Encoding'] = encoding
+
+        return response
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('smartgarden', '0006_auto_20210531_1436'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='circuit',
+            name='config_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='config version'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:51
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, F
+
+
+def remove_duplicates(apps, schema_editor):
+    ActivationLog = apps.get_model('smartgarden', 'ActivationLog')
+
+    first = ActivationLog.objects \
+        .filter(circuit_id=OuterRef('circuit_id'), timestamp=OuterRef('timestamp')) \
+        .order_by('pk') \
+        .values('pk')[:1]
+
+    duplicates = ActivationLog.objects \
+        .annotate(first=Subquery(first)) \
+        .exclude(pk=F('first')) \
+        .values_list('pk', flat=True)
+
+    ActivationLog.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('smartgarden', '0007_circuit_config_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='activationlog',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='idempotency key'),
+        ),
+        migrations.AddConstraint(
+            model_name='activationlog',
+            constraint=models.UniqueConstraint(condition=models.Q(('idempotency_key__isnull', False)), fields=('circuit', 'idempotency_key'), name='activation_log_unique_idempotency_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='activationlog',
+            constraint=models.UniqueConstraint(condition=models.Q(('idempotency_key__isnull', True)), fields=('circuit', 'timestamp'), name='activation_log_unique_timestamp'),
+        ),
+    ]
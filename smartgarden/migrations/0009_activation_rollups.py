@@ -0,0 +1,46 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('smartgarden', '0008_activation_log_idempotency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlyActivationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(verbose_name='hour')),
+                ('count', models.IntegerField(verbose_name='count')),
+                ('total', models.BigIntegerField(verbose_name='total amount')),
+                ('min_amount', models.IntegerField(verbose_name='min amount')),
+                ('max_amount', models.IntegerField(verbose_name='max amount')),
+                ('circuit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_rollups', to='smartgarden.circuit')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyActivationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateField(verbose_name='day')),
+                ('count', models.IntegerField(verbose_name='count')),
+                ('total', models.BigIntegerField(verbose_name='total amount')),
+                ('min_amount', models.IntegerField(verbose_name='min amount')),
+                ('max_amount', models.IntegerField(verbose_name='max amount')),
+                ('circuit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='smartgarden.circuit')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='hourlyactivationrollup',
+            constraint=models.UniqueConstraint(fields=('circuit', 'bucket'), name='hourly_activation_rollup_unique_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyactivationrollup',
+            constraint=models.UniqueConstraint(fields=('circuit', 'bucket'), name='daily_activation_rollup_unique_bucket'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('smartgarden', '0009_activation_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activationlog',
+            index=models.Index(fields=['circuit', 'timestamp'], name='activation_log_circuit_ts'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduledonetimeactivation',
+            index=models.Index(fields=['circuit', 'timestamp'], name='one_time_activation_circuit_ts'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('smartgarden', '0010_circuit_timestamp_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DueActivation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_at', models.DateTimeField(verbose_name='due at')),
+                ('amount', models.IntegerField(verbose_name='amount')),
+                ('kind', models.CharField(choices=[('SCHEDULED', 'Scheduled'), ('ONE_TIME', 'One-time')], max_length=32)),
+                ('circuit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='due_activations', to='smartgarden.circuit')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='dueactivation',
+            index=models.Index(fields=['due_at'], name='due_activation_due_at'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('smartgarden', '0011_due_activations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeviceKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key_id', models.CharField(max_length=32, unique=True, verbose_name='key id')),
+                ('digest', models.CharField(max_length=64, verbose_name='digest')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='created')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='device_key', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
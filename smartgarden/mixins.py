@@ -1,3 +1,8 @@
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework_simplejwt.tokens import Token
+
+from smartgarden.authentication import CIRCUIT_ID_CLAIM, controlled_circuit_id
 from smartgarden.models import Circuit
 
 
@@ -9,3 +14,52 @@ class ExtractCircuitMixin:
     @property
     def circuit(self):
         return Circuit.objects.get(pk=self.circuit_id)
+
+
+class ControlledCircuitMixin:
+    @property
+    def has_circuit_id_claim(self):
+        return isinstance(self.request.auth, Token) and CIRCUIT_ID_CLAIM in self.request.auth
+
+    @cached_property
+    def controlled_circuit_id(self):
+        """
+        The id of the circuit controlled by the requesting device, resolved once per request. It is read from
+        the access token claim when present, tokens issued without the claim fall back to a single lookup.
+        """
+
+        if self.has_circuit_id_claim:
+            circuit_id = self.request.auth[CIRCUIT_ID_CLAIM]
+        else:
+            circuit_id = controlled_circuit_id(self.request.user.pk)
+
+        if circuit_id is None:
+            raise NotFound(detail="circuit not assigned", code=404)
+
+        return circuit_id
+
+    @cached_property
+    def verified_controlled_circuit_id(self):
+        """
+        The id of the controlled circuit for writes. The claim is checked against the controller of the circuit, so
+        a reassigned device cannot keep writing to its old circuit until its token expires.
+        """
+
+        circuit_id = self.controlled_circuit_id
+
+        if self.has_circuit_id_claim and not self.get_controlled_circuits().exists():
+            raise NotFound(detail="circuit not assigned", code=404)
+
+        return circuit_id
+
+    def get_controlled_circuits(self):
+        """
+        The circuit controlled by the requesting device as a queryset, so views load it with the fields they need
+        in a single query whether or not the token carries the claim.
+        """
+
+        circuits = Circuit.objects.filter(controller_id=self.request.user.pk)
+        if self.has_circuit_id_claim:
+            circuits = circuits.filter(pk=self.controlled_circuit_id)
+
+        return circuits
@@ -5,8 +5,10 @@ import pytz
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import PermissionsMixin
 from django.db import models
+from django.utils.cache import quote_etag
 
-from smartgarden.managers import UserManager
+from smartgarden.managers import UserManager, ScheduledOneTimeActivationQuerySet, CircuitQuerySet, utc_today, \
+    is_healthy
 
 
 class User(AbstractBaseUser, PermissionsMixin):
@@ -44,30 +46,58 @@ class Circuit(models.Model):
     name = models.TextField(verbose_name='circuit name', null=False)
     active = models.BooleanField(verbose_name='active', null=False)
     health_check = models.DateTimeField(verbose_name='health check', null=True, blank=True)
+    config_version = models.PositiveIntegerField(verbose_name='config version', default=0, editable=False)
 
     controller = models.OneToOneField(User, on_delete=models.SET_NULL, null=True, blank=True,
                                       related_name='controlled_circuit')
     collaborators = models.ManyToManyField(User, through='CircuitCollaboration',
                                            related_name='related_circuits', blank=True)
 
+    objects = CircuitQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        """
+        Every save of an existing circuit, except a health check, bumps config_version in the database, so a stale
+        instance never writes an older version back.
+        """
+
+        update_fields = kwargs.get('update_fields')
+        bump = not self._state.adding and not (update_fields is not None and set(update_fields) <= {'health_check'})
+
+        if bump:
+            self.config_version = models.F('config_version') + 1
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'config_version'}
+
+        super().save(*args, **kwargs)
+
+        if bump:
+            self.refresh_from_db(fields=['config_version'])
+
     @property
     def healthy(self):
-        if self.health_check:
-            # noinspection PyTypeChecker
-            return (datetime.datetime.now(tz=pytz.UTC) - self.health_check).total_seconds() / 60 < 15
-        else:
-            return False
+        return is_healthy(self.health_check, datetime.datetime.now(tz=pytz.UTC))
 
     @property
     def one_time_activation(self):
-        if not self.one_time_activations:
-            return None
+        # populated by Prefetch(..., to_attr='today_one_time_activations'), already ordered by '-timestamp'
+        if hasattr(self, 'today_one_time_activations'):
+            return next(iter(self.today_one_time_activations), None)
 
         return self.one_time_activations \
-            .filter(timestamp__date=datetime.date.today()) \
+            .today() \
             .order_by('-timestamp') \
             .first()
 
+    @property
+    def config_fingerprint(self):
+        # today's date and the health flag change without any write, so they are a part of the fingerprint as well
+        return f'{self.pk}-{self.config_version}-{utc_today().isoformat()}-{int(self.healthy)}'
+
+    @property
+    def config_etag(self):
+        return quote_etag(self.config_fingerprint)
+
     def __str__(self):
         return f'[{self.pk}] {self.name}'
 
@@ -83,9 +113,24 @@ class CircuitCollaboration(models.Model):
 class ActivationLog(models.Model):
     amount = models.IntegerField(verbose_name='amount', null=False)
     timestamp = models.DateTimeField(verbose_name='timestamp', null=False)
+    idempotency_key = models.CharField(verbose_name='idempotency key', max_length=64, null=True, blank=True)
 
     circuit = models.ForeignKey(Circuit, on_delete=models.CASCADE, related_name='activation_log')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['circuit', 'timestamp'], name='activation_log_circuit_ts'),
+        ]
+        # retried uploads are dropped by the database, keyed by the device supplied key or by the timestamp
+        constraints = [
+            models.UniqueConstraint(fields=['circuit', 'idempotency_key'],
+                                    condition=models.Q(idempotency_key__isnull=False),
+                                    name='activation_log_unique_idempotency_key'),
+            models.UniqueConstraint(fields=['circuit', 'timestamp'],
+                                    condition=models.Q(idempotency_key__isnull=True),
+                                    name='activation_log_unique_timestamp'),
+        ]
+
     def __str__(self):
         return f'{self.circuit}, {self.timestamp}, {self.amount}'
 
@@ -96,6 +141,13 @@ class ScheduledOneTimeActivation(models.Model):
 
     circuit = models.ForeignKey(Circuit, on_delete=models.CASCADE, related_name='one_time_activations')
 
+    objects = ScheduledOneTimeActivationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['circuit', 'timestamp'], name='one_time_activation_circuit_ts'),
+        ]
+
     def __str__(self):
         return f'{self.circuit}, {self.timestamp}, {self.amount}'
 
@@ -108,3 +160,75 @@ class ScheduledActivation(models.Model):
 
     def __str__(self):
         return f'{self.circuit}, {self.time}, {self.amount}'
+
+
+class HourlyActivationRollup(models.Model):
+    bucket = models.DateTimeField(verbose_name='hour', null=False)
+    count = models.IntegerField(verbose_name='count', null=False)
+    total = models.BigIntegerField(verbose_name='total amount', null=False)
+    min_amount = models.IntegerField(verbose_name='min amount', null=False)
+    max_amount = models.IntegerField(verbose_name='max amount', null=False)
+
+    circuit = models.ForeignKey(Circuit, on_delete=models.CASCADE, related_name='hourly_rollups')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['circuit', 'bucket'], name='hourly_activation_rollup_unique_bucket'),
+        ]
+
+    def __str__(self):
+        return f'{self.circuit}, {self.bucket}, {self.total}'
+
+
+class DailyActivationRollup(models.Model):
+    bucket = models.DateField(verbose_name='day', null=False)
+    count = models.IntegerField(verbose_name='count', null=False)
+    total = models.BigIntegerField(verbose_name='total amount', null=False)
+    min_amount = models.IntegerField(verbose_name='min amount', null=False)
+    max_amount = models.IntegerField(verbose_name='max amount', null=False)
+
+    circuit = models.ForeignKey(Circuit, on_delete=models.CASCADE, related_name='daily_rollups')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['circuit', 'bucket'], name='daily_activation_rollup_unique_bucket'),
+        ]
+
+    def __str__(self):
+        return f'{self.circuit}, {self.bucket}, {self.total}'
+
+
+class DueActivation(models.Model):
+    class Kind(Enum):
+        SCHEDULED = 'SCHEDULED'
+        ONE_TIME = 'ONE_TIME'
+
+    KIND_CHOICES = (
+        (Kind.SCHEDULED.value, 'Scheduled'),
+        (Kind.ONE_TIME.value, 'One-time'),
+    )
+
+    due_at = models.DateTimeField(verbose_name='due at', null=False)
+    amount = models.IntegerField(verbose_name='amount', null=False)
+    kind = models.CharField(choices=KIND_CHOICES, null=False, max_length=32)
+
+    circuit = models.ForeignKey(Circuit, on_delete=models.CASCADE, related_name='due_activations')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['due_at'], name='due_activation_due_at'),
+        ]
+
+    def __str__(self):
+        return f'{self.circuit}, {self.due_at}, {self.amount}'
+
+
+class DeviceKey(models.Model):
+    key_id = models.CharField(verbose_name='key id', unique=True, null=False, max_length=32)
+    digest = models.CharField(verbose_name='digest', null=False, max_length=64)
+    created = models.DateTimeField(verbose_name='created', auto_now_add=True)
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='device_key')
+
+    def __str__(self):
+        return f'{self.user}, {self.key_id}'
@@ -0,0 +1,32 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Opaque cursor pagination over an indexed column, a page deep in the list costs as much as the first one
+    and no COUNT(*) is ever run.
+
+    Pagination is opt-in: without the page_size query parameter the whole list is returned, as before.
+    """
+
+    ordering = 'id'
+    page_size = None
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class ScheduledActivationPagination(KeysetPagination):
+    ordering = '-time'
+
+
+class ScheduledOneTimeActivationPagination(KeysetPagination):
+    ordering = '-timestamp'
+
+
+class ActivationLogPagination(KeysetPagination):
+    ordering = '-timestamp'
+    page_size = 100
+
+
+class DueActivationPagination(KeysetPagination):
+    ordering = 'due_at'
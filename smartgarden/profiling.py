@@ -0,0 +1,128 @@
+import cProfile
+import datetime
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional
+
+import pytz
+from django.conf import settings
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAMETER = 'profile'
+PROFILE_NAME = re.compile(r'^[\w.-]+\.prof$')
+UNSAFE_CHARACTERS = re.compile(r'[^\w-]+')
+
+
+@dataclass(frozen=True)
+class StoredProfile:
+    name: str
+    size: int
+    created: datetime.datetime
+
+
+def get_directory() -> str:
+    return settings.PROFILES_DIR
+
+
+def requested(request) -> bool:
+    return PROFILE_HEADER in request.META or PROFILE_PARAMETER in request.GET
+
+
+def staff_user(request):
+    """
+    The staff user making the request, authenticated by the session or else by the API authenticators ahead of
+    the view, None for everyone else.
+    """
+
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user if user.is_staff else None
+
+    drf_request = Request(request)
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            authenticated = authentication_class().authenticate(drf_request)
+        except APIException:
+            return None
+
+        if authenticated is not None:
+            user = authenticated[0]
+            return user if user.is_staff else None
+
+    return None
+
+
+def profile_name(view: str, method: str, status: int, duration: float) -> str:
+    timestamp = datetime.datetime.now(tz=pytz.UTC).strftime('%Y%m%dT%H%M%S.%f')
+    view = UNSAFE_CHARACTERS.sub('_', view)
+
+    return f'{timestamp}-{view}-{method}-{status}-{duration * 1000:.0f}ms-{uuid.uuid4().hex[:8]}.prof'
+
+
+def save_profile(profiler: cProfile.Profile, name: str) -> None:
+    """
+    Dumps the stats readable by pstats and snakeviz, dropping the oldest profiles beyond PROFILES_MAX_COUNT.
+    """
+
+    directory = get_directory()
+    os.makedirs(directory, exist_ok=True)
+
+    profiler.dump_stats(os.path.join(directory, name))
+
+    for stored in list_profiles()[settings.PROFILES_MAX_COUNT:]:
+        delete_profile(stored.name)
+
+
+def list_profiles() -> List[StoredProfile]:
+    """
+    The stored profiles, newest first.
+    """
+
+    directory = get_directory()
+    if not os.path.isdir(directory):
+        return []
+
+    profiles = []
+    for entry in os.scandir(directory):
+        if not PROFILE_NAME.match(entry.name):
+            continue
+
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+
+        profiles.append(StoredProfile(
+            name=entry.name,
+            size=stat.st_size,
+            created=datetime.datetime.fromtimestamp(stat.st_mtime, tz=pytz.UTC),
+        ))
+
+    # names start with the timestamp, modification times are too coarse to order profiles taken in a row
+    return sorted(profiles, key=lambda p: p.name, reverse=True)
+
+
+def profile_path(name: str) -> Optional[str]:
+    """
+    The path of a stored profile, None for names outside of the directory.
+    """
+
+    if not PROFILE_NAME.match(name):
+        return None
+
+    path = os.path.join(get_directory(), name)
+    return path if os.path.isfile(path) else None
+
+
+def delete_profile(name: str) -> None:
+    path = profile_path(name)
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,186 @@
+import csv
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Iterable, Dict
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from smartgarden.models import User, Circuit, CircuitCollaboration
+from smartgarden.signals import collaborations_changed
+
+
+class ManifestError(ValueError):
+    pass
+
+
+@dataclass
+class ManifestEntry:
+    circuit: str
+    device_email: str
+    device_password: Optional[str] = None
+    active: bool = True
+    collaborators: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ProvisioningResult:
+    devices: int
+    circuits: int
+    collaborations: int
+
+
+def parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+
+    return str(value).strip().lower() not in ('0', 'false', 'no', 'n', '')
+
+
+def read_csv_manifest(stream: Iterable[str]) -> List[ManifestEntry]:
+    """
+    Columns: circuit, device_email, device_password (optional), active (optional),
+    collaborators (optional, emails separated with spaces or semicolons).
+    """
+
+    entries = []
+    for row in csv.DictReader(stream):
+        entries.append(ManifestEntry(
+            circuit=row['circuit'],
+            device_email=row['device_email'],
+            device_password=row.get('device_password') or None,
+            active=parse_bool(row.get('active') or True),
+            collaborators=(row.get('collaborators') or '').replace(';', ' ').split()
+        ))
+
+    return entries
+
+
+def read_json_manifest(stream: Iterable[str]) -> List[ManifestEntry]:
+    """
+    A list of objects: {"circuit": ..., "device": {"email": ..., "password": ...}, "active": ...,
+    "collaborators": [...]}.
+    """
+
+    entries = []
+    for item in json.load(stream):
+        device = item.get('device') or {}
+        entries.append(ManifestEntry(
+            circuit=item['circuit'],
+            device_email=device['email'],
+            device_password=device.get('password'),
+            active=parse_bool(item.get('active', True)),
+            collaborators=list(item.get('collaborators', []))
+        ))
+
+    return entries
+
+
+def read_manifest(path: str) -> List[ManifestEntry]:
+    try:
+        with open(path, encoding='utf-8', newline='') as stream:
+            if path.endswith('.json'):
+                return read_json_manifest(stream)
+
+            return read_csv_manifest(stream)
+    except (KeyError, TypeError, json.JSONDecodeError) as e:
+        raise ManifestError(f'malformed manifest: {e}')
+
+
+def hash_passwords(passwords: List[Optional[str]], workers: int) -> List[str]:
+    """
+    Hashes the passwords in a pool of processes, hashing is CPU bound so threads would not help. Devices without
+    a password get an unusable one and authenticate with a device key.
+    """
+
+    if workers <= 1:
+        return [make_password(p) for p in passwords]
+
+    chunk_size = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+        return list(executor.map(make_password, passwords, chunksize=chunk_size))
+
+
+def pks_by(queryset, field_name: str, values: List, batch_size: int) -> Dict:
+    pks = {}
+    for i in range(0, len(values), batch_size):
+        batch = values[i:i + batch_size]
+        pks.update(queryset.filter(**{f'{field_name}__in': batch}).values_list(field_name, 'pk'))
+
+    return pks
+
+
+def validate_manifest(entries: List[ManifestEntry], batch_size: int) -> Dict[str, int]:
+    """
+    Checks the device emails are unique and unused and that every collaborator exists, returns the ids of
+    the collaborators by email.
+    """
+
+    for entry in entries:
+        entry.device_email = User.objects.normalize_email(entry.device_email)
+
+    emails = [e.device_email for e in entries]
+    duplicates = sorted(email for email, count in Counter(emails).items() if count > 1)
+    if duplicates:
+        raise ManifestError(f'duplicate devices: {", ".join(duplicates[:10])}')
+
+    existing = sorted(pks_by(User.objects, 'email', emails, batch_size))
+    if existing:
+        raise ManifestError(f'devices already exist: {", ".join(existing[:10])}')
+
+    collaborator_emails = sorted({email for e in entries for email in e.collaborators})
+    collaborators = pks_by(User.objects, 'email', collaborator_emails, batch_size)
+
+    missing = [email for email in collaborator_emails if email not in collaborators]
+    if missing:
+        raise ManifestError(f'collaborators not found: {", ".join(missing[:10])}')
+
+    return collaborators
+
+
+def provision(entries: List[ManifestEntry], workers: int = None, batch_size: int = 1000) -> ProvisioningResult:
+    """
+    Creates a device user and a circuit controlled by it for every entry and adds the collaborators of the circuit.
+    Everything is inserted in batches in a single transaction, passwords are hashed before it begins.
+    """
+
+    workers = workers or os.cpu_count() or 1
+
+    collaborators = validate_manifest(entries, batch_size)
+    passwords = hash_passwords([e.device_password for e in entries], workers)
+
+    with transaction.atomic():
+        User.objects.bulk_create([
+            User(email=e.device_email, user_type=User.UserType.DEVICE.value, password=p)
+            for e, p in zip(entries, passwords)
+        ], batch_size=batch_size)
+
+        # not every backend returns the primary keys of bulk inserts
+        devices = pks_by(User.objects, 'email', [e.device_email for e in entries], batch_size)
+
+        Circuit.objects.bulk_create([
+            Circuit(name=e.circuit, active=e.active, controller_id=devices[e.device_email])
+            for e in entries
+        ], batch_size=batch_size)
+
+        # controllers are unique, so they identify the new circuits
+        circuits = pks_by(Circuit.objects, 'controller_id', list(devices.values()), batch_size)
+
+        collaborations = {
+            (circuits[devices[e.device_email]], collaborators[email])
+            for e in entries
+            for email in e.collaborators
+        }
+        CircuitCollaboration.objects.bulk_create([
+            CircuitCollaboration(circuit_id=circuit_id, user_id=user_id)
+            for circuit_id, user_id in sorted(collaborations)
+        ], batch_size=batch_size)
+
+        # bulk inserts bypass the signals
+        collaborations_changed({user_id for _, user_id in collaborations})
+
+    return ProvisioningResult(devices=len(devices), circuits=len(circuits), collaborations=len(collaborations))
@@ -0,0 +1,29 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover, a dependency, the stdlib is used without it
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson, several times faster than the stdlib encoder on large lists. Datetimes and
+    other non-native values are still encoded by DRF's encoder, so the output decodes to the same values, though
+    not always to the same bytes: floats may be written in another exponent form (1e16 for 1e+16) and NaN and
+    Infinity are written as null rather than rejected. Indented or ASCII only output and anything orjson cannot
+    encode fall back to the stdlib.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact or \
+                self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # as JSONRenderer does, the line and paragraph separators are not valid within JavaScript strings
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,120 @@
+import datetime
+from typing import Iterable, List
+
+import pytz
+from django.db import transaction
+from django.db.models import Count, Sum, Min, Max
+from django.db.models.functions import TruncHour, TruncDate
+
+from smartgarden.models import ActivationLog, Circuit, HourlyActivationRollup, DailyActivationRollup
+
+HOUR = datetime.timedelta(hours=1)
+DAY = datetime.timedelta(days=1)
+
+
+def truncate_hour(timestamp: datetime.datetime) -> datetime.datetime:
+    return timestamp.astimezone(pytz.UTC).replace(minute=0, second=0, microsecond=0)
+
+
+def start_of_day(day: datetime.date) -> datetime.datetime:
+    return datetime.datetime.combine(day, datetime.time.min, tzinfo=pytz.UTC)
+
+
+def hourly_aggregates(activation_logs):
+    return activation_logs \
+        .annotate(bucket=TruncHour('timestamp')) \
+        .values('circuit_id', 'bucket') \
+        .annotate(count=Count('pk'), total=Sum('amount'), min_amount=Min('amount'), max_amount=Max('amount')) \
+        .order_by()
+
+
+def daily_aggregates(hourly_rollups):
+    return hourly_rollups \
+        .annotate(day=TruncDate('bucket')) \
+        .values('circuit_id', 'day') \
+        .annotate(day_count=Sum('count'), day_total=Sum('total'), day_min_amount=Min('min_amount'),
+                  day_max_amount=Max('max_amount')) \
+        .order_by()
+
+
+def daily_rollup(row: dict) -> DailyActivationRollup:
+    return DailyActivationRollup(circuit_id=row['circuit_id'], bucket=row['day'], count=row['day_count'],
+                                 total=row['day_total'], min_amount=row['day_min_amount'],
+                                 max_amount=row['day_max_amount'])
+
+
+def refresh_rollups(circuit_id: int, timestamps: Iterable[datetime.datetime]) -> None:
+    """
+    Recomputes the hourly and daily rollups of the buckets the given timestamps fall into. The buckets are rebuilt
+    from the stored rows rather than incremented, so entries dropped as duplicates are never counted twice.
+    """
+
+    hours = {truncate_hour(t) for t in timestamps}
+    if not hours:
+        return
+
+    days = {h.date() for h in hours}
+
+    with transaction.atomic():
+        # concurrent refreshes of the same circuit would both delete and insert the same buckets, so they are
+        # serialized on the circuit row and the logs are read only once the lock is held
+        Circuit.objects.select_for_update().filter(pk=circuit_id).exists()
+
+        activation_logs = ActivationLog.objects.filter(
+            circuit_id=circuit_id,
+            timestamp__gte=min(hours),
+            timestamp__lt=max(hours) + HOUR
+        )
+        hourly = [
+            HourlyActivationRollup(**row) for row in hourly_aggregates(activation_logs) if row['bucket'] in hours
+        ]
+
+        HourlyActivationRollup.objects.filter(circuit_id=circuit_id, bucket__in=hours).delete()
+        HourlyActivationRollup.objects.bulk_create(hourly)
+
+        hourly_rollups = HourlyActivationRollup.objects.filter(
+            circuit_id=circuit_id,
+            bucket__gte=start_of_day(min(days)),
+            bucket__lt=start_of_day(max(days)) + DAY
+        )
+        daily = [daily_rollup(row) for row in daily_aggregates(hourly_rollups) if row['day'] in days]
+
+        DailyActivationRollup.objects.filter(circuit_id=circuit_id, bucket__in=days).delete()
+        DailyActivationRollup.objects.bulk_create(daily)
+
+
+def backfill_rollups(circuit_ids: List[int], batch_size: int = 1000) -> int:
+    """
+    Rebuilds all rollups of the given circuits from scratch, aggregating in the database and streaming the buckets.
+    Returns the number of hourly buckets written.
+    """
+
+    written = 0
+
+    with transaction.atomic():
+        HourlyActivationRollup.objects.filter(circuit_id__in=circuit_ids).delete()
+        DailyActivationRollup.objects.filter(circuit_id__in=circuit_ids).delete()
+
+        batch = []
+        for row in hourly_aggregates(ActivationLog.objects.filter(circuit_id__in=circuit_ids)).iterator():
+            batch.append(HourlyActivationRollup(**row))
+
+            if len(batch) >= batch_size:
+                written += len(HourlyActivationRollup.objects.bulk_create(batch))
+                batch = []
+
+        written += len(HourlyActivationRollup.objects.bulk_create(batch))
+
+        hourly_rollups = HourlyActivationRollup.objects.filter(circuit_id__in=circuit_ids)
+
+        batch = []
+        for row in daily_aggregates(hourly_rollups).iterator():
+            batch.append(daily_rollup(row))
+
+            if len(batch) >= batch_size:
+                DailyActivationRollup.objects.bulk_create(batch)
+                batch = []
+
+        DailyActivationRollup.objects.bulk_create(batch)
+
+    return written
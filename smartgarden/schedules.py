@@ -0,0 +1,61 @@
+from collections import defaultdict
+from typing import List
+
+from smartgarden.models import ScheduledActivation
+from smartgarden.signals import config_changed
+
+SCHEDULE_FIELDS = ['active', 'amount', 'time']
+
+
+def schedule_key(entry) -> tuple:
+    if isinstance(entry, dict):
+        return tuple(entry[f] for f in SCHEDULE_FIELDS)
+
+    return tuple(getattr(entry, f) for f in SCHEDULE_FIELDS)
+
+
+def replace_schedule(circuit_id: int, entries: List[dict]) -> bool:
+    """
+    Makes the schedule of the circuit equal to the given entries with as few writes as possible: identical rows are
+    kept, changed rows are updated in place and only the surplus is deleted or inserted, each in a single statement.
+    Returns whether anything was written. Should be run in a transaction.
+    """
+
+    unmatched = defaultdict(list)
+    for activation in ScheduledActivation.objects.select_for_update().filter(circuit_id=circuit_id).order_by('pk'):
+        unmatched[schedule_key(activation)].append(activation)
+
+    missing = []
+    for entry in entries:
+        kept = unmatched[schedule_key(entry)]
+        if kept:
+            kept.pop(0)
+        else:
+            missing.append(entry)
+
+    stale = [activation for activations in unmatched.values() for activation in activations]
+
+    updated = []
+    for activation, entry in zip(stale, missing):
+        for f in SCHEDULE_FIELDS:
+            setattr(activation, f, entry[f])
+        updated.append(activation)
+
+    stale = stale[len(updated):]
+    missing = missing[len(updated):]
+
+    if updated:
+        ScheduledActivation.objects.bulk_update(updated, SCHEDULE_FIELDS)
+    if stale:
+        # a raw delete sends no per row signals, nothing references the schedule so there is nothing to cascade
+        stale_rows = ScheduledActivation.objects.filter(pk__in=[a.pk for a in stale])
+        stale_rows._raw_delete(stale_rows.db)
+    if missing:
+        ScheduledActivation.objects.bulk_create([ScheduledActivation(circuit_id=circuit_id, **e) for e in missing])
+
+    changed = bool(updated or stale or missing)
+    if changed:
+        # none of the writes above send the model signals, the change is announced once for all of them
+        config_changed(circuit_id)
+
+    return changed
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
-from smartgarden.models import User, Circuit, ActivationLog, ScheduledOneTimeActivation, ScheduledActivation
+from smartgarden.models import User, Circuit, ActivationLog, ScheduledOneTimeActivation, ScheduledActivation, \
+    HourlyActivationRollup, DailyActivationRollup, DueActivation
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -11,10 +12,13 @@ class UserSerializer(serializers.ModelSerializer):
 
 class ActivationLogSerializer(serializers.ModelSerializer):
     timestamp = serializers.DateTimeField(format='%Y-%m-%dT%H:%M:%S')
+    idempotency_key = serializers.CharField(max_length=64, required=False, allow_null=True)
 
     class Meta:
         model = ActivationLog
-        fields = ['amount', 'timestamp']
+        fields = ['amount', 'timestamp', 'idempotency_key']
+        # uniqueness is enforced by the database on insert, without a lookup upfront
+        validators = []
 
 
 class ScheduledOneTimeActivationSerializer(serializers.ModelSerializer):
@@ -40,3 +44,57 @@ class CircuitSerializer(serializers.ModelSerializer):
     class Meta:
         model = Circuit
         fields = ['id', 'name', 'active', 'healthy', 'one_time_activation', 'schedule']
+
+
+class HourlyActivationRollupSerializer(serializers.ModelSerializer):
+    bucket = serializers.DateTimeField(format='%Y-%m-%dT%H:%M:%S')
+
+    class Meta:
+        model = HourlyActivationRollup
+        fields = ['bucket', 'count', 'total', 'min_amount', 'max_amount']
+
+
+class DailyActivationRollupSerializer(serializers.ModelSerializer):
+    bucket = serializers.DateField(format='%Y-%m-%d')
+
+    class Meta:
+        model = DailyActivationRollup
+        fields = ['bucket', 'count', 'total', 'min_amount', 'max_amount']
+
+
+class UsageQuerySerializer(serializers.Serializer):
+    RESOLUTION_HOUR = 'hour'
+    RESOLUTION_DAY = 'day'
+
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    resolution = serializers.ChoiceField(choices=[RESOLUTION_HOUR, RESOLUTION_DAY], default=RESOLUTION_DAY)
+
+    def validate(self, attrs):
+        if attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError('start must be before end')
+
+        return attrs
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    OUTPUT_CSV = 'csv'
+    OUTPUT_NDJSON = 'ndjson'
+
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    output = serializers.ChoiceField(choices=[OUTPUT_CSV, OUTPUT_NDJSON], default=OUTPUT_CSV)
+
+
+class DueActivationSerializer(serializers.ModelSerializer):
+    due_at = serializers.DateTimeField(format='%Y-%m-%dT%H:%M:%S')
+    circuit_id = serializers.IntegerField()
+
+    class Meta:
+        model = DueActivation
+        fields = ['circuit_id', 'due_at', 'amount', 'kind']
+
+
+class DueQuerySerializer(serializers.Serializer):
+    start = serializers.DateTimeField(required=False)
+    minutes = serializers.IntegerField(min_value=1, max_value=24 * 60, default=15)
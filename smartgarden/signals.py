@@ -0,0 +1,120 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from smartgarden.caches import bump_user_versions, invalidate_collaborations
+from smartgarden.due_activations import refresh_due_activations
+from smartgarden.models import Circuit, ScheduledActivation, ScheduledOneTimeActivation, CircuitCollaboration
+
+
+def bump_config_version(circuit_id):
+    Circuit.objects.filter(pk=circuit_id).update(config_version=F('config_version') + 1)
+
+
+def collaborator_ids(circuit_id):
+    return CircuitCollaboration.objects.filter(circuit_id=circuit_id).values_list('user_id', flat=True)
+
+
+def circuit_lists_changed(circuit_id):
+    user_versions_changed(collaborator_ids(circuit_id))
+
+
+def user_versions_changed(user_ids):
+    user_ids = list(user_ids)
+    bump_user_versions(user_ids)
+    # bumped once more after the commit, so a list a concurrent request cached from before the change does not stay
+    transaction.on_commit(lambda: bump_user_versions(user_ids))
+
+
+def collaborations_changed(user_ids):
+    user_ids = list(user_ids)
+    invalidate_collaborations(user_ids)
+    # dropped once more after the commit, so a set cached by a concurrent request from before the change does not stay
+    transaction.on_commit(lambda: invalidate_collaborations(user_ids))
+    user_versions_changed(user_ids)
+
+
+class DueActivationsRefresh:
+    """
+    The circuits whose due activations are rebuilt once the transaction commits. Registered with every change, so it
+    is kept whichever savepoints roll back, but only the first call refreshes, all the circuits at once.
+    """
+
+    def __init__(self):
+        self.circuit_ids = set()
+        self.done = False
+
+    def __call__(self):
+        if self.done:
+            return
+
+        self.done = True
+        refresh_due_activations(sorted(self.circuit_ids))
+
+
+def refresh_due_activations_on_commit(circuit_id):
+    connection = transaction.get_connection()
+
+    refresh = next((func for _, func in connection.run_on_commit
+                    if isinstance(func, DueActivationsRefresh) and not func.done), None) or DueActivationsRefresh()
+    refresh.circuit_ids.add(circuit_id)
+
+    transaction.on_commit(refresh)
+
+
+def circuit_changed(circuit_id):
+    circuit_lists_changed(circuit_id)
+    # deferred, so a circuit deleted together with its schedule is not refreshed half-way through the cascade
+    refresh_due_activations_on_commit(circuit_id)
+
+
+def config_changed(circuit_id):
+    bump_config_version(circuit_id)
+    circuit_changed(circuit_id)
+
+
+@receiver(post_save, sender=Circuit)
+def circuit_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and set(update_fields) <= {'health_check'}):
+        return
+
+    # the version itself is bumped by Circuit.save
+    circuit_changed(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=ScheduledActivation)
+@receiver([post_save, post_delete], sender=ScheduledOneTimeActivation)
+def circuit_config_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    config_changed(instance.circuit_id)
+
+
+@receiver(pre_delete, sender=Circuit)
+def circuit_deleted(sender, instance, **kwargs):
+    # collaborations are gone once the circuit is deleted
+    collaborations_changed(collaborator_ids(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=CircuitCollaboration)
+def collaboration_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    collaborations_changed([instance.user_id])
+
+
+@receiver(m2m_changed, sender=Circuit.collaborators.through)
+def collaborators_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        # instance is the user, pk_set the circuits
+        collaborations_changed([instance.pk])
+    elif action == 'pre_clear':
+        collaborations_changed(collaborator_ids(instance.pk))
+    else:
+        collaborations_changed(pk_set)
@@ -0,0 +1,254 @@
+import datetime
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, ExitStack
+from typing import Iterator, List, Optional
+
+import pytz
+from django.conf import settings
+from django.db import connections, transaction
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover, not available on Windows
+    fcntl = None
+
+SLOT_SIZE = 4096
+HEADER_SIZE = 32
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+_local = threading.local()
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Strips the literals out of the query, so the queries differing only in their parameters group together.
+    """
+
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = PLACEHOLDER_LIST.sub('(...)', sql)
+
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+class RingBuffer:
+    """
+    A fixed number of fixed size slots in a single file, the oldest record is overwritten once all are taken, so
+    the file never outgrows capacity * SLOT_SIZE. The count of records ever written is kept in the header. Writers
+    of all processes are serialized with a file lock.
+    """
+
+    def __init__(self, path: str, capacity: int) -> None:
+        self.path = path
+        self.capacity = capacity
+
+    def _open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        return os.fdopen(fd, 'r+b')
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with self._open() as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield f
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read_count(f) -> int:
+        f.seek(0)
+        header = f.read(HEADER_SIZE).strip(b'\0 \n')
+
+        return int(header) if header else 0
+
+    @staticmethod
+    def encode(record: dict) -> Optional[bytes]:
+        """
+        The record padded to a slot, the plan is dropped and the sql cut until it fits. None if it does not fit even
+        then, as escaping can make the encoded record longer than its text.
+        """
+
+        data = json.dumps(record).encode()
+
+        if len(data) >= SLOT_SIZE:
+            record = {**record, 'plan': None}
+            data = json.dumps(record).encode()
+
+        sql = record.get('sql') or ''
+        limit = SLOT_SIZE // 2
+        while len(data) >= SLOT_SIZE:
+            if not sql or not limit:
+                return None
+
+            record['sql'] = sql[:limit] + '...'
+            data = json.dumps(record).encode()
+            limit //= 2
+
+        return data.ljust(SLOT_SIZE - 1) + b'\n'
+
+    def append(self, record: dict) -> None:
+        data = self.encode(record)
+        if data is None:
+            return
+
+        with self._locked(exclusive=True) as f:
+            count = self._read_count(f)
+
+            f.seek(HEADER_SIZE + (count % self.capacity) * SLOT_SIZE)
+            f.write(data)
+
+            f.seek(0)
+            f.write(str(count + 1).encode().ljust(HEADER_SIZE - 1) + b'\n')
+
+    def records(self) -> List[dict]:
+        """
+        The records in the buffer, oldest first.
+        """
+
+        if not os.path.exists(self.path):
+            return []
+
+        with self._locked(exclusive=False) as f:
+            count = self._read_count(f)
+            first = count % self.capacity if count > self.capacity else 0
+
+            records = []
+            for i in range(min(count, self.capacity)):
+                f.seek(HEADER_SIZE + ((first + i) % self.capacity) * SLOT_SIZE)
+                try:
+                    records.append(json.loads(f.read(SLOT_SIZE)))
+                except ValueError:
+                    continue
+
+        return records
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def get_buffer() -> RingBuffer:
+    return RingBuffer(settings.SLOW_QUERY_LOG, getattr(settings, 'SLOW_QUERY_LOG_CAPACITY', 1000))
+
+
+def explain(connection, sql: str, params) -> Optional[str]:
+    """
+    The plan of the query without running it, only read queries are explained.
+    """
+
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+
+    _local.explaining = True
+    try:
+        # a failed EXPLAIN must not break the transaction of the request
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+    except Exception as e:
+        return f'EXPLAIN failed: {e}'
+    finally:
+        _local.explaining = False
+
+
+class SlowQueryRecorder:
+    """
+    Execution wrapper recording the queries slower than the threshold with the view they were run for. The first
+    slow occurrence of every query in the process is explained, later ones at the sampling rate.
+    """
+
+    explained = set()
+
+    def __init__(self, connection, view: str = None) -> None:
+        self.connection = connection
+        self.view = view
+        self.threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 0) / 1000
+        self.explain_rate = getattr(settings, 'SLOW_QUERY_EXPLAIN_RATE', 0.1)
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_local, 'explaining', False):
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - start
+
+        if duration >= self.threshold:
+            self.record(sql, params, many, duration)
+
+        return result
+
+    def record(self, sql, params, many, duration) -> None:
+        normalized = normalize_sql(sql)
+
+        plan = None
+        if not many and (normalized not in self.explained or random.random() < self.explain_rate):
+            self.explained.add(normalized)
+            plan = explain(self.connection, sql, params)
+
+        get_buffer().append({
+            'timestamp': datetime.datetime.now(tz=pytz.UTC).isoformat(timespec='seconds'),
+            'duration_ms': round(duration * 1000, 3),
+            'sql': normalized,
+            'view': self.view,
+            'alias': self.connection.alias,
+            'plan': plan,
+        })
+
+
+def enabled() -> bool:
+    return bool(getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 0))
+
+
+@contextmanager
+def capture(view: str = None) -> Iterator[List[SlowQueryRecorder]]:
+    """
+    Records the slow queries run on every connection within the block.
+    """
+
+    recorders = [SlowQueryRecorder(connection, view) for connection in connections.all()]
+
+    with ExitStack() as stack:
+        for recorder in recorders:
+            stack.enter_context(recorder.connection.execute_wrapper(recorder))
+
+        yield recorders
+
+
+def summarize(records: List[dict]) -> List[dict]:
+    """
+    The recorded queries grouped by their normalized SQL, worst total time first.
+    """
+
+    groups = {}
+    for record in records:
+        group = groups.setdefault(record['sql'], {
+            'sql': record['sql'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'views': Counter(), 'plan': None,
+        })
+        group['count'] += 1
+        group['total_ms'] += record['duration_ms']
+        group['max_ms'] = max(group['max_ms'], record['duration_ms'])
+        group['views'][record['view'] or 'unknown'] += 1
+        # the latest plan wins, it is the one closest to the current data
+        group['plan'] = record['plan'] or group['plan']
+
+    for group in groups.values():
+        group['mean_ms'] = group['total_ms'] / group['count']
+
+    return sorted(groups.values(), key=lambda g: g['total_ms'], reverse=True)
@@ -40,6 +40,28 @@ class ActivationLogViewTest(APITestCase, CommonAsserts):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertActivationLogsEqual([data], activations)
 
+    def test_post_retried(self):
+        today = datetime.datetime.now(tz=pytz.UTC)
+
+        for data in [
+            {'amount': 200, 'timestamp': today.strftime('%Y-%m-%dT%H:%M:%S')},
+            {'amount': 200, 'timestamp': today.strftime('%Y-%m-%dT%H:%M:%S')},
+            {'amount': 100, 'timestamp': today.strftime('%Y-%m-%dT%H:%M:%S'), 'idempotency_key': 'k1'},
+            {'amount': 100, 'timestamp': today.strftime('%Y-%m-%dT%H:%M:%S'), 'idempotency_key': 'k1'},
+            {'amount': 300, 'timestamp': today.strftime('%Y-%m-%dT%H:%M:%S'), 'idempotency_key': 'k2'},
+        ]:
+            request = self.factory.post(self.url, data=data, format='json')
+            force_authenticate(request, self.user)
+            response = self.view(request)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        amounts = self.circuit.activation_log \
+            .order_by('amount') \
+            .values_list('amount', flat=True)
+
+        self.assertListEqual([100, 200, 300], list(amounts))
+
     def test_post_circuit_not_assigned(self):
         today = datetime.datetime.now(tz=pytz.UTC)
 
@@ -0,0 +1,103 @@
+import datetime
+import json
+
+import pytz
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
+
+from smartgarden.commons.asserts import CommonAsserts
+from smartgarden.commons.fixtures import create_user, create_circuit
+from smartgarden.views import ActivationLogBulkView
+
+
+class ActivationLogBulkViewTest(APITestCase, CommonAsserts):
+    def setUp(self):
+        self.user = create_user()
+        self.circuit = create_circuit(name='c1', controller=self.user)
+
+        self.view = ActivationLogBulkView.as_view()
+        self.factory = APIRequestFactory()
+        self.url = reverse('circuit-activation-log-bulk')
+
+    def entries(self, count: int):
+        today = datetime.datetime.now(tz=pytz.UTC).replace(microsecond=0)
+
+        return [
+            {
+                'amount': i,
+                'timestamp': (today - datetime.timedelta(minutes=i)).strftime('%Y-%m-%dT%H:%M:%S')
+            } for i in range(count)
+        ]
+
+    def test_post_json_array(self):
+        data = self.entries(1200)
+
+        request = self.factory.post(self.url, data=json.dumps(data), content_type='application/json')
+        force_authenticate(request, self.user)
+        response = self.view(request)
+
+        activations = self.circuit.activation_log.order_by('-timestamp').all()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'accepted': 1200, 'errors': []})
+        self.assertEqual(1200, len(activations))
+        self.assertActivationLogsEqual(data, activations)
+
+    def test_post_ndjson(self):
+        data = self.entries(10)
+        body = '\n'.join(json.dumps(d) for d in data)
+
+        request = self.factory.post(self.url, data=body, content_type='application/x-ndjson')
+        force_authenticate(request, self.user)
+        response = self.view(request)
+
+        activations = self.circuit.activation_log.order_by('-timestamp').all()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'accepted': 10, 'errors': []})
+        self.assertActivationLogsEqual(data, activations)
+
+    def test_post_ndjson_errors(self):
+        data = self.entries(3)
+        lines = [json.dumps(data[0]), '{not json', json.dumps({'amount': 'x'}), json.dumps(data[2])]
+
+        request = self.factory.post(self.url, data='\n'.join(lines), content_type='application/x-ndjson')
+        force_authenticate(request, self.user)
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(2, response.data['accepted'])
+        self.assertListEqual([2, 3], [e['line'] for e in response.data['errors']])
+        self.assertIn('timestamp', response.data['errors'][1]['errors'])
+        self.assertEqual(2, self.circuit.activation_log.count())
+
+    def test_post_circuit_not_assigned(self):
+        self.circuit.controller = None
+        self.circuit.save()
+
+        request = self.factory.post(self.url, data=json.dumps(self.entries(1)), content_type='application/json')
+        force_authenticate(request, self.user)
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_post_unauthenticated(self):
+        request = self.factory.post(self.url, data=json.dumps(self.entries(1)), content_type='application/json')
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_post_retried(self):
+        data = self.entries(5)
+        data[0]['idempotency_key'] = 'k0'
+
+        for _ in range(2):
+            request = self.factory.post(self.url, data=json.dumps(data), content_type='application/json')
+            force_authenticate(request, self.user)
+            response = self.view(request)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(5, response.data['accepted'])
+
+        self.assertEqual(5, self.circuit.activation_log.count())
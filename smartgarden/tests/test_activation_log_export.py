@@ -0,0 +1,84 @@
+import datetime
+import json
+
+import pytz
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
+
+from smartgarden.commons.asserts import CommonAsserts
+from smartgarden.commons.fixtures import create_user, create_circuit, create_activation
+from smartgarden.views import ActivationLogExportView, CircuitActivationLogExportView
+
+
+class ActivationLogExportViewTest(APITestCase, CommonAsserts):
+    def setUp(self):
+        self.user = create_user()
+        self.c1 = create_circuit(name='c1')
+        self.c1.collaborators.add(self.user)
+        self.c2 = create_circuit(name='c2')
+        self.c2.collaborators.add(self.user)
+        self.c3 = create_circuit(name='c3')
+
+        self.today = datetime.datetime.now(tz=pytz.UTC).replace(microsecond=0)
+        self.yesterday = self.today - datetime.timedelta(days=1)
+
+        self.a1 = create_activation(self.c1, amount=100, timestamp=self.yesterday)
+        self.a2 = create_activation(self.c1, amount=200, timestamp=self.today)
+        self.a3 = create_activation(self.c2, amount=300, timestamp=self.today)
+        create_activation(self.c3, amount=400, timestamp=self.today)
+
+        self.factory = APIRequestFactory()
+
+    def fetch(self, view, url, **kwargs):
+        request = self.factory.get(url, data=kwargs.pop('params', {}))
+        force_authenticate(request, self.user)
+        response = view(request, **kwargs)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_export_csv(self):
+        content = self.fetch(ActivationLogExportView.as_view(), reverse('activation-log-export'))
+
+        self.assertListEqual([
+            'circuit_id,timestamp,amount',
+            f'{self.c1.pk},{self.yesterday.strftime("%Y-%m-%dT%H:%M:%S")},100',
+            f'{self.c1.pk},{self.today.strftime("%Y-%m-%dT%H:%M:%S")},200',
+            f'{self.c2.pk},{self.today.strftime("%Y-%m-%dT%H:%M:%S")},300',
+        ], content.splitlines())
+
+    def test_export_ndjson(self):
+        content = self.fetch(ActivationLogExportView.as_view(), reverse('activation-log-export'),
+                             params={'output': 'ndjson'})
+
+        rows = [json.loads(line) for line in content.splitlines()]
+
+        self.assertListEqual([self.c1.pk, self.c1.pk, self.c2.pk], [r['circuit_id'] for r in rows])
+        self.assertActivationLogsEqual(rows, [self.a1, self.a2, self.a3])
+
+    def test_export_circuit_date_range(self):
+        url = reverse('circuit-activation-log-export', kwargs={'circuit_id': self.c1.pk})
+        content = self.fetch(CircuitActivationLogExportView.as_view(), url, circuit_id=self.c1.pk, params={
+            'output': 'ndjson',
+            'start': (self.today - datetime.timedelta(hours=1)).isoformat(),
+            'end': (self.today + datetime.timedelta(hours=1)).isoformat(),
+        })
+
+        rows = [json.loads(line) for line in content.splitlines()]
+
+        self.assertActivationLogsEqual(rows, [self.a2])
+        self.assertEqual(1, len(rows))
+
+    def test_export_circuit_not_related(self):
+        url = reverse('circuit-activation-log-export', kwargs={'circuit_id': self.c3.pk})
+        content = self.fetch(CircuitActivationLogExportView.as_view(), url, circuit_id=self.c3.pk)
+
+        self.assertListEqual(['circuit_id,timestamp,amount'], content.splitlines())
+
+    def test_export_unauthenticated(self):
+        request = self.factory.get(reverse('activation-log-export'))
+        response = ActivationLogExportView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,128 @@
+import datetime
+
+import pytz
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from smartgarden.authentication import CIRCUIT_ID_CLAIM
+from smartgarden.commons.fixtures import create_user, create_circuit
+from smartgarden.heartbeats import heartbeat_buffer
+from smartgarden.models import Circuit, ActivationLog
+from smartgarden.views import ControlledCircuitView, ControlledCircuitHealthCheckView, ActivationLogView, \
+    ActivationLogBulkView
+
+
+class CircuitTokenTest(APITestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.factory = APIRequestFactory()
+
+    def obtain(self):
+        return self.client.post(reverse('token_obtain_pair'), {'email': 'user@test.com', 'password': 'user'},
+                                format='json')
+
+    def test_token_contains_controlled_circuit_id(self):
+        circuit = create_circuit(name='c1', controller=self.user)
+
+        response = self.obtain()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccessToken(response.data['access'])[CIRCUIT_ID_CLAIM], circuit.pk)
+        self.assertEqual(RefreshToken(response.data['refresh'])[CIRCUIT_ID_CLAIM], circuit.pk)
+
+    def test_token_no_circuit_assigned(self):
+        response = self.obtain()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(AccessToken(response.data['access'])[CIRCUIT_ID_CLAIM])
+
+    def test_refresh_resolves_reassigned_circuit(self):
+        refresh = self.obtain().data['refresh']
+        circuit = create_circuit(name='c1', controller=self.user)
+
+        response = self.client.post(reverse('token_refresh'), {'refresh': refresh}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccessToken(response.data['access'])[CIRCUIT_ID_CLAIM], circuit.pk)
+        self.assertEqual(RefreshToken(response.data['refresh'])[CIRCUIT_ID_CLAIM], circuit.pk)
+
+    def test_controlled_circuit_not_modified_takes_single_query(self):
+        circuit = create_circuit(name='c1', controller=self.user)
+        access = self.obtain().data['access']
+
+        request = self.factory.get(reverse('mine-circuit'), HTTP_AUTHORIZATION=f'Bearer {access}',
+                                   HTTP_IF_NONE_MATCH=Circuit.objects.get(pk=circuit.pk).config_etag)
+
+        with self.assertNumQueries(1):
+            response = ControlledCircuitView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_controlled_circuit_no_circuit_assigned_takes_no_queries(self):
+        access = self.obtain().data['access']
+
+        request = self.factory.get(reverse('mine-circuit'), HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        with self.assertNumQueries(0):
+            response = ControlledCircuitView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(HEARTBEAT_FLUSH_INTERVAL=3600)
+    def test_heartbeat_takes_no_queries(self):
+        health_check = datetime.datetime.now(tz=pytz.UTC) - datetime.timedelta(days=1)
+        circuit = create_circuit(name='c1', controller=self.user, health_check=health_check)
+        access = self.obtain().data['access']
+
+        request = self.factory.patch(f'{reverse("mine-circuit-health")}?mode=heartbeat',
+                                     HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        with self.assertNumQueries(0):
+            response = ControlledCircuitHealthCheckView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        heartbeat_buffer.flush()
+        self.assertTrue(Circuit.objects.get(pk=circuit.pk).healthy)
+
+    @override_settings(HEARTBEAT_FLUSH_INTERVAL=3600)
+    def test_heartbeat_of_reassigned_device_not_written(self):
+        health_check = datetime.datetime.now(tz=pytz.UTC) - datetime.timedelta(days=1)
+        circuit = create_circuit(name='c1', controller=self.user, health_check=health_check)
+        access = self.obtain().data['access']
+
+        circuit.controller = create_user(email='device2@test.com')
+        circuit.save()
+
+        request = self.factory.patch(f'{reverse("mine-circuit-health")}?mode=heartbeat',
+                                     HTTP_AUTHORIZATION=f'Bearer {access}')
+        response = ControlledCircuitHealthCheckView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        heartbeat_buffer.flush()
+        self.assertFalse(Circuit.objects.get(pk=circuit.pk).healthy)
+
+    def test_activation_log_of_reassigned_device_rejected(self):
+        circuit = create_circuit(name='c1', controller=self.user)
+        access = self.obtain().data['access']
+
+        circuit.controller = create_user(email='device2@test.com')
+        circuit.save()
+
+        entry = {'timestamp': datetime.datetime.now(tz=pytz.UTC).isoformat(), 'amount': 100}
+        requests = [
+            (ActivationLogView, reverse('circuit-activation-log'), entry),
+            (ActivationLogBulkView, reverse('circuit-activation-log-bulk'), [entry]),
+        ]
+
+        for view, url, data in requests:
+            request = self.factory.post(url, data, format='json', HTTP_AUTHORIZATION=f'Bearer {access}')
+            response = view.as_view()(request)
+
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.assertFalse(ActivationLog.objects.exists())
@@ -0,0 +1,42 @@
+from rest_framework.test import APITestCase
+
+from smartgarden.benchmarks import endpoints, serializers, rendering
+from smartgarden.benchmarks.endpoints import Budget, check_budget
+
+
+class EndpointsBenchmarkTest(APITestCase):
+    def test_query_budgets(self):
+        # latencies and memory depend on the machine, query counts must hold everywhere
+        budgets = {name: Budget(queries=budget.queries) for name, budget in endpoints.BUDGETS.items()}
+
+        results = list(endpoints.run(repeat=1, sizes=[5, 25], budgets=budgets))
+
+        self.assertSetEqual(set(endpoints.BUDGETS), {r['name'] for r in results})
+        self.assertListEqual([], [f'{r["name"]} ({r["circuits"]}): {r["budget"]}' for r in results
+                                  if r['budget'] != 'ok'])
+
+    def test_check_budget(self):
+        result = {'queries': 5, 'p95_ms': 30.0, 'peak_kib': 100.0}
+
+        self.assertListEqual([], check_budget(result, Budget(queries=5, p95_ms=30, peak_kib=100), circuits=10))
+        self.assertListEqual(['queries 5 > 4'], check_budget(result, Budget(queries=4), circuits=10))
+        self.assertListEqual(['p95 30.0ms > 20.0ms'], check_budget(result, Budget(p95_ms=20), circuits=10))
+        self.assertListEqual([], check_budget(result, Budget(p95_ms=20, per_circuit=True), circuits=200))
+
+
+class SerializersBenchmarkTest(APITestCase):
+    def test_fast_path_equivalent(self):
+        # the benchmark fails when the fast path differs from CircuitSerializer, speedups depend on the machine
+        results = list(serializers.run(repeat=1, sizes=[5, 25]))
+
+        self.assertListEqual([5, 25], [r['circuits'] for r in results])
+        self.assertTrue(all(r['fast_p50_ms'] > 0 for r in results))
+
+
+class RenderingBenchmarkTest(APITestCase):
+    def test_rendered_and_compressed(self):
+        # the benchmark fails when FastJSONRenderer differs from JSONRenderer
+        results = {(r['name'], r['circuits']): r for r in rendering.run(repeat=1, sizes=[25])}
+
+        self.assertEqual(results[('render-json', 25)]['bytes'], results[('render-fast-json', 25)]['bytes'])
+        self.assertLess(results[('compress-gzip', 25)]['bytes'], results[('render-json', 25)]['bytes'])
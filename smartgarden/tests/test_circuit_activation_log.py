@@ -0,0 +1,79 @@
+import datetime
+
+import pytz
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
+
+from smartgarden.commons.asserts import CommonAsserts
+from smartgarden.commons.fixtures import create_user, create_circuit
+from smartgarden.models import ActivationLog
+from smartgarden.views import CircuitActivationLogView
+
+
+class CircuitActivationLogViewTest(APITestCase, CommonAsserts):
+    def setUp(self):
+        self.user = create_user()
+        self.circuit = create_circuit(name='c1')
+        self.circuit.collaborators.add(self.user)
+
+        now = datetime.datetime.now(tz=pytz.UTC).replace(microsecond=0)
+        ActivationLog.objects.bulk_create([
+            ActivationLog(circuit=self.circuit, amount=i, timestamp=now - datetime.timedelta(minutes=i))
+            for i in range(250)
+        ])
+
+        self.view = CircuitActivationLogView.as_view()
+        self.factory = APIRequestFactory()
+        self.url = reverse('circuit-activation-log-list', kwargs={'circuit_id': self.circuit.pk})
+
+    def fetch(self, url):
+        request = self.factory.get(url, format='json')
+        force_authenticate(request, self.user)
+
+        return self.view(request, circuit_id=self.circuit.pk)
+
+    def test_fetch_pages(self):
+        url = self.url
+        amounts = []
+        pages = 0
+
+        while url:
+            # deep pages cost exactly as much as the first one
+            with self.assertNumQueries(1):
+                response = self.fetch(url)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+
+            amounts += [a['amount'] for a in response.data['results']]
+            url = response.data['next']
+            pages += 1
+
+        self.assertEqual(3, pages)
+        self.assertListEqual(list(range(250)), amounts)
+
+    def test_fetch_page_size(self):
+        response = self.fetch(f'{self.url}?page_size=10')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(list(range(10)), [a['amount'] for a in response.data['results']])
+
+        response = self.fetch(response.data['next'])
+
+        self.assertListEqual(list(range(10, 20)), [a['amount'] for a in response.data['results']])
+        self.assertIsNotNone(response.data['previous'])
+
+    def test_fetch_circuit_not_related(self):
+        self.circuit.collaborators.remove(self.user)
+
+        response = self.fetch(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual([], response.data['results'])
+
+    def test_fetch_unauthenticated(self):
+        request = self.factory.get(self.url, format='json')
+        response = self.view(request, circuit_id=self.circuit.pk)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,12 +1,14 @@
 import datetime
 
 import pytz
+from django.test import override_settings
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
 
 from smartgarden.commons.asserts import CommonAsserts
 from smartgarden.commons.fixtures import create_user, create_circuit
+from smartgarden.heartbeats import heartbeat_buffer
 from smartgarden.models import Circuit
 from smartgarden.views import ControlledCircuitHealthCheckView
 
@@ -37,3 +39,45 @@ class ControlledCircuitHealthCheckViewTest(APITestCase, CommonAsserts):
         response = self.view(request)
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(HEARTBEAT_FLUSH_INTERVAL=0)
+    def test_patch_heartbeat(self):
+        health_check = datetime.datetime.now(tz=pytz.UTC) - datetime.timedelta(days=1)
+        circuit = create_circuit(name='c1', controller=self.user, health_check=health_check)
+
+        request = self.factory.patch(f'{self.url}?mode=heartbeat', format='json')
+        force_authenticate(request, self.user)
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertIsNone(response.data)
+        self.assertTrue(Circuit.objects.get(pk=circuit.pk).healthy)
+
+    @override_settings(HEARTBEAT_FLUSH_INTERVAL=3600)
+    def test_patch_heartbeat_buffered(self):
+        health_check = datetime.datetime.now(tz=pytz.UTC) - datetime.timedelta(days=1)
+        circuits = [create_circuit(name=f'c{i}', controller=create_user(email=f'device{i}@test.com'),
+                                   health_check=health_check) for i in range(3)]
+
+        for circuit in circuits:
+            for _ in range(2):
+                request = self.factory.patch(f'{self.url}?mode=heartbeat', format='json')
+                force_authenticate(request, circuit.controller)
+                response = self.view(request)
+
+                self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertFalse(any(c.healthy for c in Circuit.objects.all()))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(3, heartbeat_buffer.flush())
+
+        self.assertTrue(all(c.healthy for c in Circuit.objects.all()))
+        self.assertEqual(0, heartbeat_buffer.flush())
+
+    def test_patch_heartbeat_circuit_not_assigned(self):
+        request = self.factory.patch(f'{self.url}?mode=heartbeat', format='json')
+        force_authenticate(request, self.user)
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,17 +1,24 @@
 import datetime
 
 import pytz
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
 
 from smartgarden.commons.asserts import CommonAsserts
 from smartgarden.commons.fixtures import create_user, create_circuit, create_scheduled_activation
+from smartgarden.schedules import replace_schedule
 from smartgarden.views import CircuitScheduleView
 
 
 class CircuitScheduleViewTest(APITestCase, CommonAsserts):
     def setUp(self):
+        # collaborated circuits are cached per user id, ids are reused between tests
+        cache.clear()
+
         self.user = create_user()
         self.circuit = create_circuit(name='c1')
         self.circuit.collaborators.add(self.user)
@@ -210,3 +217,101 @@ class CircuitScheduleViewTest(APITestCase, CommonAsserts):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertScheduleEqual(data, self.circuit.schedule.all())
+
+    def put_schedule(self, data):
+        request = self.factory.put(self.url, data=data, format='json')
+        force_authenticate(request, self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.view(request, circuit_id=self.circuit.pk)
+
+        writes = [q['sql'] for q in queries.captured_queries
+                  if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+                  and 'smartgarden_scheduledactivation' in q['sql']]
+
+        return response, writes
+
+    def test_put_unchanged(self):
+        s1 = create_scheduled_activation(self.circuit, time=datetime.time(8, 0), amount=100)
+        s2 = create_scheduled_activation(self.circuit, time=datetime.time(20, 0), amount=200)
+
+        data = [
+            {'active': True, 'amount': 200, 'time': '20:00:00'},
+            {'active': True, 'amount': 100, 'time': '08:00:00'},
+        ]
+
+        response, writes = self.put_schedule(data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual([], writes)
+        self.assertListEqual(data, response.data)
+        self.assertListEqual([s1.pk, s2.pk], list(self.circuit.schedule.order_by('pk').values_list('pk', flat=True)))
+
+    def test_put_single_change(self):
+        s1 = create_scheduled_activation(self.circuit, time=datetime.time(8, 0), amount=100)
+        create_scheduled_activation(self.circuit, time=datetime.time(20, 0), amount=200)
+        version = self.circuit.config_version
+
+        data = [
+            {'active': False, 'amount': 250, 'time': '21:00:00'},
+            {'active': True, 'amount': 100, 'time': '08:00:00'},
+        ]
+
+        response, writes = self.put_schedule(data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(1, len(writes))
+        self.assertListEqual(data, response.data)
+        self.assertEqual(2, self.circuit.schedule.count())
+        self.assertTrue(self.circuit.schedule.filter(pk=s1.pk).exists())
+
+        self.circuit.refresh_from_db()
+        self.assertGreater(self.circuit.config_version, version)
+
+    def test_put_grow_and_shrink(self):
+        create_scheduled_activation(self.circuit, time=datetime.time(8, 0), amount=100)
+
+        data = [
+            {'active': True, 'amount': 100, 'time': '08:00:00'},
+            {'active': True, 'amount': 100, 'time': '08:00:00'},
+            {'active': True, 'amount': 300, 'time': '12:00:00'},
+        ]
+
+        response, writes = self.put_schedule(data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(1, len(writes))
+        self.assertEqual(3, self.circuit.schedule.count())
+
+        response, writes = self.put_schedule(data[1:2])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(1, len(writes))
+        self.assertListEqual(data[1:2], response.data)
+
+    def test_replace_schedule_shrink(self):
+        for hour in range(20):
+            create_scheduled_activation(self.circuit, time=datetime.time(hour, 0), amount=100)
+        self.circuit.refresh_from_db()
+        version = self.circuit.config_version
+
+        # lock, delete, version bump and the collaborators whose lists change
+        with self.assertNumQueries(4):
+            replace_schedule(self.circuit.pk, [{'active': True, 'amount': 100, 'time': datetime.time(0, 0)}])
+
+        self.circuit.refresh_from_db()
+        self.assertEqual(version + 1, self.circuit.config_version)
+        self.assertEqual(1, self.circuit.schedule.count())
+
+    def test_replace_schedule_clear(self):
+        for hour in range(20):
+            create_scheduled_activation(self.circuit, time=datetime.time(hour, 0), amount=100)
+        self.circuit.refresh_from_db()
+        version = self.circuit.config_version
+
+        with self.assertNumQueries(4):
+            replace_schedule(self.circuit.pk, [])
+
+        self.circuit.refresh_from_db()
+        self.assertEqual(version + 1, self.circuit.config_version)
+        self.assertFalse(self.circuit.schedule.exists())
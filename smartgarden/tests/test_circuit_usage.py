@@ -0,0 +1,132 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+import pytz
+from django.core.management import call_command
+from django.db.models import QuerySet
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
+
+from smartgarden.commons.asserts import CommonAsserts
+from smartgarden.commons.fixtures import create_user, create_circuit, create_activation
+from smartgarden.ingest import insert_activation_logs
+from smartgarden.models import ActivationLog, Circuit, HourlyActivationRollup, DailyActivationRollup
+from smartgarden.rollups import refresh_rollups
+from smartgarden.views import CircuitUsageView
+
+
+class CircuitUsageViewTest(APITestCase, CommonAsserts):
+    def setUp(self):
+        self.user = create_user()
+        self.circuit = create_circuit(name='c1')
+        self.circuit.collaborators.add(self.user)
+
+        self.view = CircuitUsageView.as_view()
+        self.factory = APIRequestFactory()
+        self.url = reverse('circuit-usage', kwargs={'circuit_id': self.circuit.pk})
+
+        self.day = datetime.datetime(2021, 6, 1, tzinfo=pytz.UTC)
+        self.amounts = {
+            self.day + datetime.timedelta(hours=1, minutes=5): 100,
+            self.day + datetime.timedelta(hours=1, minutes=35): 50,
+            self.day + datetime.timedelta(hours=7): 200,
+            self.day + datetime.timedelta(days=1, hours=3): 10,
+        }
+
+    def ingest(self):
+        insert_activation_logs([
+            ActivationLog(circuit_id=self.circuit.pk, timestamp=timestamp, amount=amount)
+            for timestamp, amount in self.amounts.items()
+        ])
+
+    def fetch(self, **params):
+        request = self.factory.get(self.url, data=params, format='json')
+        force_authenticate(request, self.user)
+
+        return self.view(request, circuit_id=self.circuit.pk)
+
+    def test_rollups_maintained_on_ingest(self):
+        self.ingest()
+        self.ingest()
+
+        hourly = self.circuit.hourly_rollups.order_by('bucket')
+        daily = self.circuit.daily_rollups.order_by('bucket')
+
+        self.assertListEqual([(2, 150, 50, 100), (1, 200, 200, 200), (1, 10, 10, 10)],
+                             [(r.count, r.total, r.min_amount, r.max_amount) for r in hourly])
+        self.assertListEqual([(3, 350, 50, 200), (1, 10, 10, 10)],
+                             [(r.count, r.total, r.min_amount, r.max_amount) for r in daily])
+
+    def test_refresh_locks_circuit(self):
+        self.ingest()
+
+        with mock.patch.object(QuerySet, 'select_for_update', autospec=True,
+                               side_effect=QuerySet.select_for_update) as select_for_update:
+            refresh_rollups(self.circuit.pk, self.amounts)
+
+        self.assertIn(Circuit, [call.args[0].model for call in select_for_update.call_args_list])
+        self.assertListEqual([(2, 150, 50, 100), (1, 200, 200, 200), (1, 10, 10, 10)],
+                             [(r.count, r.total, r.min_amount, r.max_amount)
+                              for r in self.circuit.hourly_rollups.order_by('bucket')])
+
+    def test_fetch_daily(self):
+        self.ingest()
+
+        response = self.fetch(start='2021-06-01T00:00:00Z', end='2021-06-03T00:00:00Z')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(4, response.data['count'])
+        self.assertEqual(360, response.data['total'])
+        self.assertEqual(10, response.data['min_amount'])
+        self.assertEqual(200, response.data['max_amount'])
+        self.assertListEqual(['2021-06-01', '2021-06-02'], [b['bucket'] for b in response.data['buckets']])
+
+    def test_fetch_hourly(self):
+        self.ingest()
+
+        with self.assertNumQueries(1):
+            response = self.fetch(start='2021-06-01T01:00:00Z', end='2021-06-01T07:00:00Z', resolution='hour')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(2, response.data['count'])
+        self.assertEqual(150, response.data['total'])
+        self.assertListEqual(['2021-06-01T01:00:00'], [b['bucket'] for b in response.data['buckets']])
+
+    def test_fetch_invalid_range(self):
+        response = self.fetch(start='2021-06-03T00:00:00Z', end='2021-06-01T00:00:00Z')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_fetch_circuit_not_related(self):
+        self.ingest()
+        self.circuit.collaborators.remove(self.user)
+
+        response = self.fetch(start='2021-06-01T00:00:00Z', end='2021-06-03T00:00:00Z')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(0, response.data['count'])
+        self.assertListEqual([], response.data['buckets'])
+
+    def test_fetch_unauthenticated(self):
+        request = self.factory.get(self.url, format='json')
+        response = self.view(request, circuit_id=self.circuit.pk)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_backfill(self):
+        self.ingest()
+        expected_hourly = list(HourlyActivationRollup.objects.order_by('bucket').values_list('bucket', 'total'))
+        expected_daily = list(DailyActivationRollup.objects.order_by('bucket').values_list('bucket', 'total'))
+
+        HourlyActivationRollup.objects.all().delete()
+        create_activation(create_circuit(name='c2'), amount=30)
+
+        call_command('backfillrollups', workers=1, chunk_size=1, stdout=StringIO())
+
+        self.assertListEqual(expected_hourly, list(self.circuit.hourly_rollups.order_by('bucket')
+                                                   .values_list('bucket', 'total')))
+        self.assertListEqual(expected_daily, list(self.circuit.daily_rollups.order_by('bucket')
+                                                  .values_list('bucket', 'total')))
+        self.assertEqual(4, HourlyActivationRollup.objects.count())
@@ -1,18 +1,29 @@
 import datetime
+from unittest import mock
 
 import pytz
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
 
+from smartgarden.caches import circuit_list_key, set_circuit_list
 from smartgarden.commons.asserts import CommonAsserts
 from smartgarden.commons.fixtures import create_user, create_circuit, create_scheduled_one_time_activation, \
-    create_scheduled_activation
+    create_scheduled_activation, create_circuits
+from smartgarden.models import Circuit, CircuitCollaboration
+from smartgarden.serializers import CircuitSerializer
 from smartgarden.views import CircuitViewSet
 
 
 class CircuitViewSetTest(APITestCase, CommonAsserts):
     def setUp(self):
+        cache.clear()
+        # the lists are only cached with a cache shared by all workers
+        patcher = mock.patch('smartgarden.caches.is_shared', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
         self.user = create_user()
         self.view = CircuitViewSet.as_view(actions={
             'get': 'list'
@@ -117,3 +128,127 @@ class CircuitViewSetTest(APITestCase, CommonAsserts):
 
         self.assertCircuitEqual(response.data[0], c1)
         self.assertCircuitEqual(response.data[1], c2)
+
+    def test_fetch_many_circuits_query_count(self):
+        for count in [1, 100, 1000]:
+            with self.subTest(count=count):
+                create_circuits(count, collaborator=self.user)
+                # bulk inserts bypass the signals invalidating the cached list
+                cache.clear()
+
+                request = self.factory.get(self.url, format='json')
+                force_authenticate(request, self.user)
+
+                # circuits, today's one-time activations, schedules
+                with self.assertNumQueries(3):
+                    response = self.view(request)
+                    response.render()
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(Circuit.objects.filter(collaborators__pk=self.user.pk).count(), len(response.data))
+                self.assertIsNotNone(response.data[-1].get('one_time_activation'))
+                self.assertEqual(1, len(response.data[-1].get('schedule')))
+
+    def test_fetch_many_circuits_paginated(self):
+        circuits = create_circuits(25, collaborator=self.user)
+
+        url = f'{self.url}?page_size=10'
+        ids = []
+
+        while url:
+            request = self.factory.get(url, format='json')
+            force_authenticate(request, self.user)
+
+            with self.assertNumQueries(3):
+                response = self.view(request)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 10)
+
+            ids += [c['id'] for c in response.data['results']]
+            url = response.data['next']
+
+        self.assertListEqual([c.pk for c in circuits], ids)
+
+    def test_fetch_many_circuits_cached(self):
+        c1 = create_circuit(name='c1')
+        c1.collaborators.add(self.user)
+
+        self.assertEqual(1, len(self.fetch()))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(1, len(self.fetch()))
+
+    def test_fetch_many_circuits_per_process_cache_not_used(self):
+        c1 = create_circuit(name='c1')
+        c1.collaborators.add(self.user)
+
+        with mock.patch('smartgarden.caches.is_shared', return_value=False):
+            self.assertEqual(1, len(self.fetch()))
+            c1.collaborators.remove(self.user)
+            # the list this worker cached before, the version bump was made in another worker's memory
+            set_circuit_list(circuit_list_key(self.user.pk, ''), [{'id': c1.pk}])
+
+            self.assertEqual(0, len(self.fetch()))
+
+    def test_fetch_many_circuits_cache_invalidated(self):
+        c1 = create_circuit(name='c1')
+        c1.collaborators.add(self.user)
+        c2 = create_circuit(name='c2')
+        self.fetch()
+
+        changes = [
+            lambda: c2.collaborators.add(self.user),
+            lambda: create_scheduled_activation(c1, time=datetime.time(8, 0)),
+            lambda: create_scheduled_one_time_activation(c1),
+            lambda: c1.schedule.first().delete(),
+            lambda: setattr(c1, 'name', 'c1-renamed') or c1.save(),
+            lambda: self.user.related_circuits.remove(c2),
+            lambda: CircuitCollaboration.objects.create(circuit=c2, user=self.user),
+            lambda: CircuitCollaboration.objects.filter(circuit=c2).first().delete(),
+            lambda: c1.delete(),
+        ]
+
+        for change in changes:
+            change()
+
+            request = self.factory.get(self.url, format='json')
+            force_authenticate(request, self.user)
+            response = self.view(request)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertListEqual([self.serialize(c) for c in Circuit.objects.filter(collaborators__pk=self.user.pk)
+                                 .with_related().order_by('pk')], response.data)
+
+    def test_fetch_many_circuits_cache_invalidated_on_commit(self):
+        c1 = create_circuit(name='c1')
+        c1.collaborators.add(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_scheduled_activation(c1, time=datetime.time(8, 0))
+            # a concurrent request still reading the data from before the commit caches it under the new version
+            key = circuit_list_key(self.user.pk, '')
+            set_circuit_list(key, [])
+
+        self.assertNotEqual(key, circuit_list_key(self.user.pk, ''))
+        self.assertEqual(1, len(self.fetch()))
+
+    def test_fetch_many_circuits_cache_per_user(self):
+        user2 = create_user(email='user2@test.com')
+        create_circuit(name='c1').collaborators.add(self.user)
+
+        self.assertEqual(1, len(self.fetch()))
+        self.assertEqual(0, len(self.fetch(user2)))
+
+    def fetch(self, user=None):
+        request = self.factory.get(self.url, format='json')
+        force_authenticate(request, user or self.user)
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return response.data
+
+    @staticmethod
+    def serialize(circuit):
+        return CircuitSerializer(circuit).data
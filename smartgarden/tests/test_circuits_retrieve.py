@@ -7,7 +7,7 @@ from rest_framework.test import APITestCase, APIRequestFactory, force_authentica
 
 from smartgarden.commons.asserts import CommonAsserts
 from smartgarden.commons.fixtures import create_user, create_circuit, create_scheduled_one_time_activation, \
-    create_scheduled_activation
+    create_scheduled_activation, create_circuits
 from smartgarden.views import CircuitViewSet
 
 
@@ -64,3 +64,19 @@ class CircuitViewSetRetrieveTest(APITestCase, CommonAsserts):
         response = self.view(request, pk=self.circuit_not_related.pk)
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_fetch_query_count(self):
+        for count in [1, 100, 1000]:
+            with self.subTest(count=count):
+                circuit = create_circuits(count, collaborator=self.user)[-1]
+
+                request = self.factory.get(self.url, format='json')
+                force_authenticate(request, self.user)
+
+                # circuit, today's one-time activations, schedule
+                with self.assertNumQueries(3):
+                    response = self.view(request, pk=circuit.pk)
+                    response.render()
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertCircuitEqual(response.data, circuit)
@@ -0,0 +1,134 @@
+import gzip
+import json
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase, APIClient
+
+from smartgarden import compression
+from smartgarden.commons.fixtures import create_user, create_circuit, create_circuits, create_activation, \
+    create_scheduled_activation
+
+
+class NegotiateTest(APITestCase):
+    def test_negotiate(self):
+        cases = [
+            ('', None),
+            ('identity', None),
+            ('gzip', 'gzip'),
+            ('deflate, gzip;q=0.5', 'gzip'),
+            ('gzip;q=0', None),
+            ('*', 'br'),
+            ('*;q=0.5, br;q=0', 'gzip'),
+            ('br;q=0.8, gzip', 'gzip'),
+            ('GZIP, BR', 'br'),
+            ('gzip;q=invalid', None),
+        ]
+
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(expected, compression.negotiate(header, [compression.BROTLI, compression.GZIP]))
+
+    def test_negotiate_without_brotli(self):
+        with mock.patch.object(compression, 'brotli', None):
+            self.assertEqual('gzip', compression.negotiate('br, gzip'))
+            self.assertIsNone(compression.negotiate('br'))
+
+    def test_compress_stream(self):
+        chunks = [f'{i},row\n'.encode() for i in range(1000)]
+
+        content = gzip.decompress(b''.join(compression.compress_stream(iter(chunks), compression.GZIP)))
+
+        self.assertEqual(b''.join(chunks), content)
+
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_brotli(self):
+        chunks = [f'{i},row\n'.encode() for i in range(1000)]
+
+        self.assertEqual('br', compression.negotiate('gzip, br'))
+        self.assertEqual(b''.join(chunks), compression.brotli.decompress(
+            compression.compress(b''.join(chunks), compression.BROTLI)))
+        self.assertEqual(b''.join(chunks), compression.brotli.decompress(
+            b''.join(compression.compress_stream(iter(chunks), compression.BROTLI))))
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_large_response_compressed(self):
+        create_circuits(20, collaborator=self.user)
+
+        response = self.client.get(reverse('circuit-list'), HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual('gzip', response['Content-Encoding'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(str(len(response.content)), response['Content-Length'])
+        self.assertEqual(20, len(json.loads(gzip.decompress(response.content))))
+
+    def test_not_accepted(self):
+        create_circuits(20, collaborator=self.user)
+
+        response = self.client.get(reverse('circuit-list'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(20, len(response.json()))
+
+    def test_small_response_not_compressed(self):
+        create_circuit(name='c1').collaborators.add(self.user)
+
+        response = self.client.get(reverse('circuit-list'), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(1, len(response.json()))
+
+    def test_other_content_types_not_compressed(self):
+        create_circuits(20, collaborator=self.user)
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('index'), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streamed_response_compressed(self):
+        circuit = create_circuit(name='c1')
+        circuit.collaborators.add(self.user)
+        for _ in range(10):
+            create_activation(circuit)
+
+        response = self.client.get(reverse('activation-log-export'), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual('gzip', response['Content-Encoding'])
+        self.assertFalse(response.has_header('Content-Length'))
+
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode('utf-8').splitlines()
+        self.assertEqual(11, len(lines))
+
+    @override_settings(COMPRESSION_MIN_SIZE=0)
+    def test_etag_weakened_and_matched(self):
+        controller = create_user(email='controller@test.com')
+        circuit = create_circuit(name='c1', controller=controller)
+        for _ in range(10):
+            create_scheduled_activation(circuit)
+        self.client.force_authenticate(controller)
+
+        response = self.client.get(reverse('mine-circuit'), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual('gzip', response['Content-Encoding'])
+        self.assertTrue(response['ETag'].startswith('W/"'))
+
+        response = self.client.get(reverse('mine-circuit'), HTTP_ACCEPT_ENCODING='gzip',
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -3,7 +3,9 @@ from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
 
 from smartgarden.commons.asserts import CommonAsserts
-from smartgarden.commons.fixtures import create_user, create_circuit
+from smartgarden.commons.fixtures import create_user, create_circuit, create_scheduled_activation, \
+    create_scheduled_one_time_activation
+from smartgarden.models import Circuit
 from smartgarden.views import ControlledCircuitView
 
 
@@ -49,3 +51,81 @@ class ControlledCircuitViewTest(APITestCase, CommonAsserts):
         response = self.view(request)
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_fetched_controlled_circuit_etag(self):
+        create_circuit(name='c1', controller=self.user)
+
+        request = self.factory.get(self.url, format='json')
+        force_authenticate(request, self.user)
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_fetched_controlled_circuit_not_modified(self):
+        create_circuit(name='c1', controller=self.user)
+        etag = self.fetch_etag()
+
+        request = self.factory.get(self.url, format='json', HTTP_IF_NONE_MATCH=etag)
+        force_authenticate(request, self.user)
+
+        with self.assertNumQueries(1):
+            response = self.view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertIsNone(response.data)
+
+    def test_fetched_controlled_circuit_modified(self):
+        circuit = create_circuit(name='c1', controller=self.user)
+
+        changes = [
+            lambda: create_scheduled_activation(circuit),
+            lambda: create_scheduled_one_time_activation(circuit),
+            lambda: circuit.schedule.first().delete(),
+            lambda: circuit.one_time_activations.first().delete(),
+            lambda: circuit.save(),
+        ]
+
+        for change in changes:
+            etag = self.fetch_etag()
+            change()
+
+            request = self.factory.get(self.url, format='json', HTTP_IF_NONE_MATCH=etag)
+            force_authenticate(request, self.user)
+            response = self.view(request)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response['ETag'], etag)
+
+    def test_fetched_controlled_circuit_modified_by_stale_instance(self):
+        circuit = create_circuit(name='c1', controller=self.user)
+        create_scheduled_activation(circuit)
+        etag = self.fetch_etag()
+        versions = [Circuit.objects.get(pk=circuit.pk).config_version]
+
+        # the instance still holds the version from before the schedule change
+        for name in ['c2', 'c3']:
+            circuit.name = name
+            circuit.save()
+            versions.append(Circuit.objects.get(pk=circuit.pk).config_version)
+
+            self.assertNotEqual(self.fetch_etag(), etag)
+            etag = self.fetch_etag()
+
+        self.assertEqual(versions, sorted(set(versions)))
+        self.assertEqual(versions[-1], circuit.config_version)
+
+    def test_fetched_controlled_circuit_health_check_keeps_etag(self):
+        circuit = create_circuit(name='c1', controller=self.user)
+        etag = self.fetch_etag()
+
+        circuit.save(update_fields=['health_check'])
+
+        self.assertEqual(self.fetch_etag(), etag)
+
+    def fetch_etag(self) -> str:
+        request = self.factory.get(self.url, format='json')
+        force_authenticate(request, self.user)
+
+        return self.view(request)['ETag']
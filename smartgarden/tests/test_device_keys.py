@@ -0,0 +1,113 @@
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from smartgarden.authentication import CIRCUIT_ID_CLAIM
+from smartgarden.commons.fixtures import create_user, create_circuit
+from smartgarden.device_keys import issue_device_key, verify_device_key
+from smartgarden.models import User, DeviceKey
+from smartgarden.views import ControlledCircuitView
+
+
+class DeviceKeyTest(APITestCase):
+    def setUp(self):
+        self.device = create_user(email='device@test.com', user_type=User.UserType.DEVICE.value)
+        self.circuit = create_circuit(name='c1', controller=self.device)
+        self.factory = APIRequestFactory()
+
+    def test_verify(self):
+        key = issue_device_key(self.device)
+
+        self.assertEqual(verify_device_key(key).user, self.device)
+        self.assertNotIn(key.split('.')[1], DeviceKey.objects.get(user=self.device).digest)
+
+    def test_verify_invalid(self):
+        key = issue_device_key(self.device)
+        key_id, secret = key.split('.')
+
+        self.assertIsNone(verify_device_key(f'{key_id}.{secret[:-1]}'))
+        self.assertIsNone(verify_device_key(f'{key_id[:-1]}.{secret}'))
+        self.assertIsNone(verify_device_key(key_id))
+
+    def test_reissue_revokes_previous_key(self):
+        key = issue_device_key(self.device)
+        issue_device_key(self.device)
+
+        self.assertIsNone(verify_device_key(key))
+        self.assertEqual(1, DeviceKey.objects.filter(user=self.device).count())
+
+    def test_fetch_controlled_circuit(self):
+        key = issue_device_key(self.device)
+
+        request = self.factory.get(reverse('mine-circuit'), HTTP_AUTHORIZATION=f'Device {key}')
+        response = ControlledCircuitView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.circuit.pk)
+
+    def test_fetch_controlled_circuit_invalid_key(self):
+        request = self.factory.get(reverse('mine-circuit'), HTTP_AUTHORIZATION='Device invalid.key')
+        response = ControlledCircuitView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_key_of_not_device_user_rejected(self):
+        self.device.user_type = User.UserType.USER.value
+        self.device.save()
+        key = issue_device_key(self.device)
+
+        request = self.factory.get(reverse('mine-circuit'), HTTP_AUTHORIZATION=f'Device {key}')
+        response = ControlledCircuitView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_obtain_token(self):
+        key = issue_device_key(self.device)
+
+        response = self.client.post(reverse('device_token_obtain'), HTTP_AUTHORIZATION=f'Device {key}')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccessToken(response.data['access'])[CIRCUIT_ID_CLAIM], self.circuit.pk)
+        self.assertIn('refresh', response.data)
+
+    def test_obtain_token_invalid_key(self):
+        response = self.client.post(reverse('device_token_obtain'), HTTP_AUTHORIZATION='Device invalid.key')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class IssueDeviceKeyCommandTest(APITestCase):
+    def issue(self, *args):
+        out = StringIO()
+        call_command('issuedevicekey', *args, stdout=out)
+
+        return out.getvalue().strip()
+
+    def test_issue(self):
+        device = create_user(email='device@test.com', user_type=User.UserType.DEVICE.value)
+
+        key = self.issue('device@test.com')
+
+        self.assertEqual(verify_device_key(key).user, device)
+
+    def test_issue_create(self):
+        key = self.issue('device@test.com', '--create')
+
+        device = User.objects.get(email='device@test.com')
+        self.assertEqual(verify_device_key(key).user, device)
+        self.assertEqual(User.UserType.DEVICE.value, device.user_type)
+        self.assertFalse(device.has_usable_password())
+
+    def test_issue_unknown_user(self):
+        with self.assertRaises(CommandError):
+            self.issue('device@test.com')
+
+    def test_issue_not_device(self):
+        create_user(email='user@test.com')
+
+        with self.assertRaises(CommandError):
+            self.issue('user@test.com')
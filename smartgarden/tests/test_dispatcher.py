@@ -0,0 +1,74 @@
+import datetime
+
+import pytz
+from django.test import TestCase
+
+from smartgarden.commons.fixtures import create_circuit, create_scheduled_activation, \
+    create_scheduled_one_time_activation
+from smartgarden.dispatcher import Dispatcher, InMemoryBackend
+from smartgarden.due_activations import refresh_due_activations
+from smartgarden.models import DueActivation
+
+
+class DispatcherTest(TestCase):
+    def setUp(self):
+        self.midnight = datetime.datetime.now(tz=pytz.UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        self.c1 = create_circuit(name='c1')
+        self.c2 = create_circuit(name='c2')
+
+        create_scheduled_activation(self.c1, time=datetime.time(6, 0), amount=100)
+        create_scheduled_activation(self.c2, time=datetime.time(6, 0), amount=200)
+        create_scheduled_activation(self.c2, time=datetime.time(7, 0), amount=300)
+        create_scheduled_one_time_activation(self.c1, timestamp=self.midnight + datetime.timedelta(hours=6, minutes=30))
+        refresh_due_activations([self.c1.pk, self.c2.pk])
+
+        self.backend = InMemoryBackend()
+        self.dispatcher = Dispatcher(self.backend, window=datetime.timedelta(hours=2),
+                                     reload_interval=datetime.timedelta(hours=1))
+
+    def at(self, hours, minutes=0):
+        return self.midnight + datetime.timedelta(hours=hours, minutes=minutes)
+
+    def test_nothing_due(self):
+        self.assertListEqual([], self.dispatcher.run_pending(self.at(5)))
+        self.assertListEqual([], self.backend.batches)
+        self.assertEqual(self.at(6), self.dispatcher.next_wakeup())
+
+    def test_batches_per_tick(self):
+        self.dispatcher.run_pending(self.at(5, 59))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.at(6), self.dispatcher.next_wakeup())
+            batch = self.dispatcher.run_pending(self.at(6))
+
+        self.assertListEqual([(self.c1.pk, 100), (self.c2.pk, 200)], [(d.circuit_id, d.amount) for d in batch])
+        self.assertListEqual([batch], self.backend.batches)
+        self.assertEqual(self.at(6, 30), self.dispatcher.next_wakeup())
+
+        batch = self.dispatcher.run_pending(self.at(6, 30))
+
+        self.assertListEqual([(self.c1.pk, 100, DueActivation.Kind.ONE_TIME.value)],
+                             [(d.circuit_id, d.amount, d.kind) for d in batch])
+
+    def test_delivered_once_across_reloads(self):
+        self.dispatcher.run_pending(self.at(6))
+        self.dispatcher.reload(self.at(6))
+        self.dispatcher.run_pending(self.at(6))
+
+        self.assertEqual(1, len(self.backend.batches))
+
+    def test_grace(self):
+        self.assertEqual(2, len(self.dispatcher.run_pending(self.at(6) + datetime.timedelta(seconds=30))))
+        self.assertListEqual([], Dispatcher(InMemoryBackend()).run_pending(self.at(6, 5)))
+
+    def test_picks_up_schedule_changes(self):
+        self.dispatcher.run_pending(self.at(5))
+
+        create_scheduled_activation(self.c1, time=datetime.time(5, 30), amount=50)
+        refresh_due_activations([self.c1.pk])
+
+        self.assertListEqual([], self.dispatcher.run_pending(self.at(5, 30)))
+        self.dispatcher.reload(self.at(5, 30))
+
+        self.assertListEqual([50], [d.amount for d in self.dispatcher.run_pending(self.at(5, 30))])
@@ -0,0 +1,134 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+import pytz
+from django.core.management import call_command
+from django.db import DatabaseError, transaction
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
+
+from smartgarden.commons.asserts import CommonAsserts
+from smartgarden.commons.fixtures import create_user, create_circuit, create_scheduled_activation, \
+    create_scheduled_one_time_activation
+from smartgarden.due_activations import due_between, refresh_due_activations
+from smartgarden.models import User, DueActivation
+from smartgarden.views import DueActivationsView
+
+
+class DueActivationsViewTest(APITestCase, CommonAsserts):
+    def setUp(self):
+        self.user = create_user()
+        self.admin = create_user(email='admin@test.com', user_type=User.UserType.ADMIN.value)
+
+        self.view = DueActivationsView.as_view()
+        self.factory = APIRequestFactory()
+        self.url = reverse('due-activations')
+
+        self.midnight = datetime.datetime.now(tz=pytz.UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def test_refreshed_on_schedule_change(self):
+        circuit = create_circuit(name='c1')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_scheduled_activation(circuit, time=datetime.time(6, 0), amount=100)
+            create_scheduled_activation(circuit, time=datetime.time(7, 0), amount=200, active=False)
+            create_scheduled_one_time_activation(circuit, timestamp=self.midnight + datetime.timedelta(hours=9))
+
+        due = [(d.due_at, d.amount, d.kind) for d in circuit.due_activations.order_by('due_at')]
+
+        self.assertListEqual([
+            (self.midnight + datetime.timedelta(hours=6), 100, DueActivation.Kind.SCHEDULED.value),
+            (self.midnight + datetime.timedelta(hours=9), 100, DueActivation.Kind.ONE_TIME.value),
+            (self.midnight + datetime.timedelta(days=1, hours=6), 100, DueActivation.Kind.SCHEDULED.value),
+        ], due)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            circuit.active = False
+            circuit.save()
+
+        self.assertEqual(0, circuit.due_activations.count())
+
+    def test_refreshed_once_per_transaction(self):
+        c1 = create_circuit(name='c1')
+        c2 = create_circuit(name='c2')
+
+        with mock.patch('smartgarden.signals.refresh_due_activations') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                for hour in range(5):
+                    create_scheduled_activation(c1, time=datetime.time(hour, 0))
+                create_scheduled_activation(c2, time=datetime.time(6, 0))
+                circuit_ids = [c1.pk, c2.pk]
+                c1.delete()
+
+        refresh.assert_called_once_with(circuit_ids)
+
+    def test_refresh_rolled_back_with_savepoint(self):
+        circuit = create_circuit(name='c1')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    create_scheduled_activation(circuit, time=datetime.time(6, 0))
+                    raise DatabaseError()
+            except DatabaseError:
+                pass
+
+            create_scheduled_activation(circuit, time=datetime.time(7, 0))
+
+        self.assertListEqual([self.midnight + datetime.timedelta(hours=7)],
+                             [d.due_at for d in circuit.due_activations.filter(due_at__lt=self.midnight
+                                                                               + datetime.timedelta(days=1))])
+
+    def test_due_between(self):
+        c1 = create_circuit(name='c1')
+        c2 = create_circuit(name='c2')
+
+        create_scheduled_activation(c1, time=datetime.time(6, 0))
+        create_scheduled_activation(c2, time=datetime.time(6, 10))
+        create_scheduled_activation(c2, time=datetime.time(8, 0))
+        refresh_due_activations([c1.pk, c2.pk])
+
+        start = self.midnight + datetime.timedelta(hours=6)
+
+        with self.assertNumQueries(1):
+            due = list(due_between(start, start + datetime.timedelta(minutes=15)))
+
+        self.assertListEqual([c1.pk, c2.pk], [d.circuit_id for d in due])
+
+    def test_rollover(self):
+        circuit = create_circuit(name='c1')
+        create_scheduled_activation(circuit, time=datetime.time(6, 0))
+        refresh_due_activations([circuit.pk], today=(self.midnight - datetime.timedelta(days=5)).date())
+
+        call_command('refreshdueactivations', stdout=StringIO())
+
+        self.assertListEqual([self.midnight + datetime.timedelta(hours=6),
+                              self.midnight + datetime.timedelta(days=1, hours=6)],
+                             [d.due_at for d in circuit.due_activations.order_by('due_at')])
+
+    def test_fetch(self):
+        circuit = create_circuit(name='c1')
+        create_scheduled_activation(circuit, time=datetime.time(6, 0), amount=150)
+        refresh_due_activations([circuit.pk])
+
+        start = self.midnight + datetime.timedelta(hours=5, minutes=50)
+        request = self.factory.get(self.url, data={'start': start.isoformat(), 'minutes': 30}, format='json')
+        force_authenticate(request, self.admin)
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual([{
+            'circuit_id': circuit.pk,
+            'due_at': (self.midnight + datetime.timedelta(hours=6)).strftime('%Y-%m-%dT%H:%M:%S'),
+            'amount': 150,
+            'kind': DueActivation.Kind.SCHEDULED.value
+        }], response.data)
+
+    def test_fetch_not_admin(self):
+        request = self.factory.get(self.url, format='json')
+        force_authenticate(request, self.user)
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
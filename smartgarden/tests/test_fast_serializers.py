@@ -0,0 +1,105 @@
+import datetime
+import json
+
+import pytz
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from smartgarden.commons.fixtures import create_user, create_circuit, create_scheduled_activation, \
+    create_scheduled_one_time_activation, create_circuits
+from smartgarden.fast_serializers import CIRCUIT_FIELDS, serialize_circuits, serialize_circuit, format_datetime
+from smartgarden.models import Circuit
+from smartgarden.serializers import CircuitSerializer
+
+
+class FastSerializersTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.user = create_user()
+        self.now = datetime.datetime.now(tz=pytz.UTC)
+
+        self.healthy = create_circuit(name='healthy', controller=self.user)
+        self.unhealthy = create_circuit(name='unhealthy', active=False,
+                                        health_check=self.now - datetime.timedelta(minutes=20))
+        self.unchecked = create_circuit(name='unchecked ąę "quoted"', health_check=None)
+
+        create_scheduled_activation(self.healthy, time=datetime.time(0, 0))
+        create_scheduled_activation(self.healthy, active=False, amount=250, time=datetime.time(23, 59, 59, 999999))
+        create_scheduled_activation(self.healthy, time=datetime.time(7, 30, 15, 500))
+        create_scheduled_activation(self.unhealthy, time=datetime.time(12, 0))
+
+        today = datetime.datetime.combine(self.now.date(), datetime.time(), tzinfo=pytz.UTC)
+        create_scheduled_one_time_activation(self.healthy, amount=10, timestamp=today + datetime.timedelta(hours=1))
+        create_scheduled_one_time_activation(self.healthy, amount=20,
+                                             timestamp=today + datetime.timedelta(hours=2, microseconds=5))
+        create_scheduled_one_time_activation(self.unhealthy, amount=30, timestamp=today - datetime.timedelta(hours=1))
+
+        for circuit in [self.healthy, self.unhealthy, self.unchecked]:
+            circuit.collaborators.add(self.user)
+
+    def expected(self):
+        return json.loads(json.dumps(CircuitSerializer(Circuit.objects.with_related().order_by('pk'), many=True).data))
+
+    def test_same_data_as_circuit_serializer(self):
+        data = serialize_circuits(list(Circuit.objects.order_by('pk').values(*CIRCUIT_FIELDS)))
+
+        self.assertListEqual(self.expected(), data)
+        self.assertEqual(20, data[0]['one_time_activation']['amount'])
+        self.assertIsNone(data[1]['one_time_activation'])
+        self.assertListEqual([], data[2]['schedule'])
+
+    def test_same_fields_as_circuit_serializer(self):
+        circuit = serialize_circuit(Circuit.objects.values(*CIRCUIT_FIELDS).get(pk=self.healthy.pk))
+
+        self.assertListEqual(CircuitSerializer.Meta.fields, list(circuit))
+
+    def test_no_rows(self):
+        with self.assertNumQueries(0):
+            self.assertListEqual([], serialize_circuits([]))
+
+    def test_many_circuits_query_count(self):
+        create_circuits(100, collaborator=self.user)
+        rows = list(Circuit.objects.values(*CIRCUIT_FIELDS))
+
+        # schedules, today's one-time activations
+        with self.assertNumQueries(2):
+            serialize_circuits(rows)
+
+    def test_format_datetime(self):
+        for value in [datetime.datetime(2021, 5, 1, 7, 8, 9, 123456, tzinfo=pytz.UTC),
+                      datetime.datetime(999, 1, 2, 3, 4, 5, tzinfo=pytz.UTC),
+                      pytz.timezone('Europe/Warsaw').localize(datetime.datetime(2021, 5, 1, 0, 30))]:
+            with self.subTest(value=value):
+                self.assertEqual(value.astimezone(pytz.UTC).strftime('%Y-%m-%dT%H:%M:%S'),
+                                 format_datetime(value, pytz.UTC))
+
+    def test_circuit_list_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get(reverse('circuit-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(sorted(self.expected(), key=lambda c: c['id']),
+                             sorted(response.json(), key=lambda c: c['id']))
+
+    def test_circuit_list_endpoint_paginated(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get(reverse('circuit-list'), {'page_size': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(self.expected()[:2], response.json()['results'])
+
+    def test_controlled_circuit_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get(reverse('mine-circuit'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertDictEqual(self.expected()[0], response.json())
@@ -0,0 +1,101 @@
+import argparse
+import datetime
+from io import StringIO
+
+import pytz
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+
+from smartgarden.management.commands.preparetestdata import utc_timestamp
+from smartgarden.fleet import FleetSpec, generate_fleet
+from smartgarden.models import User, Circuit, CircuitCollaboration, ScheduledActivation, ActivationLog, \
+    HourlyActivationRollup, DueActivation
+
+NOW = datetime.datetime(2021, 6, 1, 12, 30, tzinfo=pytz.UTC)
+
+
+def snapshot():
+    return {
+        'circuits': list(Circuit.objects.order_by('name').values_list('name', 'active', 'health_check',
+                                                                      'controller__email')),
+        'collaborations': sorted(CircuitCollaboration.objects.values_list('circuit__name', 'user__email')),
+        'schedule': sorted(ScheduledActivation.objects.values_list('circuit__name', 'active', 'amount', 'time')),
+        'activation_log': sorted(ActivationLog.objects.values_list('circuit__name', 'amount', 'timestamp')),
+    }
+
+
+class GenerateFleetTest(APITestCase):
+    def test_generate(self):
+        spec = FleetSpec(users=5, circuits=7, schedules=4, days=3, seed=1, now=NOW)
+
+        result = generate_fleet(spec, chunk_size=3, batch_size=10)
+
+        self.assertEqual(5, User.objects.filter(user_type=User.UserType.USER.value).count())
+        self.assertEqual(7, User.objects.filter(user_type=User.UserType.DEVICE.value).count())
+        self.assertEqual(7, Circuit.objects.filter(controller__isnull=False).count())
+        self.assertEqual(28, ScheduledActivation.objects.count())
+        self.assertEqual(result.activation_logs, ActivationLog.objects.count())
+        self.assertGreater(result.activation_logs, 0)
+        self.assertFalse(ActivationLog.objects.filter(timestamp__gte=NOW).exists())
+        self.assertFalse(ActivationLog.objects.filter(timestamp__lt=NOW - datetime.timedelta(days=4)).exists())
+        self.assertTrue(HourlyActivationRollup.objects.exists())
+        self.assertTrue(DueActivation.objects.exists())
+
+        for circuit in Circuit.objects.all():
+            self.assertTrue(1 <= circuit.collaborators.count() <= 3)
+
+    def test_generate_reproducible(self):
+        spec = FleetSpec(users=3, circuits=5, schedules=3, days=2, seed=7, now=NOW)
+
+        generate_fleet(spec, chunk_size=2, derived=False)
+        first = snapshot()
+
+        User.objects.all().delete()
+        Circuit.objects.all().delete()
+
+        generate_fleet(spec, chunk_size=5, derived=False)
+
+        self.assertDictEqual(first, snapshot())
+
+    def test_generate_seed(self):
+        generate_fleet(FleetSpec(users=3, circuits=5, seed=1, now=NOW), derived=False)
+        first = snapshot()
+
+        User.objects.all().delete()
+        Circuit.objects.all().delete()
+
+        generate_fleet(FleetSpec(users=3, circuits=5, seed=2, now=NOW), derived=False)
+
+        self.assertNotEqual(first, snapshot())
+
+
+class PrepareTestDataCommandTest(APITestCase):
+    def test_prepare(self):
+        out = StringIO()
+        call_command('preparetestdata', '--users', '2', '--circuits', '3', '--schedules', '2', '--days', '1',
+                     '--now', '2021-06-01T12:30:00', stdout=out)
+
+        self.assertIn('3 circuits', out.getvalue())
+        self.assertTrue(User.objects.filter(email='admin@test.com', user_type=User.UserType.ADMIN.value).exists())
+        self.assertEqual(3, Circuit.objects.count())
+        self.assertTrue(User.objects.get(email='user0@fleet.test').check_password('user'))
+
+    def test_now_parsed_as_utc(self):
+        for value in ['2021-06-01T12:30:00', '2021-06-01T12:30:00Z', '2021-06-01T14:30:00+02:00',
+                      '2021-06-01T01:30:00-11:00']:
+            with self.subTest(value=value):
+                now = utc_timestamp(value)
+
+                self.assertEqual(NOW, now)
+                self.assertEqual(pytz.UTC, now.tzinfo)
+
+        with self.assertRaises(argparse.ArgumentTypeError):
+            utc_timestamp('2021-06-01 noon')
+
+    def test_prepare_now_with_offset(self):
+        call_command('preparetestdata', '--users', '1', '--circuits', '1', '--days', '0',
+                     '--now', '2021-06-02T01:30:00+02:00', stdout=StringIO())
+
+        # 2021-06-01T23:30:00Z, the history ends on the UTC date, not on the one of the offset
+        self.assertEqual({datetime.date(2021, 6, 1)},
+                         {t.date() for t in ActivationLog.objects.values_list('timestamp', flat=True)})
@@ -0,0 +1,69 @@
+import datetime
+
+import pytz
+from django.core.cache import cache
+from django.test import TestCase, RequestFactory
+from django.urls import reverse
+
+from smartgarden.commons.fixtures import create_circuit, create_circuits, create_scheduled_activation
+from smartgarden.views import index, CIRCUITS_PER_PAGE
+
+
+class IndexViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.factory = RequestFactory()
+        self.url = reverse('index')
+
+    def fetch(self, **params):
+        response = index(self.factory.get(self.url, data=params))
+
+        self.assertEqual(response.status_code, 200)
+
+        return response.content.decode('utf-8')
+
+    def test_fetch(self):
+        circuit = create_circuit(name='c1')
+        create_scheduled_activation(circuit, time=datetime.time(20, 0), amount=300)
+        create_scheduled_activation(circuit, time=datetime.time(8, 0), amount=150)
+
+        content = self.fetch()
+
+        self.assertIn('c1', content)
+        self.assertLess(content.index('08:00'), content.index('20:00'))
+        self.assertIn('150 ml', content)
+
+    def test_fetch_empty(self):
+        self.assertIn('circuits no available', self.fetch())
+
+    def test_fetch_query_count(self):
+        for count in [10, 100, 1000]:
+            with self.subTest(count=count):
+                create_circuits(count)
+                cache.clear()
+
+                # page count, page, circuits with cards to render, today's one-time activations, schedules
+                with self.assertNumQueries(5):
+                    self.fetch()
+
+                # page count, page
+                with self.assertNumQueries(2):
+                    self.fetch()
+
+    def test_fetch_pages(self):
+        create_circuits(CIRCUITS_PER_PAGE + 1)
+
+        self.assertEqual(CIRCUITS_PER_PAGE, self.fetch().count('circuit-card'))
+        self.assertEqual(1, self.fetch(page=2).count('circuit-card'))
+
+    def test_card_rendered_again_on_change(self):
+        circuit = create_circuit(name='c1', health_check=datetime.datetime.now(tz=pytz.UTC))
+        self.assertNotIn('21:00', self.fetch())
+
+        create_scheduled_activation(circuit, time=datetime.time(21, 0))
+        self.assertIn('21:00', self.fetch())
+
+        circuit.health_check = datetime.datetime.now(tz=pytz.UTC) - datetime.timedelta(days=1)
+        circuit.save(update_fields=['health_check'])
+        self.assertIn('circuit-status-unhealthy', self.fetch())
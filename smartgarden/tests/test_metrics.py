@@ -0,0 +1,122 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase, APIClient
+
+from smartgarden.commons.fixtures import create_user, create_circuit
+from smartgarden.metrics import metrics, render, Metrics
+from smartgarden.models import User
+
+
+class MetricsTest(APITestCase):
+    def setUp(self):
+        metrics.reset()
+
+        self.user = create_user()
+        self.admin = create_user(email='admin@test.com', user_type=User.UserType.ADMIN.value)
+        self.circuit = create_circuit(name='c1')
+        self.circuit.collaborators.add(self.user)
+
+        self.client = APIClient()
+
+    def scrape(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(reverse('metrics'))
+        self.client.force_authenticate(None)
+
+        return response
+
+    def test_request_recorded(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('circuit-schedule', kwargs={'circuit_id': self.circuit.pk}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        histograms = {(route, method, name): values for route, method, name, values in metrics.snapshot()['histograms']}
+        requests = {tuple(r[:3]): r[3] for r in metrics.snapshot()['requests']}
+
+        self.assertEqual(1, requests[('circuit-schedule', 'GET', '200')])
+        self.assertEqual(1, histograms[('circuit-schedule', 'GET', 'request_duration_seconds')][-1])
+        self.assertEqual(1, histograms[('circuit-schedule', 'GET', 'db_queries')][-2])
+        self.assertEqual(1, histograms[('circuit-schedule', 'GET', 'serialization_duration_seconds')][-1])
+        self.assertEqual(len(response.content), histograms[('circuit-schedule', 'GET', 'response_size_bytes')][-2])
+
+    def test_unmatched_route(self):
+        self.client.get('/api/does-not-exist')
+
+        self.assertIn(['unmatched', 'GET', '404', 1], metrics.snapshot()['requests'])
+
+    def test_streamed_response_recorded_once_sent(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('activation-log-export'))
+
+        self.assertFalse(any(r[0] == 'activation-log-export' for r in metrics.snapshot()['requests']))
+
+        content = b''.join(response.streaming_content)
+
+        histograms = {(route, name): values for route, _, name, values in metrics.snapshot()['histograms']}
+        self.assertEqual(len(content), histograms[('activation-log-export', 'response_size_bytes')][-2])
+        self.assertEqual(1, histograms[('activation-log-export', 'db_queries')][-2])
+
+    def test_scrape(self):
+        self.client.force_authenticate(self.user)
+        self.client.get(reverse('circuit-list'))
+
+        response = self.scrape()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+        text = response.content.decode()
+        self.assertIn('smartgarden_requests_total{route="circuit-list",method="GET",status="200"} 1', text)
+        self.assertIn('smartgarden_request_duration_seconds_count{route="circuit-list",method="GET"} 1', text)
+        self.assertIn('# TYPE smartgarden_db_queries histogram', text)
+
+    def test_scrape_not_admin(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_workers_merged(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        worker = {
+            'histograms': [['circuit-list', 'GET', 'db_queries', [0, 0, 0] + [1] * 8 + [3, 1]]],
+            'requests': [['circuit-list', 'GET', '200', 5]],
+        }
+        with open(os.path.join(directory, 'metrics-1.json'), 'w') as f:
+            json.dump(worker, f)
+
+        with override_settings(METRICS_DIR=directory):
+            metrics.observe('circuit-list', 'GET', 200, {'db_queries': 3})
+            text = render(metrics.collect())
+
+        self.assertIn('smartgarden_requests_total{route="circuit-list",method="GET",status="200"} 6', text)
+        self.assertIn('smartgarden_db_queries_sum{route="circuit-list",method="GET"} 6', text)
+        self.assertIn('smartgarden_db_queries_bucket{route="circuit-list",method="GET",le="3"} 2', text)
+
+    def test_dump(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        with override_settings(METRICS_DIR=directory, METRICS_SYNC_INTERVAL=0):
+            metrics.observe('circuit-list', 'GET', 200, {'db_queries': 3})
+
+        with open(os.path.join(directory, f'metrics-{os.getpid()}.json')) as f:
+            self.assertListEqual([['circuit-list', 'GET', '200', 1]], json.load(f)['requests'])
+
+    def test_forked_worker_starts_empty(self):
+        worker = Metrics()
+        worker.observe('circuit-list', 'GET', 200, {'db_queries': 3})
+
+        # as if inherited by a forked worker
+        worker._pid = -1
+
+        self.assertDictEqual({'histograms': [], 'requests': []}, worker.snapshot())
@@ -1,6 +1,9 @@
 import datetime
 
 import pytz
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
@@ -12,6 +15,9 @@ from smartgarden.views import CircuitOneTimeActivationView
 
 class CircuitOneTimeActivationViewTest(APITestCase, CommonAsserts):
     def setUp(self):
+        # collaborated circuits are cached per user id, ids are reused between tests
+        cache.clear()
+
         self.user = create_user()
         self.circuit = create_circuit(name='c1')
         self.circuit.collaborators.add(self.user)
@@ -87,6 +93,26 @@ class CircuitOneTimeActivationViewTest(APITestCase, CommonAsserts):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertOneTimeActivationsEqual(response.data, [s2])
 
+    def test_fetch_day_boundaries(self):
+        midnight = datetime.datetime.now(tz=pytz.UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        create_scheduled_one_time_activation(self.circuit, timestamp=midnight - datetime.timedelta(microseconds=1))
+        s2 = create_scheduled_one_time_activation(self.circuit, timestamp=midnight)
+        create_scheduled_one_time_activation(self.circuit, timestamp=midnight + datetime.timedelta(days=1))
+
+        request = self.factory.get(self.url, format='json')
+        force_authenticate(request, self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.view(request, circuit_id=self.circuit.pk)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertOneTimeActivationsEqual(response.data, [s2])
+        self.assertEqual(1, len(response.data))
+        # a range over the raw column, no per-row date cast
+        date_casts = ['django_datetime_cast_date', '::date', 'AT TIME ZONE']
+        self.assertFalse(any(c in q['sql'] for c in date_casts for q in queries.captured_queries))
+
     def test_post(self):
         today = datetime.datetime.now(tz=pytz.UTC)
 
@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from smartgarden.caches import collaborations_key
+from smartgarden.commons.fixtures import create_user, create_circuit
+from smartgarden.models import CircuitCollaboration
+from smartgarden.permissions import IsCircuitCollaboratorOnUnsafeOperations
+
+
+class IsCircuitCollaboratorOnUnsafeOperationsTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        # the cached sets are only used with a cache shared by all workers
+        patcher = mock.patch('smartgarden.caches.is_shared', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = create_user()
+        self.circuit = create_circuit(name='c1')
+        self.permission = IsCircuitCollaboratorOnUnsafeOperations()
+        self.factory = APIRequestFactory()
+
+    def has_permission(self, method='put', circuit_id=None):
+        request = getattr(self.factory, method)('/')
+        request.user = self.user
+        view = SimpleNamespace(circuit_id=circuit_id or self.circuit.pk)
+
+        return self.permission.has_permission(request, view)
+
+    def test_safe_method_takes_no_queries(self):
+        with self.assertNumQueries(0):
+            self.assertTrue(self.has_permission(method='get'))
+
+    def test_collaborator_warm_cache_takes_no_queries(self):
+        self.circuit.collaborators.add(self.user)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(self.has_permission())
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.has_permission())
+            self.assertFalse(self.has_permission(circuit_id=self.circuit.pk + 1))
+
+    def test_per_process_cache_not_used(self):
+        self.circuit.collaborators.add(self.user)
+
+        with mock.patch('smartgarden.caches.is_shared', return_value=False):
+            for _ in range(2):
+                with self.assertNumQueries(1):
+                    self.assertTrue(self.has_permission())
+
+            self.circuit.collaborators.remove(self.user)
+            # invalidations of another worker never reach this one
+            cache.set(collaborations_key(self.user.pk), frozenset([self.circuit.pk]))
+
+            self.assertFalse(self.has_permission())
+
+    def test_not_collaborator(self):
+        self.assertFalse(self.has_permission())
+
+    def test_collaborator_added(self):
+        self.assertFalse(self.has_permission())
+
+        self.circuit.collaborators.add(self.user)
+
+        self.assertTrue(self.has_permission())
+
+    def test_collaborator_removed(self):
+        self.circuit.collaborators.add(self.user)
+        self.assertTrue(self.has_permission())
+
+        self.circuit.collaborators.remove(self.user)
+
+        self.assertFalse(self.has_permission())
+
+    def test_collaboration_deleted(self):
+        CircuitCollaboration.objects.create(circuit=self.circuit, user=self.user)
+        self.assertTrue(self.has_permission())
+
+        CircuitCollaboration.objects.filter(circuit=self.circuit, user=self.user).delete()
+
+        self.assertFalse(self.has_permission())
+
+    def test_circuits_cleared(self):
+        self.circuit.collaborators.add(self.user)
+        self.assertTrue(self.has_permission())
+
+        self.circuit.collaborators.clear()
+
+        self.assertFalse(self.has_permission())
+
+    def test_circuit_deleted(self):
+        self.circuit.collaborators.add(self.user)
+        circuit_id = self.circuit.pk
+        self.assertTrue(self.has_permission())
+
+        self.circuit.delete()
+
+        self.assertFalse(self.has_permission(circuit_id=circuit_id))
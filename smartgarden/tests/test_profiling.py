@@ -0,0 +1,114 @@
+import os
+import pstats
+import shutil
+import tempfile
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from smartgarden.commons.fixtures import create_user, create_circuit
+from smartgarden.models import User
+from smartgarden.profiling import list_profiles
+
+
+class ProfilingTest(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(PROFILES_DIR=self.directory, PROFILES_MAX_COUNT=2)
+        self.settings.enable()
+
+        self.user = create_user()
+        self.admin = create_user(email='admin@test.com', username='admin', user_type=User.UserType.ADMIN.value)
+        self.circuit = create_circuit(name='c1')
+        self.circuit.collaborators.add(self.user)
+
+        self.client = APIClient()
+        self.url = reverse('circuit-schedule', kwargs={'circuit_id': self.circuit.pk})
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.directory)
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+    def test_staff_request_profiled(self):
+        self.authenticate(self.admin)
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        profiles = list_profiles()
+        self.assertEqual([p.name for p in profiles], [response['X-Profile']])
+        self.assertIn('circuit-schedule-GET-200', response['X-Profile'])
+
+        stats = pstats.Stats(os.path.join(self.directory, profiles[0].name))
+        self.assertTrue(stats.total_calls)
+
+    def test_query_parameter(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(self.url, {'profile': 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('X-Profile', response)
+
+    def test_not_requested(self):
+        self.authenticate(self.admin)
+        response = self.client.get(self.url)
+
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(list_profiles(), [])
+
+    def test_non_staff_not_profiled(self):
+        self.authenticate(self.user)
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(list_profiles(), [])
+
+    def test_anonymous_not_profiled(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer invalid')
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertNotIn('X-Profile', response)
+
+    def test_directory_bounded(self):
+        self.authenticate(self.admin)
+        names = [self.client.get(self.url, HTTP_X_PROFILE='1')['X-Profile'] for _ in range(3)]
+
+        self.assertEqual({p.name for p in list_profiles()}, set(names[1:]))
+
+    def test_admin_list_and_download(self):
+        self.authenticate(self.admin)
+        name = self.client.get(self.url, HTTP_X_PROFILE='1')['X-Profile']
+        self.client.credentials()
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin-profiles'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, name)
+
+        response = self.client.get(reverse('admin-profile-download', kwargs={'name': name}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('attachment', response['Content-Disposition'])
+        with open(os.path.join(self.directory, name), 'rb') as f:
+            self.assertEqual(b''.join(response.streaming_content), f.read())
+
+    def test_admin_download_outside_directory(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin-profile-download', kwargs={'name': '..secret.prof'}))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_admin_requires_staff(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('admin-profiles'))
+
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from rest_framework.test import APITestCase
+
+from smartgarden.caches import collaborated_circuit_ids
+from smartgarden.commons.fixtures import create_user
+from smartgarden.models import User, Circuit
+
+
+class ProvisionCommandTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.alice = create_user(email='alice@test.com', username='alice')
+        self.bob = create_user(email='bob@test.com', username='bob')
+
+    def write_manifest(self, suffix, content):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+
+        return path
+
+    def provision(self, path, *args):
+        out = StringIO()
+        call_command('provision', path, *args, stdout=out)
+
+        return out.getvalue()
+
+    def test_provision_csv(self):
+        path = self.write_manifest('.csv', 'circuit,device_email,device_password,active,collaborators\n'
+                                           'c1,d1@test.com,secret1,true,alice@test.com;bob@test.com\n'
+                                           'c2,d2@test.com,,false,bob@test.com\n')
+
+        out = self.provision(path, '--workers', '1')
+
+        self.assertIn('2 devices, 2 circuits, 3 collaborations', out)
+
+        d1 = User.objects.get(email='d1@test.com')
+        d2 = User.objects.get(email='d2@test.com')
+        self.assertEqual(User.UserType.DEVICE.value, d1.user_type)
+        self.assertTrue(d1.check_password('secret1'))
+        self.assertFalse(d2.has_usable_password())
+
+        c1 = Circuit.objects.get(controller=d1)
+        c2 = Circuit.objects.get(controller=d2)
+        self.assertEqual('c1', c1.name)
+        self.assertTrue(c1.active)
+        self.assertFalse(c2.active)
+        self.assertSetEqual({self.alice.pk, self.bob.pk}, set(c1.collaborators.values_list('pk', flat=True)))
+        self.assertSetEqual({self.bob.pk}, set(c2.collaborators.values_list('pk', flat=True)))
+
+    def test_provision_json_in_process_pool(self):
+        manifest = [
+            {'circuit': f'c{i}', 'device': {'email': f'd{i}@test.com', 'password': f'secret{i}'},
+             'collaborators': ['alice@test.com']}
+            for i in range(3)
+        ]
+        path = self.write_manifest('.json', json.dumps(manifest))
+
+        self.provision(path, '--workers', '2', '--batch-size', '2')
+
+        for i in range(3):
+            device = User.objects.get(email=f'd{i}@test.com')
+            self.assertTrue(device.check_password(f'secret{i}'))
+            self.assertTrue(Circuit.objects.filter(controller=device, name=f'c{i}', collaborators=self.alice).exists())
+
+    def test_provision_invalidates_collaborations(self):
+        self.assertSetEqual(set(), collaborated_circuit_ids(self.alice.pk))
+
+        path = self.write_manifest('.json', json.dumps([
+            {'circuit': 'c1', 'device': {'email': 'd1@test.com'}, 'collaborators': ['alice@test.com']}
+        ]))
+        self.provision(path, '--workers', '1')
+
+        circuit = Circuit.objects.get(name='c1')
+        self.assertSetEqual({circuit.pk}, set(collaborated_circuit_ids(self.alice.pk)))
+
+    def test_provision_unknown_collaborator(self):
+        path = self.write_manifest('.json', json.dumps([
+            {'circuit': 'c1', 'device': {'email': 'd1@test.com'}, 'collaborators': ['carol@test.com']}
+        ]))
+
+        with self.assertRaisesMessage(CommandError, 'carol@test.com'):
+            self.provision(path, '--workers', '1')
+
+        self.assertFalse(User.objects.filter(email='d1@test.com').exists())
+
+    def test_provision_existing_device(self):
+        path = self.write_manifest('.csv', 'circuit,device_email\nc1,alice@test.com\n')
+
+        with self.assertRaisesMessage(CommandError, 'alice@test.com'):
+            self.provision(path, '--workers', '1')
+
+    def test_provision_duplicate_device(self):
+        path = self.write_manifest('.csv', 'circuit,device_email\nc1,d1@test.com\nc2,d1@test.com\n')
+
+        with self.assertRaisesMessage(CommandError, 'd1@test.com'):
+            self.provision(path, '--workers', '1')
+
+        self.assertFalse(Circuit.objects.exists())
+
+    def test_provision_malformed(self):
+        path = self.write_manifest('.json', json.dumps([{'circuit': 'c1'}]))
+
+        with self.assertRaises(CommandError):
+            self.provision(path, '--workers', '1')
@@ -0,0 +1,90 @@
+import datetime
+import decimal
+import io
+import json
+import uuid
+from unittest import mock
+
+import pytz
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from smartgarden import parsers, renderers
+from smartgarden.parsers import FastJSONParser
+from smartgarden.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTest(APITestCase):
+    def setUp(self):
+        self.data = {
+            'id': 1,
+            'name': 'circuit ąę "quoted"     \\',
+            'active': True,
+            'nothing': None,
+            'amount': 1.5,
+            'timestamp': datetime.datetime(2021, 5, 1, 7, 8, 9, 123456, tzinfo=pytz.UTC),
+            'date': datetime.date(2021, 5, 1),
+            'time': datetime.time(7, 8, 9),
+            'duration': datetime.timedelta(minutes=5),
+            'decimal': decimal.Decimal('1.25'),
+            'uuid': uuid.UUID('12345678123456781234567812345678'),
+            'nested': [{'a': [1, 2, 3]}, []],
+        }
+
+    def test_orjson_installed(self):
+        # a dependency of the project, without it the renderer and the parser silently fall back to the stdlib
+        self.assertIsNotNone(renderers.orjson)
+        self.assertIsNotNone(parsers.orjson)
+
+    def test_same_output_as_json_renderer(self):
+        self.assertEqual(JSONRenderer().render(self.data), FastJSONRenderer().render(self.data))
+
+    def test_unsupported_values_fall_back(self):
+        data = {'big': 2 ** 70, 1: 'non string key'}
+
+        self.assertEqual(JSONRenderer().render(data), FastJSONRenderer().render(data))
+
+    def test_floats_decode_to_the_same_values(self):
+        data = {'values': [1e16, 1.5e-7, 0.1, -0.0]}
+
+        self.assertEqual(json.loads(JSONRenderer().render(data)), json.loads(FastJSONRenderer().render(data)))
+
+    def test_indent(self):
+        renderer = FastJSONRenderer()
+
+        self.assertEqual(JSONRenderer().render(self.data, 'application/json; indent=4'),
+                         renderer.render(self.data, 'application/json; indent=4'))
+
+    def test_none(self):
+        self.assertEqual(b'', FastJSONRenderer().render(None))
+
+    def test_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(JSONRenderer().render(self.data), FastJSONRenderer().render(self.data))
+
+
+class FastJSONParserTest(APITestCase):
+    def parse(self, parser, content: bytes):
+        return parser.parse(io.BytesIO(content), 'application/json', {'encoding': 'utf-8'})
+
+    def test_same_result_as_json_parser(self):
+        content = '{"name": "ąę \\u2028", "amount": 1.5, "items": [1, null, true], "nested": {"a": []}}'.encode()
+
+        self.assertEqual(self.parse(JSONParser(), content), self.parse(FastJSONParser(), content))
+
+    def test_invalid(self):
+        for content in [b'{', b'{"amount": NaN}', b'[1,]']:
+            with self.subTest(content=content), self.assertRaises(ParseError):
+                self.parse(FastJSONParser(), content)
+
+    def test_other_encoding(self):
+        content = '{"name": "ąę"}'.encode('utf-16')
+
+        self.assertEqual({'name': 'ąę'}, FastJSONParser().parse(io.BytesIO(content), 'application/json',
+                                                                {'encoding': 'utf-16'}))
+
+    def test_without_orjson(self):
+        with mock.patch.object(parsers, 'orjson', None):
+            self.assertEqual({'a': 1}, self.parse(FastJSONParser(), b'{"a": 1}'))
@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase, APIClient
+
+from smartgarden.commons.fixtures import create_user, create_circuit
+from smartgarden.models import Circuit
+from smartgarden.slow_queries import normalize_sql, RingBuffer, SLOT_SIZE, HEADER_SIZE, capture, get_buffer, \
+    summarize, SlowQueryRecorder
+
+
+class SlowQueriesTest(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'slow-queries')
+        SlowQueryRecorder.explained.clear()
+
+        self.user = create_user()
+        self.circuit = create_circuit(name='c1')
+        self.circuit.collaborators.add(self.user)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_normalize_sql(self):
+        self.assertEqual(normalize_sql("SELECT * FROM t WHERE a = 'x''y' AND b = 12 AND c IN (%s, %s, %s)\n LIMIT 1"),
+                         'SELECT * FROM t WHERE a = ? AND b = ? AND c IN (...) LIMIT ?')
+        self.assertEqual(normalize_sql('SELECT "t1"."id" FROM "t1" WHERE "t1"."x" = -1.5'),
+                         'SELECT "t1"."id" FROM "t1" WHERE "t1"."x" = ?')
+
+    def test_ring_buffer_bounded(self):
+        buffer = RingBuffer(self.path, capacity=3)
+
+        for i in range(5):
+            buffer.append({'i': i})
+
+        self.assertEqual([r['i'] for r in buffer.records()], [2, 3, 4])
+        self.assertLessEqual(os.path.getsize(self.path), HEADER_SIZE + 3 * SLOT_SIZE)
+
+    def test_ring_buffer_truncates_large_records(self):
+        buffer = RingBuffer(self.path, capacity=3)
+
+        buffer.append({'sql': 'x' * SLOT_SIZE * 2, 'plan': 'y' * SLOT_SIZE})
+
+        record, = buffer.records()
+        self.assertIsNone(record['plan'])
+        self.assertTrue(record['sql'].endswith('...'))
+
+    def test_ring_buffer_truncates_escaped_records(self):
+        buffer = RingBuffer(self.path, capacity=3)
+
+        buffer.append({'sql': '"' * SLOT_SIZE, 'plan': None})
+        buffer.append({'sql': '\u2603' * SLOT_SIZE, 'plan': None})
+        buffer.append({'sql': 'x', 'view': '"' * SLOT_SIZE, 'plan': None})
+
+        self.assertEqual([len(r['sql']) for r in buffer.records()], [SLOT_SIZE // 4 + 3, SLOT_SIZE // 8 + 3])
+        self.assertLessEqual(os.path.getsize(self.path), HEADER_SIZE + 2 * SLOT_SIZE)
+
+    def test_below_threshold_not_recorded(self):
+        with override_settings(SLOW_QUERY_LOG=self.path, SLOW_QUERY_THRESHOLD_MS=60000):
+            with capture():
+                list(Circuit.objects.all())
+
+            self.assertEqual(get_buffer().records(), [])
+
+    def test_recorded_with_plan(self):
+        with override_settings(SLOW_QUERY_LOG=self.path, SLOW_QUERY_THRESHOLD_MS=0.000001, SLOW_QUERY_EXPLAIN_RATE=0):
+            with capture(view='test'):
+                list(Circuit.objects.filter(pk=self.circuit.pk))
+                list(Circuit.objects.filter(pk=self.circuit.pk + 1))
+
+            records = get_buffer().records()
+
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]['sql'], records[1]['sql'])
+        self.assertEqual(records[0]['view'], 'test')
+        self.assertEqual(records[0]['alias'], connection.alias)
+        # the first occurrence is always explained, the later ones at the sampling rate
+        self.assertTrue(records[0]['plan'])
+        self.assertIsNone(records[1]['plan'])
+
+    def test_middleware_records_view(self):
+        with override_settings(SLOW_QUERY_LOG=self.path, SLOW_QUERY_THRESHOLD_MS=0.000001):
+            client = APIClient()
+            client.force_authenticate(self.user)
+            response = client.get(reverse('circuit-schedule', kwargs={'circuit_id': self.circuit.pk}))
+
+            records = get_buffer().records()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(records)
+        self.assertEqual({r['view'] for r in records}, {'circuit-schedule'})
+
+    def test_middleware_not_used_by_default(self):
+        with override_settings(SLOW_QUERY_LOG=self.path, SLOW_QUERY_THRESHOLD_MS=0):
+            client = APIClient()
+            client.force_authenticate(self.user)
+            client.get(reverse('circuit-schedule', kwargs={'circuit_id': self.circuit.pk}))
+
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_summarize(self):
+        groups = summarize([
+            {'sql': 'a', 'duration_ms': 5, 'view': 'x', 'plan': None},
+            {'sql': 'b', 'duration_ms': 8, 'view': 'y', 'plan': 'p'},
+            {'sql': 'a', 'duration_ms': 7, 'view': None, 'plan': None},
+        ])
+
+        self.assertEqual([g['sql'] for g in groups], ['a', 'b'])
+        self.assertEqual(groups[0]['count'], 2)
+        self.assertEqual(groups[0]['total_ms'], 12)
+        self.assertEqual(groups[0]['max_ms'], 7)
+        self.assertEqual(groups[0]['mean_ms'], 6)
+        self.assertEqual(dict(groups[0]['views']), {'x': 1, 'unknown': 1})
+        self.assertEqual(groups[1]['plan'], 'p')
+
+    def test_command(self):
+        buffer = RingBuffer(self.path, capacity=10)
+        buffer.append({'timestamp': 't', 'sql': 'SELECT ?', 'duration_ms': 12.5, 'view': 'v', 'plan': 'SCAN t'})
+
+        out = StringIO()
+        with override_settings(SLOW_QUERY_LOG=self.path):
+            call_command('slowqueries', '--plans', '--clear', stdout=out)
+
+        self.assertIn('total=12.5ms, count=1', out.getvalue())
+        self.assertIn('SELECT ?', out.getvalue())
+        self.assertIn('SCAN t', out.getvalue())
+        self.assertFalse(os.path.exists(self.path))
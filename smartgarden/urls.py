@@ -3,7 +3,8 @@ from rest_framework import routers
 
 from . import views
 from .views import ControlledCircuitView, CircuitScheduleView, CircuitOneTimeActivationView, acme_challenge, \
-    ControlledCircuitHealthCheckView, ActivationLogView
+    ControlledCircuitHealthCheckView, ActivationLogView, ActivationLogBulkView, CircuitUsageView, \
+    ActivationLogExportView, CircuitActivationLogExportView, CircuitActivationLogView, DueActivationsView, MetricsView
 
 router = routers.DefaultRouter()
 router.register(r'circuits', views.CircuitViewSet)
@@ -15,7 +16,16 @@ urlpatterns = [
     path('api/circuits/<int:circuit_id>/schedule', CircuitScheduleView.as_view(), name='circuit-schedule'),
     path('api/circuits/<int:circuit_id>/one-time-activations', CircuitOneTimeActivationView.as_view(),
          name='circuit-one-time-activations'),
+    path('api/circuits/<int:circuit_id>/usage', CircuitUsageView.as_view(), name='circuit-usage'),
+    path('api/circuits/<int:circuit_id>/activation-log', CircuitActivationLogView.as_view(),
+         name='circuit-activation-log-list'),
+    path('api/circuits/<int:circuit_id>/activation-log/export', CircuitActivationLogExportView.as_view(),
+         name='circuit-activation-log-export'),
+    path('api/due-activations', DueActivationsView.as_view(), name='due-activations'),
+    path('api/metrics', MetricsView.as_view(), name='metrics'),
+    path('api/activation-log/export', ActivationLogExportView.as_view(), name='activation-log-export'),
     path('api/circuits/mine/activation-log', ActivationLogView.as_view(), name='circuit-activation-log'),
+    path('api/circuits/mine/activation-log/bulk', ActivationLogBulkView.as_view(), name='circuit-activation-log-bulk'),
     path(".well-known/acme-challenge/AN2gxTItG3P8FliBhGOTJoaftesMcoHGjW3ZLyk3Qq4", acme_challenge),
     path('', views.index, name='index'),
 ]
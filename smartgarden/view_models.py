@@ -48,21 +48,12 @@ class CircuitViewModel:
         else:
             self.healthy = (datetime.datetime.now(tz=pytz.UTC) - circuit.health_check).total_seconds() / 60 < 15
 
-        if not circuit.one_time_activations:
+        one_time_activation = circuit.one_time_activation
+
+        if not one_time_activation:
             self.one_time_activation = None
         else:
-            one_time_activation = circuit \
-                .one_time_activations \
-                .filter(timestamp__date=datetime.date.today()) \
-                .order_by('-timestamp') \
-                .first()
-
-            if not one_time_activation:
-                self.one_time_activation = None
-            else:
-                self.one_time_activation = ScheduledOneTimeActivationViewModel(one_time_activation)
+            self.one_time_activation = ScheduledOneTimeActivationViewModel(one_time_activation)
 
-        if not circuit.schedule:
-            self.schedule = []
-        else:
-            self.schedule = [ScheduledActivationViewModel(s) for s in circuit.schedule.order_by('time')]
+        # sorted in memory, so a prefetched schedule is not queried again
+        self.schedule = [ScheduledActivationViewModel(s) for s in sorted(circuit.schedule.all(), key=lambda s: s.time)]
@@ -1,29 +1,85 @@
 import datetime
+from typing import List
 
 import pytz
+from django.core.cache import cache
+from django.core.paginator import Paginator
 from django.db import transaction
-from django.db.models import Prefetch
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.cache import parse_etags
 from django.views.decorators.http import require_GET
 from rest_framework import viewsets, status
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.exceptions import NotFound
 from rest_framework.generics import RetrieveAPIView, UpdateAPIView, ListAPIView, ListCreateAPIView, CreateAPIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
-
-from smartgarden.mixins import ExtractCircuitMixin
-from smartgarden.models import Circuit, User, ScheduledOneTimeActivation, ScheduledActivation, ActivationLog
+from rest_framework_simplejwt.authentication import JWTTokenUserAuthentication
+
+from smartgarden import exports
+from smartgarden.authentication import DeviceKeyAuthentication, CircuitTokenObtainPairSerializer
+from smartgarden.caches import circuit_list_key, get_circuit_list, set_circuit_list
+from smartgarden.due_activations import due_between
+from smartgarden.fast_serializers import CIRCUIT_FIELDS, serialize_circuits, serialize_circuit
+from smartgarden.heartbeats import heartbeat_buffer
+from smartgarden.ingest import NDJSON_CONTENT_TYPES, iter_ndjson, iter_json_array, ingest_activation_logs, \
+    insert_activation_logs
+from smartgarden.metrics import metrics, render as render_metrics
+from smartgarden.mixins import ExtractCircuitMixin, ControlledCircuitMixin
+from smartgarden.models import Circuit, ScheduledOneTimeActivation, ScheduledActivation, ActivationLog, \
+    HourlyActivationRollup, DailyActivationRollup
+from smartgarden.pagination import ScheduledActivationPagination, ScheduledOneTimeActivationPagination, \
+    ActivationLogPagination, DueActivationPagination
 from smartgarden.permissions import IsCircuitCollaboratorOnUnsafeOperations
+from smartgarden.rollups import truncate_hour
+from smartgarden.schedules import replace_schedule
 from smartgarden.serializers import CircuitSerializer, ScheduledActivationSerializer, \
-    ScheduledOneTimeActivationSerializer, ActivationLogSerializer
+    ScheduledOneTimeActivationSerializer, ActivationLogSerializer, UsageQuerySerializer, \
+    HourlyActivationRollupSerializer, DailyActivationRollupSerializer, ExportQuerySerializer, DueActivationSerializer, \
+    DueQuerySerializer
 from smartgarden.view_models import CircuitViewModel
 
+CIRCUITS_PER_PAGE = 50
+CIRCUIT_CARD_TIMEOUT = 24 * 60 * 60
+
+# device endpoints authenticate with a stateless token user, so no user is loaded per request, or with a device key
+DEVICE_AUTHENTICATION_CLASSES = [JWTTokenUserAuthentication, DeviceKeyAuthentication, SessionAuthentication]
+
+
+def render_circuit_cards(circuits: List[Circuit]) -> List[str]:
+    """
+    Renders a card of every circuit, reusing the cached ones. A card is cached under the config fingerprint of
+    its circuit, so any change of the circuit or its schedule renders it anew. Only the circuits without a cached
+    card are loaded with their schedule.
+    """
+
+    keys = {c.pk: f'circuit_card:{c.config_fingerprint}' for c in circuits}
+    cards = cache.get_many(keys.values())
+
+    missing = [pk for pk, key in keys.items() if key not in cards]
+    if missing:
+        rendered = {
+            keys[c.pk]: render_to_string('smartgarden/circuit_card.html', {'circuit': CircuitViewModel(c)})
+            for c in Circuit.objects.filter(pk__in=missing).with_related()
+        }
+        cache.set_many(rendered, timeout=CIRCUIT_CARD_TIMEOUT)
+        cards.update(rendered)
+
+    return [cards[keys[c.pk]] for c in circuits]
+
 
 def index(request):
+    circuits = Circuit.objects \
+        .only('pk', 'config_version', 'health_check') \
+        .order_by('pk')
+    page = Paginator(circuits, CIRCUITS_PER_PAGE).get_page(request.GET.get('page'))
+
     context = {
-        'circuits': [CircuitViewModel(c) for c in Circuit.objects.all()]
+        'cards': render_circuit_cards(list(page)),
+        'page': page
     }
     return render(request, 'smartgarden/circuits.html', context)
 
@@ -39,47 +95,85 @@ class CircuitViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = Circuit.objects.all()
 
-    today_one_time_activations = ScheduledOneTimeActivation \
-        .objects \
-        .filter(timestamp__date=datetime.date.today()) \
-        .order_by('-timestamp')
-
-    one_time_activations_prefetch = Prefetch('one_time_activations', today_one_time_activations)
-
     def get_queryset(self):
         return Circuit \
             .objects \
             .filter(collaborators__pk=self.request.user.pk) \
-            .prefetch_related(self.one_time_activations_prefetch) \
-            .prefetch_related('schedule') \
+            .with_related() \
             .all()
 
+    def list(self, request, *args, **kwargs):
+        key = circuit_list_key(request.user.pk, request.META.get('QUERY_STRING', ''))
+
+        data = get_circuit_list(key)
+        if data is not None:
+            return Response(data)
+
+        # read-only rows serialized without model instances, the same data CircuitSerializer produces
+        rows = Circuit \
+            .objects \
+            .filter(collaborators__pk=request.user.pk) \
+            .values(*CIRCUIT_FIELDS)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            response = self.get_paginated_response(serialize_circuits(page))
+        else:
+            response = Response(serialize_circuits(list(rows)))
+
+        set_circuit_list(key, response.data)
+
+        return response
+
+
+class DeviceTokenObtainView(APIView):
+    authentication_classes = [DeviceKeyAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        refresh = CircuitTokenObtainPairSerializer.get_token(request.user)
+
+        return Response(status=status.HTTP_200_OK, data={'refresh': str(refresh), 'access': str(refresh.access_token)})
 
-class ControlledCircuitView(RetrieveAPIView):
+
+class ControlledCircuitView(RetrieveAPIView, ControlledCircuitMixin):
     serializer_class = CircuitSerializer
+    authentication_classes = DEVICE_AUTHENTICATION_CLASSES
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
         try:
-            user = User.objects.get(pk=request.user.pk)
-            circuit = user.controlled_circuit
-            serializer = self.serializer_class(circuit, many=False)
-
-            return Response(status=status.HTTP_200_OK, data=serializer.data)
+            row = self.get_controlled_circuits() \
+                .values(*CIRCUIT_FIELDS, 'config_version') \
+                .get()
         except Circuit.DoesNotExist:
             raise NotFound(detail="circuit not assigned", code=404)
 
+        etag = Circuit(id=row['id'], config_version=row['config_version'], health_check=row['health_check']).config_etag
+
+        # weak comparison, compressed responses carry the weak form of the ETag
+        etags = [e[2:] if e.startswith('W/') else e for e in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))]
+        if etag in etags or '*' in etags:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        return Response(status=status.HTTP_200_OK, data=serialize_circuit(row), headers={'ETag': etag})
 
-class ControlledCircuitHealthCheckView(APIView):
+
+class ControlledCircuitHealthCheckView(APIView, ControlledCircuitMixin):
     serializer_class = CircuitSerializer
+    authentication_classes = DEVICE_AUTHENTICATION_CLASSES
     permission_classes = [IsAuthenticated]
 
     def patch(self, request):
+        if request.query_params.get('mode') == 'heartbeat':
+            return self.heartbeat(request)
+
         try:
-            user = User.objects.get(pk=request.user.pk)
-            circuit = user.controlled_circuit
+            circuit = self.get_controlled_circuits() \
+                .with_related() \
+                .get()
             circuit.health_check = datetime.datetime.now(tz=pytz.UTC)
-            circuit.save()
+            circuit.save(update_fields=['health_check'])
 
             serializer = self.serializer_class(circuit, many=False)
 
@@ -87,9 +181,16 @@ class ControlledCircuitHealthCheckView(APIView):
         except Circuit.DoesNotExist:
             raise NotFound(detail="circuit not assigned", code=404)
 
+    def heartbeat(self, request):
+        # checked against the controller of the circuit when flushed, so the request takes no queries
+        heartbeat_buffer.record(self.controlled_circuit_id, request.user.pk, datetime.datetime.now(tz=pytz.UTC))
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 class CircuitScheduleView(ListAPIView, UpdateAPIView, ExtractCircuitMixin):
     serializer_class = ScheduledActivationSerializer
+    pagination_class = ScheduledActivationPagination
     queryset = ScheduledActivation.objects.all()
     lookup_field = 'circuit_id'
     permission_classes = [IsAuthenticated & IsCircuitCollaboratorOnUnsafeOperations]
@@ -106,18 +207,14 @@ class CircuitScheduleView(ListAPIView, UpdateAPIView, ExtractCircuitMixin):
         serializer.is_valid(raise_exception=True)
 
         with transaction.atomic():
-            self.get_queryset().delete()
-
-            for item in serializer.validated_data:
-                item['circuit_id'] = self.circuit_id
-
-            serializer.create(serializer.validated_data)
+            replace_schedule(self.circuit_id, serializer.validated_data)
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class CircuitOneTimeActivationView(ListCreateAPIView, ExtractCircuitMixin):
     serializer_class = ScheduledOneTimeActivationSerializer
+    pagination_class = ScheduledOneTimeActivationPagination
     queryset = ScheduledOneTimeActivation.objects.all()
     lookup_field = 'circuit_id'
     permission_classes = [IsAuthenticated & IsCircuitCollaboratorOnUnsafeOperations]
@@ -125,7 +222,7 @@ class CircuitOneTimeActivationView(ListCreateAPIView, ExtractCircuitMixin):
     def get_queryset(self):
         return self.queryset \
             .filter(circuit_id=self.circuit_id) \
-            .filter(timestamp__date=datetime.date.today()) \
+            .today() \
             .order_by('-timestamp')
 
     def post(self, request, *args, **kwargs):
@@ -142,20 +239,12 @@ class CircuitOneTimeActivationView(ListCreateAPIView, ExtractCircuitMixin):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class ActivationLogView(CreateAPIView):
+class ActivationLogView(CreateAPIView, ControlledCircuitMixin):
     serializer_class = ActivationLogSerializer
     queryset = ActivationLog.objects.all()
+    authentication_classes = DEVICE_AUTHENTICATION_CLASSES
     permission_classes = [IsAuthenticated]
 
-    @property
-    def circuit_id(self):
-        return self.circuit.pk
-
-    @property
-    def circuit(self):
-        user = User.objects.get(pk=self.request.user.pk)
-        return user.controlled_circuit
-
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(
             data=request.data,
@@ -163,11 +252,132 @@ class ActivationLogView(CreateAPIView):
         )
         serializer.is_valid(raise_exception=True)
 
-        try:
-            with transaction.atomic():
-                serializer.validated_data['circuit_id'] = self.circuit_id
-                serializer.create(serializer.validated_data)
+        circuit_id = self.verified_controlled_circuit_id
+        insert_activation_logs([ActivationLog(circuit_id=circuit_id, **serializer.validated_data)])
 
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except Circuit.DoesNotExist:
-            raise NotFound(detail="circuit not assigned", code=404)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class CircuitActivationLogView(ListAPIView, ExtractCircuitMixin):
+    serializer_class = ActivationLogSerializer
+    pagination_class = ActivationLogPagination
+    queryset = ActivationLog.objects.all()
+    lookup_field = 'circuit_id'
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return self.queryset \
+            .filter(circuit_id=self.circuit_id) \
+            .filter(circuit__collaborators__pk=self.request.user.pk)
+
+
+class ActivationLogBulkView(APIView, ControlledCircuitMixin):
+    authentication_classes = DEVICE_AUTHENTICATION_CLASSES
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        # the body is read straight from the underlying request, so it is never buffered as a whole
+        if request.content_type.split(';')[0].strip() in NDJSON_CONTENT_TYPES:
+            entries = iter_ndjson(request._request)
+        else:
+            entries = iter_json_array(request._request)
+
+        result = ingest_activation_logs(self.verified_controlled_circuit_id, entries)
+
+        return Response(status=status.HTTP_200_OK, data={'accepted': result.accepted, 'errors': result.errors})
+
+
+class CircuitUsageView(APIView, ExtractCircuitMixin):
+    lookup_field = 'circuit_id'
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        query = UsageQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        start = query.validated_data['start']
+        end = query.validated_data['end']
+
+        # bounds are aligned down to the requested resolution
+        if query.validated_data['resolution'] == UsageQuerySerializer.RESOLUTION_HOUR:
+            rollups = HourlyActivationRollup.objects.filter(bucket__gte=truncate_hour(start),
+                                                            bucket__lt=truncate_hour(end))
+            serializer_class = HourlyActivationRollupSerializer
+        else:
+            rollups = DailyActivationRollup.objects.filter(bucket__gte=start.astimezone(pytz.UTC).date(),
+                                                           bucket__lt=end.astimezone(pytz.UTC).date())
+            serializer_class = DailyActivationRollupSerializer
+
+        buckets = list(rollups
+                       .filter(circuit_id=self.circuit_id, circuit__collaborators__pk=request.user.pk)
+                       .order_by('bucket'))
+
+        data = {
+            'count': sum(b.count for b in buckets),
+            'total': sum(b.total for b in buckets),
+            'min_amount': min((b.min_amount for b in buckets), default=None),
+            'max_amount': max((b.max_amount for b in buckets), default=None),
+            'buckets': serializer_class(buckets, many=True).data
+        }
+
+        return Response(status=status.HTTP_200_OK, data=data)
+
+
+class ActivationLogExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return ActivationLog.objects \
+            .filter(circuit__collaborators__pk=self.request.user.pk) \
+            .order_by('circuit_id', 'timestamp')
+
+    def get(self, request, *args, **kwargs):
+        query = ExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        activation_logs = self.get_queryset()
+
+        if 'start' in query.validated_data:
+            activation_logs = activation_logs.filter(timestamp__gte=query.validated_data['start'])
+        if 'end' in query.validated_data:
+            activation_logs = activation_logs.filter(timestamp__lt=query.validated_data['end'])
+
+        if query.validated_data['output'] == ExportQuerySerializer.OUTPUT_NDJSON:
+            response = StreamingHttpResponse(exports.iter_ndjson(activation_logs), content_type='application/x-ndjson')
+            extension = 'ndjson'
+        else:
+            response = StreamingHttpResponse(exports.iter_csv(activation_logs), content_type='text/csv')
+            extension = 'csv'
+
+        response['Content-Disposition'] = f'attachment; filename="activation-log.{extension}"'
+
+        return response
+
+
+class CircuitActivationLogExportView(ActivationLogExportView, ExtractCircuitMixin):
+    lookup_field = 'circuit_id'
+
+    def get_queryset(self):
+        return super().get_queryset().filter(circuit_id=self.circuit_id)
+
+
+class DueActivationsView(ListAPIView):
+    serializer_class = DueActivationSerializer
+    pagination_class = DueActivationPagination
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        query = DueQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+
+        start = query.validated_data.get('start', datetime.datetime.now(tz=pytz.UTC))
+        end = start + datetime.timedelta(minutes=query.validated_data['minutes'])
+
+        return due_between(start, end)
+
+
+class MetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(render_metrics(metrics.collect()), content_type='text/plain; version=0.0.4; charset=utf-8')